@@ -0,0 +1,277 @@
+"""
+ASGI entry point for the Enhanced TranslateAll API
+
+Usage:
+    uvicorn asgi:application --workers 4
+
+The translation endpoints (/translate, /translate-batch, /demo-translate) are
+served natively on asyncio, so an uncached translation awaits DeepL instead of
+holding a worker thread; one process can keep thousands of upstream calls in
+flight (see ASYNC_UPSTREAM_CONNECTIONS). Every other route is the unchanged
+Flask app, adapted through asgiref's WsgiToAsgi.
+"""
+
+import asyncio
+import json
+import math
+import time
+from typing import AsyncIterator, Dict, Optional, Tuple, Union
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.datastructures import Headers
+
+import main
+
+flask_application = WsgiToAsgi(main.app)
+
+
+class AsgiRequest:
+    """Minimal request view with the attributes IPRateLimiter reads (headers, remote_addr)"""
+
+    def __init__(self, scope):
+        self.headers = Headers([(k.decode('latin-1'), v.decode('latin-1')) for k, v in scope.get('headers', [])])
+        client = scope.get('client')
+        self.remote_addr = client[0] if client else None
+        self.path = scope.get('path', '/')
+        self.args = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+        self.started = time.time()
+    
+    def wants_ndjson(self) -> bool:
+        return (self.args.get('stream', '').lower() in ('1', 'true')
+                or 'application/x-ndjson' in self.headers.get('Accept', ''))
+
+
+class NdjsonStream:
+    """Handler result streamed as one JSON line per (index, result)"""
+
+    def __init__(self, indexed_results: AsyncIterator[Tuple[int, Dict]]):
+        self.indexed_results = indexed_results
+
+
+class RequestTooLargeError(Exception):
+    """Request body over MAX_REQUEST_BYTES; reading stops as soon as the limit is crossed"""
+
+
+async def _read_json(receive, limit: int) -> Optional[Dict]:
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if len(body) > limit:
+            raise RequestTooLargeError()
+        if not message.get('more_body'):
+            break
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        return None
+
+
+async def _send_json(send, payload: Dict, status: int = 200):
+    body = json.dumps(payload).encode()
+    headers = [(b'content-type', b'application/json'),
+               (b'content-length', str(len(body)).encode()),
+               (b'access-control-allow-origin', b'*')]
+    if payload.get('retry_after'):
+        headers.append((b'retry-after', str(math.ceil(payload['retry_after'])).encode()))
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': headers,
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _send_ndjson(send, stream: NdjsonStream):
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'application/x-ndjson'),
+                    (b'access-control-allow-origin', b'*'),
+                    (b'x-accel-buffering', b'no')],
+    })
+    try:
+        async for index, result in stream.indexed_results:
+            line = json.dumps(dict(result, index=index)) + '\n'
+            await send({'type': 'http.response.body', 'body': line.encode(), 'more_body': True})
+    except Exception as e:
+        line = json.dumps({'success': False, 'error': str(e)}) + '\n'
+        await send({'type': 'http.response.body', 'body': line.encode(), 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+# ==== ASYNC TRANSLATION ENDPOINTS ====
+
+async def translate(request: AsgiRequest, body: Optional[Dict]) -> Tuple[Dict, int]:
+    """Async /translate, same contract as the Flask route"""
+    key = request.headers.get('X-API-KEY')
+    if not key:
+        return {'success': False, 'error': 'API key required'}, 401
+
+    if not main.translation_backends.is_configured():
+        return {'success': False, 'error': 'Translation service not configured. Please contact administrator.'}, 503
+
+    text = (body or {}).get('text', '')
+    if not isinstance(text, str):
+        return main.invalid_text_response()
+    text = text.strip()
+    target_lang = main.canonical.normalize_target_lang((body or {}).get('target', 'ES'))
+    if not target_lang:
+        return main.unsupported_language_response((body or {}).get('target'))
+    source_lang = main.canonical.normalize_source_lang((body or {}).get('source'))
+    if (body or {}).get('source') and not source_lang:
+        return {'success': False, 'error': f"Unsupported source language: {body.get('source')}"}, 400
+    if len(text) > main.MAX_TEXT_LENGTH:
+        return main.text_too_long_response()
+
+    error = await asyncio.to_thread(main.charge_api_key, key)
+    if error:
+        return error
+
+    if not text:
+        return {'success': False, 'error': 'No text provided'}, 200
+
+    try:
+        result = await main.cache_orchestrator.handle_translation_request_async(
+            text, target_lang, key, request=request,
+            endpoint_type='paid' if key != 'demo' else 'demo',
+            deadline=main.Deadline.for_request('translate', request, request.started),
+            segment=bool((body or {}).get('segment', main.SEGMENT_LONG_TEXTS)),
+            source_lang=source_lang
+        )
+        if not result.get('success'):
+            return main.translation_failure_response(result)
+        return result, 200
+
+    except Exception as e:
+        return {'success': False, 'error': f'Translation service error: {str(e)}'}, 500
+
+
+async def translate_batch(request: AsgiRequest, body: Optional[Dict]) -> Union[Tuple[Dict, int], NdjsonStream]:
+    """Async /translate-batch, same contract as the Flask route"""
+    key = request.headers.get('X-API-KEY')
+    if not key:
+        return {'success': False, 'error': 'API key required'}, 401
+
+    texts = (body or {}).get('texts', [])
+    target_lang = main.canonical.normalize_target_lang((body or {}).get('target', 'ES'))
+    if not texts or not isinstance(texts, list):
+        return {'success': False, 'error': 'No texts provided'}, 200
+    if not target_lang:
+        return main.unsupported_language_response((body or {}).get('target'))
+    if len(texts) > 50:
+        return {'success': False, 'error': 'Too many texts (max 50)'}, 200
+    if not all(isinstance(text, str) for text in texts):
+        return main.invalid_text_response()
+
+    error = await asyncio.to_thread(main.charge_api_key, key, len(texts), 'Quota would be exceeded')
+    if error:
+        return error
+
+    try:
+        call_endpoint_type = 'paid' if key != 'demo' else 'demo'
+        if request.wants_ndjson():
+            return NdjsonStream(main.cache_orchestrator.batch_translator.iter_batch_async(
+                texts, target_lang, request=request, api_key=key, endpoint_type=call_endpoint_type,
+                deadline=main.Deadline.for_request('translate-batch', request, request.started)
+            ))
+        results = await main.cache_orchestrator.batch_translator.translate_batch_async(
+            texts, target_lang, request=request, api_key=key, endpoint_type=call_endpoint_type,
+            deadline=main.Deadline.for_request('translate-batch', request, request.started)
+        )
+        return {'success': True, 'results': results}, 200
+
+    except Exception as e:
+        return {'success': False, 'error': str(e)}, 500
+
+
+async def demo_translate(request: AsgiRequest, body: Optional[Dict]) -> Tuple[Dict, int]:
+    """Async /demo-translate, same contract as the Flask route"""
+    text = (body or {}).get('text', '')
+    if not isinstance(text, str):
+        return main.invalid_text_response()
+    text = text.strip()
+    target_lang = main.canonical.normalize_target_lang((body or {}).get('target', 'ES'))
+    if not text:
+        return {'success': False, 'error': 'No text provided'}, 200
+    if not target_lang:
+        return main.unsupported_language_response((body or {}).get('target'))
+    if len(text) > main.MAX_TEXT_LENGTH:
+        return main.text_too_long_response()
+
+    if not main.translation_backends.is_configured():
+        return {'success': False, 'error': 'Translation service not configured'}, 200
+
+    try:
+        result = await main.cache_orchestrator.handle_translation_request_async(
+            text, target_lang, 'demo', request=request, endpoint_type='demo',
+            deadline=main.Deadline.for_request('demo-translate', request, request.started)
+        )
+        if not result.get('success'):
+            error_msg = result.get('error', 'Translation failed')
+            if error_msg and "DeepL API calls from your IP" in error_msg:
+                return {'success': False, 'error': error_msg, 'ip_rate_limit': result.get('ip_rate_limit')}, 429
+            if result.get('circuit_open') or result.get('overloaded') or result.get('degraded') or result.get('deadline_exceeded'):
+                return main.translation_failure_response(result)
+        return result, 200
+
+    except Exception as e:
+        return {'success': False, 'error': f'Translation error: {str(e)}'}, 500
+
+
+ASYNC_ROUTES = {
+    ('POST', '/translate'): translate,
+    ('POST', '/translate-batch'): translate_batch,
+    ('POST', '/demo-translate'): demo_translate,
+}
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            if main.AUTO_MIGRATE:
+                await asyncio.to_thread(main.ensure_schema)
+            await asyncio.to_thread(main.job_manager.resume_jobs)
+            main.cache_orchestrator.priority_cache.start_refresh_scheduler()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await main.async_deepl_client.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    """ASGI application: native async translation routes, Flask for everything else"""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+
+    handler = ASYNC_ROUTES.get((scope.get('method'), scope.get('path'))) if scope['type'] == 'http' else None
+    if handler is None:
+        await flask_application(scope, receive, send)
+        return
+
+    if main.AUTO_MIGRATE and not main._schema_ready:
+        await asyncio.to_thread(main.ensure_schema)
+
+    request = AsgiRequest(scope)
+    main.admission_controller.request_started(request.headers, request.started)
+    try:
+        try:
+            declared = request.headers.get('Content-Length', '')
+            if declared.isdigit() and int(declared) > main.MAX_REQUEST_BYTES:
+                raise RequestTooLargeError()
+            body = await _read_json(receive, main.MAX_REQUEST_BYTES)
+        except RequestTooLargeError:
+            await _send_json(send, {'success': False,
+                                    'error': f'Request body too large (max {main.MAX_REQUEST_BYTES} bytes)'}, 413)
+            return
+        response = await handler(request, body)
+        if isinstance(response, NdjsonStream):
+            await _send_ndjson(send, response)
+        else:
+            await _send_json(send, *response)
+    finally:
+        main.admission_controller.request_finished()
@@ -0,0 +1,91 @@
+"""
+Canonical forms for language codes and texts in the Enhanced TranslateAll API
+
+Every cache tier (translation cache, priority cache, hot phrases, translation
+memory templates) keys entries on these forms, so "es", "ES" and "es-ES", or
+"Hello " and "Hello", share one entry and one upstream call. Like
+migrations.py, this module only depends on the standard library so the schema
+migrations can use it to merge existing duplicates.
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import Optional
+
+SUPPORTED_TARGET_LANGUAGES = [  # DeepL target languages
+    'AR', 'BG', 'CS', 'DA', 'DE', 'EL', 'EN-GB', 'EN-US', 'ES', 'ET', 'FI', 'FR', 'HU', 'ID', 'IT', 'JA',
+    'KO', 'LT', 'LV', 'NB', 'NL', 'PL', 'PT-BR', 'PT-PT', 'RO', 'RU', 'SK', 'SL', 'SV', 'TR', 'UK', 'ZH'
+]
+SUPPORTED_SOURCE_LANGUAGES = [  # DeepL source languages (no regional variants)
+    'AR', 'BG', 'CS', 'DA', 'DE', 'EL', 'EN', 'ES', 'ET', 'FI', 'FR', 'HU', 'ID', 'IT', 'JA',
+    'KO', 'LT', 'LV', 'NB', 'NL', 'PL', 'PT', 'RO', 'RU', 'SK', 'SL', 'SV', 'TR', 'UK', 'ZH'
+]
+
+# Codes clients commonly send that DeepL spells differently
+LANGUAGE_ALIASES = {
+    'EN': 'EN-US', 'EN-UK': 'EN-GB', 'EN-AU': 'EN-GB', 'EN-IE': 'EN-GB', 'EN-NZ': 'EN-GB',
+    'PT': 'PT-PT', 'NO': 'NB', 'NN': 'NB',
+    'ZH-CN': 'ZH', 'ZH-SG': 'ZH', 'ZH-HANS': 'ZH',
+}
+# Variants a base-language fallback would silently get wrong (DeepL's ZH target is Simplified)
+UNSUPPORTED_TARGET_VARIANTS = {'ZH-TW', 'ZH-HK', 'ZH-MO', 'ZH-HANT'}
+
+class DetectedLanguage(str):
+    """
+    A source language code guessed from the text rather than given by the client. It is sent
+    upstream like any code, but never scopes a cache key: whether detection happened to be
+    confident must not split one text's cache entries.
+    """
+
+
+_HORIZONTAL_SPACE = re.compile(r'[ \t\f\v]+')
+_SPACE_AROUND_NEWLINE = re.compile(r' ?\n ?')
+
+
+def _clean_code(code) -> str:
+    return str(code or '').strip().upper().replace('_', '-')
+
+
+def _lang_candidates(code) -> list:
+    code = _clean_code(code)
+    base = code.split('-')[0]
+    return [code, LANGUAGE_ALIASES.get(code), base, LANGUAGE_ALIASES.get(base)]
+
+
+def normalize_target_lang(code) -> Optional[str]:
+    """Supported DeepL target code for code ('es', 'ES-ES', 'en_us', 'pt'), or None if unsupported"""
+    if _clean_code(code) in UNSUPPORTED_TARGET_VARIANTS:
+        return None
+    for candidate in _lang_candidates(code):
+        if candidate in SUPPORTED_TARGET_LANGUAGES:
+            return candidate
+    return None
+
+
+def normalize_source_lang(code) -> Optional[str]:
+    """Supported DeepL source code for code ('en-US' -> 'EN'), or None if unsupported or empty"""
+    for candidate in _lang_candidates(code):
+        base = (candidate or '').split('-')[0]
+        if base in SUPPORTED_SOURCE_LANGUAGES:
+            return base
+    return None
+
+
+def normalize_text(text: str) -> str:
+    """
+    Meaning-preserving canonical text: Unicode NFC, unified line endings, runs of spaces/tabs
+    collapsed and leading/trailing whitespace trimmed. Case, punctuation, line breaks and
+    non-breaking spaces are kept, since they can change the translation.
+    """
+    text = unicodedata.normalize('NFC', text).replace('\r\n', '\n').replace('\r', '\n')
+    text = _HORIZONTAL_SPACE.sub(' ', text)
+    return _SPACE_AROUND_NEWLINE.sub('\n', text).strip()
+
+
+def text_hash(text: str, source_lang: Optional[str] = None) -> str:
+    """Cache key hash of the canonical form of text, scoped to its source language when the client gave one"""
+    key = normalize_text(text)
+    if source_lang and not isinstance(source_lang, DetectedLanguage):
+        key = f'{source_lang}:{key}'
+    return hashlib.md5(key.encode()).hexdigest()
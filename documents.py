@@ -0,0 +1,227 @@
+"""
+Structured documents for the Enhanced TranslateAll API
+
+Pulls the translatable strings out of an HTML fragment (text nodes and a few
+human-readable attributes) or a JSON/i18n resource bundle (string values,
+never keys), and puts translations back without touching the rest of the
+document. Markup, script/style/code content, identifiers, URLs and strings
+without letters are left alone. Like canonical.py, this only depends on the
+standard library.
+"""
+
+import json
+import re
+from html import escape
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Union
+
+# Elements whose content is code or not shown as prose
+SKIP_TAGS = {'script', 'style', 'code', 'pre', 'kbd', 'samp', 'var', 'noscript', 'template', 'textarea', 'svg', 'math'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr'}
+TRANSLATABLE_ATTRIBUTES = {'alt', 'title', 'placeholder', 'aria-label'}
+
+# URLs, paths, identifiers (icon_home, app.title, file.txt): one token with a separator
+_CODE_LIKE = re.compile(r'^(?:[a-z][a-z0-9+.-]*://\S+|[\w-]*[_/\\][\w./\\-]*|[\w-]+(?:\.[\w-]+)+)$', re.IGNORECASE)
+
+
+def is_translatable(text: str) -> bool:
+    """Whether a string is prose worth translating (has letters, isn't a URL, path or identifier)"""
+    text = text.strip()
+    return any(ch.isalpha() for ch in text) and not _CODE_LIKE.match(text)
+
+
+class _HtmlExtractor(HTMLParser):
+    """Records the source spans of translatable text nodes and of start tags with translatable attributes"""
+
+    def __init__(self, source: str):
+        super().__init__(convert_charrefs=True)
+        self.line_starts = [0] + [m.end() for m in re.finditer('\n', source)]
+        self.length = len(source)
+        self.stack = []    # (tag, skipped) for open elements
+        self.nodes = []    # (start, end, kind, payload)
+        self.pending = None
+
+    def _offset(self) -> int:
+        line, column = self.getpos()
+        return self.line_starts[line - 1] + column
+
+    def _skipped(self) -> bool:
+        return bool(self.stack) and self.stack[-1][1]
+
+    def _flush(self, end: Optional[int] = None):
+        # A text node ends where the next construct starts
+        if self.pending:
+            start, data = self.pending
+            if is_translatable(data):
+                self.nodes.append((start, self._offset() if end is None else end, 'text', data))
+            self.pending = None
+
+    def _start(self, tag: str, attrs: list, self_closing: bool):
+        self._flush()
+        values = dict(attrs)
+        skipped = (self._skipped() or tag in SKIP_TAGS or (values.get('translate') or '').lower() == 'no'
+                   or 'notranslate' in (values.get('class') or '').split())
+        if not skipped and any(name in TRANSLATABLE_ATTRIBUTES and value and is_translatable(value)
+                               for name, value in attrs):
+            start = self._offset()
+            self.nodes.append((start, start + len(self.get_starttag_text()), 'tag', (tag, attrs, self_closing)))
+        if not self_closing and tag not in VOID_TAGS:
+            self.stack.append((tag, skipped))
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs, False)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, True)
+
+    def handle_endtag(self, tag):
+        self._flush()
+        # Tolerate unclosed elements: close everything up to the matching tag
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i][0] == tag:
+                del self.stack[i:]
+                break
+
+    def handle_data(self, data):
+        if self._skipped():
+            return
+        if self.pending:
+            self.pending[1] += data
+        else:
+            self.pending = [self._offset(), data]
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+
+    def close(self):
+        super().close()
+        self._flush(self.length)
+
+
+class HtmlDocument:
+    """An HTML fragment with its translatable text nodes and attribute values (inline tags split a node)"""
+
+    format = 'html'
+
+    def __init__(self, source: str):
+        self.source = source
+        parser = _HtmlExtractor(source)
+        parser.feed(source)
+        parser.close()
+        self.nodes = parser.nodes
+
+    @staticmethod
+    def _text(value: str) -> str:
+        # Whitespace runs render as one space in HTML
+        return ' '.join(value.split())
+
+    def strings(self) -> List[str]:
+        """Every translatable string in document order (duplicates included)"""
+        strings = []
+        for _, _, kind, payload in self.nodes:
+            if kind == 'text':
+                strings.append(self._text(payload))
+            else:
+                strings.extend(self._text(value) for name, value in payload[1]
+                               if name in TRANSLATABLE_ATTRIBUTES and value and is_translatable(value))
+        return strings
+
+    def render(self, translations: Dict[str, str]) -> str:
+        """The document with every string replaced by its translation (strings without one are kept)"""
+        parts = []
+        position = 0
+        for start, end, kind, payload in self.nodes:
+            parts.append(self.source[position:start])
+            position = end
+            if kind == 'text':
+                text = self._text(payload)
+                if text not in translations:
+                    parts.append(self.source[start:end])
+                    continue
+                lead = payload[:len(payload) - len(payload.lstrip())]
+                trail = payload[len(payload.rstrip()):]
+                parts.append(lead + escape(translations[text], quote=False) + trail)
+            else:
+                # Only start tags carrying translated attributes are re-serialized
+                tag, attrs, self_closing = payload
+                if not any(name in TRANSLATABLE_ATTRIBUTES and value and self._text(value) in translations
+                           for name, value in attrs):
+                    parts.append(self.source[start:end])
+                    continue
+                rendered = []
+                for name, value in attrs:
+                    if value is None:
+                        rendered.append(f' {name}')
+                        continue
+                    if name in TRANSLATABLE_ATTRIBUTES:
+                        value = translations.get(self._text(value), value)
+                    rendered.append(f' {name}="{escape(value)}"')
+                parts.append(f"<{tag}{''.join(rendered)}{' /' if self_closing else ''}>")
+        parts.append(self.source[position:])
+        return ''.join(parts)
+
+
+class JsonDocument:
+    """A JSON document or i18n resource bundle; string values are translated, keys never are"""
+
+    format = 'json'
+
+    def __init__(self, data: Union[dict, list], as_text: bool = False):
+        self.data = data
+        self.as_text = as_text
+
+    @staticmethod
+    def _skip_key(key) -> bool:
+        # ARB-style metadata ("@title": {"description": ...}) and schema references
+        return isinstance(key, str) and (key.startswith('@') or key.startswith('$'))
+
+    def _walk(self, value, translate):
+        if isinstance(value, dict):
+            return {key: item if self._skip_key(key) else self._walk(item, translate) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._walk(item, translate) for item in value]
+        if isinstance(value, str) and is_translatable(value):
+            return translate(value)
+        return value
+
+    def strings(self) -> List[str]:
+        """Every translatable string value in document order (duplicates included)"""
+        strings = []
+        self._walk(self.data, lambda value: strings.append(value) or value)
+        return strings
+
+    def render(self, translations: Dict[str, str]) -> Union[dict, list, str]:
+        """The document with every string value replaced by its translation, as JSON text if it came as text"""
+        translated = self._walk(self.data, lambda value: translations.get(value, value))
+        return json.dumps(translated, ensure_ascii=False) if self.as_text else translated
+
+
+def parse_document(document, fmt: Optional[str] = None) -> Union[HtmlDocument, JsonDocument]:
+    """
+    Parse a document as 'html' or 'json'. Without a format, a string is HTML and an object or array
+    is JSON. A JSON string document is parsed and rendered back as a string. Raises ValueError.
+    """
+    fmt = (fmt or ('html' if isinstance(document, str) else 'json')).lower()
+    if fmt == 'html':
+        if not isinstance(document, str):
+            raise ValueError('HTML documents must be sent as a string')
+        return HtmlDocument(document)
+    if fmt == 'json':
+        if isinstance(document, str):
+            try:
+                return JsonDocument(json.loads(document), as_text=True)
+            except ValueError:
+                raise ValueError('Document is not valid JSON')
+        if isinstance(document, (dict, list)):
+            return JsonDocument(document)
+        raise ValueError('JSON documents must be an object, an array or a JSON string')
+    raise ValueError(f'Unsupported document format: {fmt}')
@@ -0,0 +1,66 @@
+"""
+Gunicorn configuration for the Enhanced TranslateAll API
+
+Usage:
+    gunicorn -c gunicorn.conf.py main:app
+
+Translation requests spend most of their time waiting on DeepL (up to the
+10-second upstream timeout), so the app is served with a threaded (gthread)
+or gevent worker class instead of gunicorn's default single sync worker.
+
+Environment overrides:
+    PORT                    - listen port (default 8080)
+    GUNICORN_WORKER_CLASS   - 'gthread' (default) or 'gevent' (requires gevent)
+    WEB_CONCURRENCY         - number of worker processes (default: cores + 1)
+    GUNICORN_THREADS        - threads per gthread worker (default 32)
+    GUNICORN_CONNECTIONS    - concurrent connections per gevent worker (default 1000)
+    GUNICORN_PRELOAD        - '1' to import the app once in the master before forking
+    GUNICORN_TIMEOUT        - worker timeout in seconds (default 30)
+"""
+
+import multiprocessing
+import os
+
+cores = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+
+# Workers are CPU-bound on JSON/SQLite work; concurrency for upstream I/O comes from threads/greenlets
+workers = int(os.getenv('WEB_CONCURRENCY', max(2, cores + 1)))
+threads = int(os.getenv('GUNICORN_THREADS', 32))
+worker_connections = int(os.getenv('GUNICORN_CONNECTIONS', 1000))
+
+# gevent monkey-patches in the worker, after a preloaded app would already have created
+# unpatched locks, so preloading defaults to off for gevent
+preload_app = os.getenv('GUNICORN_PRELOAD', '0' if worker_class == 'gevent' else '1') == '1'
+
+# Must exceed the DeepL timeout so slow upstream calls aren't killed mid-request
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically to bound memory growth of in-process metrics
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    """Run schema migrations once in the master, before any worker boots"""
+    import migrations
+
+    version = migrations.migrate_db()
+    server.log.info("Database schema at version %s", version)
+
+
+def post_fork(server, worker):
+    """Initialize per-worker clients after fork (fork-unsafe state is never shared)"""
+    import main
+
+    main.init_worker()
+    server.log.info("Worker %s initialized (%s, threads=%s, app import %.0fms)",
+                    worker.pid, worker_class, threads, main.startup_time_ms)
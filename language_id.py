@@ -0,0 +1,334 @@
+"""
+Offline source language identification for the Enhanced TranslateAll API
+
+A compact character trigram model built at import time from the sample texts
+below (two short paragraphs per language, no external data or dependencies).
+Scripts that belong to a single supported language (Greek, Arabic, Hangul,
+kana, Han) are decided by script alone; Latin and Cyrillic texts are scored
+against the trigram profiles of their script's languages.
+
+Only the first MAX_CHARS characters are scored and every trigram costs one
+dict lookup, so identifying a sentence takes well under 100 microseconds.
+Confidence is deliberately conservative on short texts and close language
+pairs; callers should only act on high-confidence answers.
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Optional, Tuple
+
+MAX_CHARS = 256         # prefix of the text that is scored
+MIN_LETTERS = 12        # shorter texts are never identified
+EVIDENCE_CAP = 20       # trigrams of evidence the confidence is allowed to trust
+
+# Same message in every language, so profiles differ by language rather than by topic
+SAMPLES = {
+    'CS': "Vítejte zpět! Váš účet byl úspěšně vytvořen. Zkontrolujte prosím svůj e-mail a potvrďte svou adresu. "
+          "Pokud máte nějaké otázky, náš tým podpory vám rád kdykoli pomůže. Objednávka bude odeslána zítra a "
+          "můžete ji sledovat na našem webu. Dnes je hezké počasí, takže po práci jdeme s dětmi do parku. To je to, "
+          "co jsem o tom chtěl říct. Vaše předplatné vyprší příští týden. Chcete-li nadále používat všechny funkce, "
+          "aktualizujte své platební údaje v nastavení. Poslali jsme novou zprávu na vaše telefonní číslo. Opravdu "
+          "chcete tuto položku smazat? Tuto akci nelze vrátit zpět. Výsledky vyhledávání pro váš dotaz jsou "
+          "zobrazeny níže. Něco se pokazilo, zkuste to prosím znovu později.",
+    'DA': "Velkommen tilbage! Din konto er blevet oprettet. Tjek venligst din e-mail og bekræft din adresse. Hvis "
+          "du har spørgsmål, hjælper vores supportteam dig gerne når som helst. Bestillingen bliver sendt i morgen, "
+          "og du kan følge den på vores hjemmeside. Det er godt vejr i dag, så vi går i parken med børnene efter "
+          "arbejde. Det er det, jeg ville sige om det. Dit abonnement udløber i næste uge. For at fortsætte med at "
+          "bruge alle funktioner skal du opdatere dine betalingsoplysninger i indstillingerne. Vi har sendt en ny "
+          "besked til dit telefonnummer. Vil du slette dette element? Denne handling kan ikke fortrydes. "
+          "Søgeresultaterne for din forespørgsel vises nedenfor. Noget gik galt, prøv venligst igen senere.",
+    'DE': "Willkommen zurück! Ihr Konto wurde erfolgreich erstellt. Bitte überprüfen Sie Ihre E-Mail und bestätigen "
+          "Sie Ihre Adresse. Wenn Sie Fragen haben, hilft Ihnen unser Support-Team jederzeit gerne weiter. Die "
+          "Bestellung wird morgen versendet, und Sie können sie auf unserer Webseite verfolgen. Das Wetter ist "
+          "heute schön, deshalb gehen wir nach der Arbeit mit den Kindern in den Park. Das ist es, was ich dazu "
+          "sagen wollte. Ihr Abonnement läuft nächste Woche ab. Um weiterhin alle Funktionen zu nutzen, "
+          "aktualisieren Sie Ihre Zahlungsdaten in den Einstellungen. Wir haben eine neue Nachricht an Ihre "
+          "Telefonnummer gesendet. Möchten Sie diesen Eintrag wirklich löschen? Diese Aktion kann nicht rückgängig "
+          "gemacht werden. Die Suchergebnisse für Ihre Anfrage werden unten angezeigt. Etwas ist schiefgelaufen, "
+          "bitte versuchen Sie es später erneut.",
+    'EN': "Welcome back! Your account has been created successfully. Please check your email and confirm your "
+          "address. If you have any questions, our support team is happy to help you at any time. The order will be "
+          "shipped tomorrow, and you can follow it on our website. The weather is nice today, so we are going to "
+          "the park with the children after work. This is what I wanted to say about that. Your subscription "
+          "expires next week. To keep using all features, update your payment details in the settings. We have sent "
+          "a new message to your phone number. Do you really want to delete this item? This action cannot be "
+          "undone. The search results for your query are shown below. Something went wrong, please try again later.",
+    'ES': "¡Bienvenido de nuevo! Tu cuenta se ha creado correctamente. Por favor, revisa tu correo electrónico y "
+          "confirma tu dirección. Si tienes alguna pregunta, nuestro equipo de soporte estará encantado de ayudarte "
+          "en cualquier momento. El pedido se enviará mañana y podrás seguirlo en nuestra página web. Hoy hace buen "
+          "tiempo, así que vamos al parque con los niños después del trabajo. Esto es lo que quería decir sobre "
+          "eso. Tu suscripción caduca la próxima semana. Para seguir usando todas las funciones, actualiza tus "
+          "datos de pago en la configuración. Hemos enviado un nuevo mensaje a tu número de teléfono. ¿De verdad "
+          "quieres eliminar este elemento? Esta acción no se puede deshacer. Los resultados de búsqueda para tu "
+          "consulta se muestran a continuación. Algo salió mal, por favor inténtalo de nuevo más tarde.",
+    'ET': "Tere tulemast tagasi! Sinu konto on edukalt loodud. Palun kontrolli oma e-posti ja kinnita oma aadress. "
+          "Kui sul on küsimusi, aitab meie tugimeeskond sind hea meelega igal ajal. Tellimus saadetakse homme ja sa "
+          "saad seda jälgida meie veebilehel. Täna on ilus ilm, nii et läheme pärast tööd lastega parki. See on "
+          "see, mida ma sellest öelda tahtsin. Sinu tellimus aegub järgmisel nädalal. Kõigi funktsioonide "
+          "kasutamise jätkamiseks värskenda seadetes oma makseandmeid. Saatsime sinu telefoninumbrile uue sõnumi. "
+          "Kas soovid selle üksuse tõesti kustutada? Seda toimingut ei saa tagasi võtta. Sinu päringu "
+          "otsingutulemused on näidatud allpool. Midagi läks valesti, palun proovi hiljem uuesti.",
+    'FI': "Tervetuloa takaisin! Tilisi on luotu onnistuneesti. Tarkista sähköpostisi ja vahvista osoitteesi. Jos "
+          "sinulla on kysyttävää, tukitiimimme auttaa sinua mielellään milloin tahansa. Tilaus lähetetään huomenna, "
+          "ja voit seurata sitä verkkosivustollamme. Tänään on kaunis sää, joten menemme töiden jälkeen lasten "
+          "kanssa puistoon. Tämä on se, mitä halusin siitä sanoa. Tilauksesi päättyy ensi viikolla. Jos haluat "
+          "jatkaa kaikkien ominaisuuksien käyttöä, päivitä maksutietosi asetuksissa. Lähetimme uuden viestin "
+          "puhelinnumeroosi. Haluatko varmasti poistaa tämän kohteen? Tätä toimintoa ei voi kumota. Hakusi tulokset "
+          "näytetään alla. Jokin meni vikaan, yritä myöhemmin uudelleen.",
+    'FR': "Bon retour ! Votre compte a été créé avec succès. Veuillez vérifier votre e-mail et confirmer votre "
+          "adresse. Si vous avez des questions, notre équipe d'assistance est heureuse de vous aider à tout moment. "
+          "La commande sera expédiée demain et vous pourrez la suivre sur notre site. Il fait beau aujourd'hui, "
+          "alors nous allons au parc avec les enfants après le travail. C'est ce que je voulais dire à ce sujet. "
+          "Votre abonnement expire la semaine prochaine. Pour continuer à utiliser toutes les fonctionnalités, "
+          "mettez à jour vos informations de paiement dans les paramètres. Nous avons envoyé un nouveau message à "
+          "votre numéro de téléphone. Voulez-vous vraiment supprimer cet élément ? Cette action est irréversible. "
+          "Les résultats de votre recherche sont affichés ci-dessous. Une erreur s'est produite, veuillez réessayer "
+          "plus tard.",
+    'HU': "Üdvözöljük újra! A fiókja sikeresen létrejött. Kérjük, ellenőrizze az e-mailjeit, és erősítse meg a "
+          "címét. Ha bármilyen kérdése van, ügyfélszolgálatunk bármikor szívesen segít. A rendelést holnap "
+          "szállítjuk, és a weboldalunkon követheti. Ma szép idő van, ezért munka után a gyerekekkel elmegyünk a "
+          "parkba. Ez az, amit erről mondani akartam. Az előfizetése jövő héten lejár. Ha továbbra is használni "
+          "szeretné az összes funkciót, frissítse fizetési adatait a beállításokban. Új üzenetet küldtünk a "
+          "telefonszámára. Biztosan törölni szeretné ezt az elemet? Ez a művelet nem vonható vissza. A keresés "
+          "eredményei alább láthatók. Valami hiba történt, kérjük, próbálja újra később.",
+    'ID': "Selamat datang kembali! Akun Anda telah berhasil dibuat. Silakan periksa email Anda dan konfirmasikan "
+          "alamat Anda. Jika Anda memiliki pertanyaan, tim dukungan kami dengan senang hati akan membantu Anda "
+          "kapan saja. Pesanan akan dikirim besok dan Anda dapat melacaknya di situs web kami. Cuaca hari ini "
+          "cerah, jadi kami akan pergi ke taman bersama anak-anak setelah bekerja. Itulah yang ingin saya katakan "
+          "tentang hal itu. Langganan Anda akan berakhir minggu depan. Untuk terus menggunakan semua fitur, "
+          "perbarui detail pembayaran Anda di pengaturan. Kami telah mengirim pesan baru ke nomor telepon Anda. "
+          "Apakah Anda yakin ingin menghapus item ini? Tindakan ini tidak dapat dibatalkan. Hasil pencarian untuk "
+          "kueri Anda ditampilkan di bawah ini. Terjadi kesalahan, silakan coba lagi nanti.",
+    'IT': "Bentornato! Il tuo account è stato creato con successo. Controlla la tua email e conferma il tuo "
+          "indirizzo. Se hai domande, il nostro team di assistenza è felice di aiutarti in qualsiasi momento. "
+          "L'ordine sarà spedito domani e potrai seguirlo sul nostro sito. Oggi fa bel tempo, quindi andiamo al "
+          "parco con i bambini dopo il lavoro. Questo è quello che volevo dire a riguardo. Il tuo abbonamento scade "
+          "la prossima settimana. Per continuare a usare tutte le funzioni, aggiorna i tuoi dati di pagamento nelle "
+          "impostazioni. Abbiamo inviato un nuovo messaggio al tuo numero di telefono. Vuoi davvero eliminare "
+          "questo elemento? Questa azione non può essere annullata. I risultati della ricerca per la tua richiesta "
+          "sono mostrati qui sotto. Qualcosa è andato storto, riprova più tardi.",
+    'LT': "Sveiki sugrįžę! Jūsų paskyra sėkmingai sukurta. Patikrinkite savo el. paštą ir patvirtinkite savo "
+          "adresą. Jei turite klausimų, mūsų pagalbos komanda mielai jums padės bet kuriuo metu. Užsakymas bus "
+          "išsiųstas rytoj, ir jūs galėsite jį sekti mūsų svetainėje. Šiandien graži diena, todėl po darbo su "
+          "vaikais einame į parką. Tai yra tai, ką norėjau apie tai pasakyti. Jūsų prenumerata baigiasi kitą "
+          "savaitę. Norėdami toliau naudotis visomis funkcijomis, atnaujinkite mokėjimo duomenis nustatymuose. "
+          "Išsiuntėme naują žinutę į jūsų telefono numerį. Ar tikrai norite ištrinti šį elementą? Šio veiksmo "
+          "negalima atšaukti. Jūsų užklausos paieškos rezultatai rodomi žemiau. Kažkas nutiko, bandykite dar kartą "
+          "vėliau.",
+    'LV': "Laipni lūdzam atpakaļ! Jūsu konts ir veiksmīgi izveidots. Lūdzu, pārbaudiet savu e-pastu un apstipriniet "
+          "savu adresi. Ja jums ir kādi jautājumi, mūsu atbalsta komanda labprāt jums palīdzēs jebkurā laikā. "
+          "Pasūtījums tiks nosūtīts rīt, un jūs varēsiet to izsekot mūsu tīmekļa vietnē. Šodien ir jauks laiks, "
+          "tāpēc pēc darba mēs ar bērniem ejam uz parku. Tas ir tas, ko es gribēju par to teikt. Jūsu abonements "
+          "beidzas nākamnedēļ. Lai turpinātu izmantot visas funkcijas, atjauniniet maksājuma informāciju "
+          "iestatījumos. Mēs nosūtījām jaunu ziņu uz jūsu tālruņa numuru. Vai tiešām vēlaties dzēst šo vienumu? Šo "
+          "darbību nevar atsaukt. Jūsu vaicājuma meklēšanas rezultāti ir parādīti zemāk. Kaut kas nogāja greizi, "
+          "lūdzu, mēģiniet vēlreiz vēlāk.",
+    'NB': "Velkommen tilbake! Kontoen din er opprettet. Sjekk e-posten din og bekreft adressen din. Hvis du har "
+          "spørsmål, hjelper supportteamet vårt deg gjerne når som helst. Bestillingen blir sendt i morgen, og du "
+          "kan følge den på nettsiden vår. Det er fint vær i dag, så vi går til parken med barna etter jobb. Det er "
+          "det jeg ville si om det. Abonnementet ditt utløper neste uke. For å fortsette å bruke alle funksjonene "
+          "må du oppdatere betalingsopplysningene dine i innstillingene. Vi har sendt en ny melding til "
+          "telefonnummeret ditt. Vil du virkelig slette dette elementet? Denne handlingen kan ikke angres. "
+          "Søkeresultatene for forespørselen din vises nedenfor. Noe gikk galt, vennligst prøv igjen senere.",
+    'NL': "Welkom terug! Je account is succesvol aangemaakt. Controleer je e-mail en bevestig je adres. Als je "
+          "vragen hebt, helpt ons supportteam je graag op elk moment. De bestelling wordt morgen verzonden en je "
+          "kunt deze volgen op onze website. Het is vandaag mooi weer, dus we gaan na het werk met de kinderen naar "
+          "het park. Dat is wat ik daarover wilde zeggen. Je abonnement verloopt volgende week. Werk je "
+          "betalingsgegevens bij in de instellingen om alle functies te blijven gebruiken. We hebben een nieuw "
+          "bericht naar je telefoonnummer gestuurd. Weet je zeker dat je dit item wilt verwijderen? Deze actie kan "
+          "niet ongedaan worden gemaakt. De zoekresultaten voor je zoekopdracht worden hieronder weergegeven. Er is "
+          "iets misgegaan, probeer het later opnieuw.",
+    'PL': "Witamy ponownie! Twoje konto zostało pomyślnie utworzone. Sprawdź swoją skrzynkę e-mail i potwierdź swój "
+          "adres. Jeśli masz jakiekolwiek pytania, nasz zespół wsparcia chętnie pomoże ci w każdej chwili. "
+          "Zamówienie zostanie wysłane jutro i będziesz mógł je śledzić na naszej stronie. Dzisiaj jest ładna "
+          "pogoda, więc po pracy idziemy z dziećmi do parku. To jest to, co chciałem o tym powiedzieć. Twoja "
+          "subskrypcja wygasa w przyszłym tygodniu. Aby nadal korzystać ze wszystkich funkcji, zaktualizuj dane "
+          "płatności w ustawieniach. Wysłaliśmy nową wiadomość na twój numer telefonu. Czy na pewno chcesz usunąć "
+          "ten element? Tej operacji nie można cofnąć. Wyniki wyszukiwania dla twojego zapytania są wyświetlane "
+          "poniżej. Coś poszło nie tak, spróbuj ponownie później.",
+    'PT': "Bem-vindo de volta! A sua conta foi criada com sucesso. Por favor, verifique o seu e-mail e confirme o "
+          "seu endereço. Se tiver alguma dúvida, a nossa equipa de suporte terá todo o prazer em ajudá-lo a "
+          "qualquer momento. A encomenda será enviada amanhã e você poderá acompanhá-la no nosso site. Hoje está um "
+          "dia bonito, então vamos ao parque com as crianças depois do trabalho. É isso que eu queria dizer sobre "
+          "isso. A sua assinatura expira na próxima semana. Para continuar a usar todas as funcionalidades, "
+          "atualize os seus dados de pagamento nas definições. Enviámos uma nova mensagem para o seu número de "
+          "telefone. Tem a certeza de que pretende eliminar este item? Esta ação não pode ser desfeita. Os "
+          "resultados da pesquisa para a sua consulta são apresentados abaixo. Algo correu mal, tente novamente "
+          "mais tarde. Não foi possível concluir a operação.",
+    'RO': "Bine ai revenit! Contul tău a fost creat cu succes. Te rugăm să îți verifici e-mailul și să îți confirmi "
+          "adresa. Dacă ai întrebări, echipa noastră de asistență te va ajuta cu plăcere oricând. Comanda va fi "
+          "expediată mâine și o poți urmări pe site-ul nostru. Astăzi este vreme frumoasă, așa că mergem în parc cu "
+          "copiii după muncă. Asta este ceea ce am vrut să spun despre asta. Abonamentul tău expiră săptămâna "
+          "viitoare. Pentru a folosi în continuare toate funcțiile, actualizează datele de plată în setări. Am "
+          "trimis un mesaj nou la numărul tău de telefon. Sigur vrei să ștergi acest element? Această acțiune nu "
+          "poate fi anulată. Rezultatele căutării pentru interogarea ta sunt afișate mai jos. Ceva nu a funcționat, "
+          "te rugăm să încerci din nou mai târziu.",
+    'SK': "Vitajte späť! Váš účet bol úspešne vytvorený. Skontrolujte si, prosím, svoj e-mail a potvrďte svoju "
+          "adresu. Ak máte nejaké otázky, náš tím podpory vám rád kedykoľvek pomôže. Objednávka bude odoslaná "
+          "zajtra a môžete ju sledovať na našej webovej stránke. Dnes je pekné počasie, takže po práci ideme s "
+          "deťmi do parku. To je to, čo som o tom chcel povedať. Vaše predplatné vyprší budúci týždeň. Ak chcete "
+          "naďalej používať všetky funkcie, aktualizujte svoje platobné údaje v nastaveniach. Poslali sme novú "
+          "správu na vaše telefónne číslo. Naozaj chcete odstrániť túto položku? Túto akciu nie je možné vrátiť "
+          "späť. Výsledky vyhľadávania pre váš dopyt sú zobrazené nižšie. Niečo sa pokazilo, skúste to prosím "
+          "neskôr znova.",
+    'SL': "Dobrodošli nazaj! Vaš račun je bil uspešno ustvarjen. Preverite svojo e-pošto in potrdite svoj naslov. "
+          "Če imate kakršna koli vprašanja, vam bo naša ekipa za podporo z veseljem pomagala kadar koli. Naročilo "
+          "bo poslano jutri in ga lahko spremljate na naši spletni strani. Danes je lepo vreme, zato gremo po "
+          "službi z otroki v park. To je tisto, kar sem hotel povedati o tem. Vaša naročnina poteče naslednji "
+          "teden. Če želite še naprej uporabljati vse funkcije, posodobite podatke o plačilu v nastavitvah. Na vašo "
+          "telefonsko številko smo poslali novo sporočilo. Ali res želite izbrisati ta element? Tega dejanja ni "
+          "mogoče razveljaviti. Rezultati iskanja za vašo poizvedbo so prikazani spodaj. Nekaj je šlo narobe, "
+          "poskusite znova pozneje.",
+    'SV': "Välkommen tillbaka! Ditt konto har skapats. Kontrollera din e-post och bekräfta din adress. Om du har "
+          "några frågor hjälper vårt supportteam dig gärna när som helst. Beställningen skickas i morgon och du kan "
+          "följa den på vår webbplats. Det är fint väder i dag, så vi går till parken med barnen efter jobbet. Det "
+          "är vad jag ville säga om det. Din prenumeration löper ut nästa vecka. För att fortsätta använda alla "
+          "funktioner uppdaterar du dina betalningsuppgifter i inställningarna. Vi har skickat ett nytt meddelande "
+          "till ditt telefonnummer. Vill du verkligen ta bort det här objektet? Den här åtgärden kan inte ångras. "
+          "Sökresultaten för din fråga visas nedan. Något gick fel, försök igen senare.",
+    'TR': "Tekrar hoş geldiniz! Hesabınız başarıyla oluşturuldu. Lütfen e-postanızı kontrol edin ve adresinizi "
+          "onaylayın. Herhangi bir sorunuz varsa destek ekibimiz size her zaman yardımcı olmaktan memnuniyet duyar. "
+          "Sipariş yarın gönderilecek ve web sitemizden takip edebilirsiniz. Bugün hava güzel, bu yüzden işten "
+          "sonra çocuklarla parka gidiyoruz. Bu konuda söylemek istediğim buydu. Aboneliğiniz gelecek hafta sona "
+          "eriyor. Tüm özellikleri kullanmaya devam etmek için ayarlardan ödeme bilgilerinizi güncelleyin. Telefon "
+          "numaranıza yeni bir mesaj gönderdik. Bu öğeyi gerçekten silmek istiyor musunuz? Bu işlem geri alınamaz. "
+          "Sorgunuz için arama sonuçları aşağıda gösterilmektedir. Bir şeyler ters gitti, lütfen daha sonra tekrar "
+          "deneyin.",
+    'BG': "Добре дошли отново! Вашият профил беше създаден успешно. Моля, проверете имейла си и потвърдете адреса "
+          "си. Ако имате въпроси, нашият екип за поддръжка с удоволствие ще ви помогне по всяко време. Поръчката ще "
+          "бъде изпратена утре и можете да я проследите на нашия уебсайт. Днес времето е хубаво, затова след работа "
+          "отиваме в парка с децата. Това е, което исках да кажа за това. Абонаментът ви изтича следващата седмица. "
+          "За да продължите да използвате всички функции, актуализирайте данните си за плащане в настройките. "
+          "Изпратихме ново съобщение на телефонния ви номер. Наистина ли искате да изтриете този елемент? Това "
+          "действие не може да бъде отменено. Резултатите от търсенето за вашата заявка са показани по-долу. Нещо "
+          "се обърка, моля, опитайте отново по-късно.",
+    'RU': "С возвращением! Ваша учётная запись успешно создана. Пожалуйста, проверьте свою электронную почту и "
+          "подтвердите свой адрес. Если у вас есть вопросы, наша служба поддержки с удовольствием поможет вам в "
+          "любое время. Заказ будет отправлен завтра, и вы сможете отслеживать его на нашем сайте. Сегодня хорошая "
+          "погода, поэтому после работы мы идём с детьми в парк. Это то, что я хотел об этом сказать. Ваша подписка "
+          "истекает на следующей неделе. Чтобы продолжить пользоваться всеми функциями, обновите платёжные данные в "
+          "настройках. Мы отправили новое сообщение на ваш номер телефона. Вы действительно хотите удалить этот "
+          "элемент? Это действие нельзя отменить. Результаты поиска по вашему запросу показаны ниже. Что-то пошло "
+          "не так, пожалуйста, попробуйте ещё раз позже.",
+    'UK': "З поверненням! Ваш обліковий запис успішно створено. Будь ласка, перевірте свою електронну пошту та "
+          "підтвердьте свою адресу. Якщо у вас є запитання, наша служба підтримки із задоволенням допоможе вам у "
+          "будь-який час. Замовлення буде відправлено завтра, і ви зможете відстежувати його на нашому сайті. "
+          "Сьогодні гарна погода, тому після роботи ми йдемо з дітьми до парку. Це те, що я хотів про це сказати. "
+          "Ваша підписка закінчується наступного тижня. Щоб і надалі користуватися всіма функціями, оновіть "
+          "платіжні дані в налаштуваннях. Ми надіслали нове повідомлення на ваш номер телефону. Ви дійсно бажаєте "
+          "видалити цей елемент? Цю дію не можна скасувати. Результати пошуку за вашим запитом показано нижче. Щось "
+          "пішло не так, будь ласка, спробуйте ще раз пізніше.",
+}
+
+# Letters beyond the script's basic alphabet (a-z; Cyrillic а-я without ъ, ы, э) that each language uses.
+# A text letter outside them counts against the language, which separates close pairs (CS/SK/SL, ES/PT)
+# on short texts.
+EXTRA_LETTERS = {
+    'CS': 'áčďéěíňóřšťúůýž', 'DA': 'æøåé', 'DE': 'äöüß', 'EN': 'é', 'ES': 'áéíñóúü', 'ET': 'äöõüšž',
+    'FI': 'äöåšž', 'FR': 'àâæçéèêëîïôœùûüÿ', 'HU': 'áéíóöőúüű', 'ID': 'é', 'IT': 'àèéìíîòóùú',
+    'LT': 'ąčęėįšųūž', 'LV': 'āčēģīķļņšūž', 'NB': 'æøåéòô', 'NL': 'éëïöüèáó', 'PL': 'ąćęłńóśźż',
+    'PT': 'áâãàçéêíóôõú', 'RO': 'ăâîșțşţ', 'SK': 'áäčďéíĺľňóôŕšťúýž', 'SL': 'čšžćđ', 'SV': 'åäöé',
+    'TR': 'çğıöşüâîû', 'BG': 'ъ', 'RU': 'ёъыэ', 'UK': 'ґєії',
+}
+FOREIGN_LETTER_PENALTY = 6.0   # log-likelihood cost of one letter outside the language's alphabet
+
+# Scripts whose letters identify the language on their own
+SCRIPT_LANGUAGES = {'GREEK': 'EL', 'ARABIC': 'AR', 'HANGUL': 'KO', 'KANA': 'JA', 'HAN': 'ZH'}
+
+SCRIPTS = {
+    'LATIN': re.compile(r'[A-Za-z\u00c0-\u024f\u1e00-\u1eff]'),
+    'CYRILLIC': re.compile(r'[\u0400-\u052f]'),
+    'GREEK': re.compile(r'[\u0370-\u03ff\u1f00-\u1fff]'),
+    'ARABIC': re.compile(r'[\u0600-\u06ff\u0750-\u077f]'),
+    'HANGUL': re.compile(r'[\uac00-\ud7af\u1100-\u11ff\u3130-\u318f]'),
+    'KANA': re.compile(r'[\u3040-\u30ff]'),
+    'HAN': re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff]'),
+}
+_SPECIAL_LETTER = re.compile(r'[^\W\d_a-z\u0430-\u0449\u044c\u044e\u044f]')
+_NON_LETTERS = re.compile(r"[^\w']+|[\d_]+")
+
+
+def _trigrams(text: str):
+    """Letter trigrams of the lowercased text, words padded with spaces"""
+    padded = ' ' + _NON_LETTERS.sub(' ', text.lower()).strip() + ' '
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def _dominant_script(text: str) -> Tuple[Optional[str], int, float]:
+    """(script, letter count, share of letters in that script); any kana makes Han text Japanese"""
+    letters = sum(map(str.isalpha, text))
+    if not letters:
+        return None, 0, 0.0
+    latin = len(SCRIPTS['LATIN'].findall(text))
+    if latin * 2 > letters:
+        return 'LATIN', letters, latin / letters
+    counts = {script: len(pattern.findall(text)) for script, pattern in SCRIPTS.items()}
+    if counts['KANA']:
+        return 'KANA', letters, (counts['KANA'] + counts['HAN']) / letters
+    script = max(counts, key=counts.get)
+    return script, letters, counts[script] / letters
+
+
+def _build_model():
+    """
+    {script: languages}, {trigram: ((language index, log-odds over unseen), ...)} and the
+    per-language unseen log-probability, indexed like LANGUAGES
+    """
+    counts = [Counter(_trigrams(SAMPLES[lang])) for lang in LANGUAGES]
+    vocabulary = len(set().union(*counts))
+    unseen = [math.log(1.0 / (sum(c.values()) + vocabulary)) for c in counts]
+    table = defaultdict(list)
+    for index, c in enumerate(counts):
+        total = sum(c.values()) + vocabulary
+        for trigram, n in c.items():
+            table[trigram].append((index, math.log((n + 1.0) / total) - unseen[index]))
+    scripts = defaultdict(list)
+    for lang in LANGUAGES:
+        scripts[_dominant_script(SAMPLES[lang])[0]].append(lang)
+    return dict(scripts), {trigram: tuple(entries) for trigram, entries in table.items()}, unseen
+
+
+LANGUAGES = list(SAMPLES)
+_INDEX = {lang: index for index, lang in enumerate(LANGUAGES)}
+_SCRIPT_CANDIDATES, _TRIGRAMS, _UNSEEN = _build_model()
+
+
+def _score(text: str, candidates) -> Tuple[Dict[str, float], int]:
+    """Mean per-trigram log-likelihood of text under each candidate's profile, and the trigram count"""
+    trigrams = _trigrams(text)
+    totals = [0.0] * len(LANGUAGES)
+    for trigram in trigrams:
+        for index, log_odds in _TRIGRAMS.get(trigram, ()):
+            totals[index] += log_odds
+    special = Counter(_SPECIAL_LETTER.findall(text.lower()))
+    scores = {}
+    for lang in candidates:
+        index = _INDEX[lang]
+        if special:
+            totals[index] -= FOREIGN_LETTER_PENALTY * sum(n for char, n in special.items()
+                                                          if char not in EXTRA_LETTERS[lang])
+        scores[lang] = _UNSEEN[index] + totals[index] / len(trigrams)
+    return scores, len(trigrams)
+
+
+def detect(text: str) -> Optional[Tuple[str, float]]:
+    """
+    (DeepL source language code, confidence in [0, 1]) for text, or None if it is too short
+    or in a script none of the supported languages use.
+    """
+    text = text[:MAX_CHARS]
+    script, letters, share = _dominant_script(text)
+    if letters < MIN_LETTERS:
+        return None
+    if script in SCRIPT_LANGUAGES:
+        return SCRIPT_LANGUAGES[script], share
+    candidates = _SCRIPT_CANDIDATES.get(script)
+    if not candidates:
+        return None
+    scores, evidence = _score(text, candidates)
+    best = max(scores, key=scores.get)
+    # Posterior over the candidates, trusting at most EVIDENCE_CAP trigrams so long texts aren't overconfident
+    weight = min(evidence, EVIDENCE_CAP)
+    posterior = 1.0 / sum(math.exp((score - scores[best]) * weight) for score in scores.values())
+    return best, posterior * share
@@ -1,22 +1,30 @@
-from flask import Flask, request, jsonify, render_template, redirect, url_for, session, flash
+import time
+_import_started = time.perf_counter()
+
+from flask import Flask, request, jsonify, render_template, redirect, url_for, session, flash, g, Response, stream_with_context
 from flask_cors import CORS
 import requests
 import os
-import stripe
 import sqlite3
 import uuid
 import json
-import time
-import hashlib
 from datetime import datetime, timezone, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
-import boto3
 from botocore.exceptions import ClientError
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional, Tuple, Iterator, AsyncIterator
 import threading
 import asyncio
-from collections import defaultdict
+import random
+import math
+import re
+import heapq
+import itertools
+from collections import defaultdict, deque
+import migrations
+import canonical
+import language_id
+import documents
 
 # Set default AWS region if not provided
 if not os.getenv('AWS_REGION'):
@@ -35,18 +43,148 @@ DEEPL_API_KEY = os.getenv("DEEPL_API_KEY", "")
 if not DEEPL_API_KEY:
     print("⚠️  WARNING: DEEPL_API_KEY not set - translation will fail!")
 
-stripe.api_key = os.getenv("STRIPE_SECRET_KEY", "")
-if not stripe.api_key:
+STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "")
+if not STRIPE_SECRET_KEY:
     print("⚠️  WARNING: STRIPE_SECRET_KEY not set - payments will fail!")
 
 stripe_publishable_key = os.getenv("STRIPE_PUBLISHABLE_KEY", "")
 stripe_price_id = os.getenv("STRIPE_PRICE_ID", "")
 
+# Upstream Configuration
+DEEPL_API_URL = os.getenv('DEEPL_API_URL', 'https://api.deepl.com/v2/translate')
+DEEPL_USAGE_URL = os.getenv('DEEPL_USAGE_URL', DEEPL_API_URL.rsplit('/', 1)[0] + '/usage')
+DEEPL_TIMEOUT = 10  # seconds
+ASYNC_UPSTREAM_CONNECTIONS = int(os.getenv('ASYNC_UPSTREAM_CONNECTIONS', 1000))  # in-flight DeepL calls per process (async path)
+
+# Upstream Resilience Configuration
+UPSTREAM_MAX_RETRIES = 2             # retries for 429/5xx/timeouts, with jittered exponential backoff
+UPSTREAM_BACKOFF_BASE = 0.25         # seconds
+UPSTREAM_BACKOFF_MAX = 4.0           # longer Retry-After values open the circuit instead of sleeping
+CIRCUIT_FAILURE_THRESHOLD = 5        # consecutive failures before the circuit opens
+CIRCUIT_OPEN_SECONDS = 30            # fail fast for this long before probing again
+CIRCUIT_QUOTA_OPEN_SECONDS = 300     # DeepL 456/403 won't recover quickly
+CIRCUIT_PROBE_TIMEOUT = 2 * DEEPL_TIMEOUT  # a half-open probe that never reports back is reclaimed after this
+
+# Translation Backend Configuration
+TRANSLATION_BACKENDS = [b.strip() for b in os.getenv('TRANSLATION_BACKENDS', 'deepl').split(',') if b.strip()]  # fallback chain
+TRANSLATION_BACKEND_ORDER = os.getenv('TRANSLATION_BACKEND_ORDER', 'latency')  # 'latency', 'cost' or 'config'
+BACKEND_RATE_LIMITS = {  # upstream calls per second per backend (0 = unlimited)
+    'deepl': float(os.getenv('DEEPL_RATE_LIMIT', 0)),
+    'echo': float(os.getenv('ECHO_RATE_LIMIT', 0)),
+}
+
+# Upstream Quota Configuration
+QUOTA_POLL_SECONDS = int(os.getenv('QUOTA_POLL_SECONDS', 60))        # how often to refresh usage from each backend
+QUOTA_RESERVE_CHARS = int(os.getenv('QUOTA_RESERVE_CHARS', 1000))    # degraded (cache-only) with fewer characters left
+QUOTA_CONSERVE_FRACTION = 0.9          # demo/warming misses stop once this share of the quota is used...
+QUOTA_CONSERVE_HORIZON = 6 * 3600      # ...or exhaustion is forecast within this many seconds
+QUOTA_FORECAST_WINDOW = 3600           # usage history used for the consumption rate
+QUOTA_FORECAST_MIN_SPAN = 300          # don't forecast from less history than this (seconds)
+ECHO_CHARACTER_LIMIT = int(os.getenv('ECHO_CHARACTER_LIMIT', 0))     # 0 = unlimited
+
+# Admission Control Configuration
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv('ADMISSION_MAX_IN_FLIGHT', os.getenv('GUNICORN_THREADS', 32)))  # requests per process at full load
+ADMISSION_QUEUE_DELAY_TARGET = float(os.getenv('ADMISSION_QUEUE_DELAY_TARGET', 1.0))  # seconds queued before reaching the app (X-Request-Start)
+ADMISSION_SHED_LOAD = {  # cache misses of a class are refused above this load (1.0 = full)
+    'background': 0.6,
+    'demo': 0.6,
+    'paid_batch': 0.85,
+    'paid_interactive': None,  # never shed
+}
+
 # Enhanced Configuration for Translation Pipeline
 TRANSLATION_RATE_LIMIT = 10  # requests per second
+SCHEDULER_LATENCY_TARGET = float(os.getenv('SCHEDULER_LATENCY_TARGET', 2.0))  # shed demo work expected to queue longer (seconds)
 BATCH_SIZE = 5
+BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', 8))  # parallel upstream calls per batch (capped by TRANSLATION_RATE_LIMIT)
+BATCH_FANOUT_WORKERS = int(os.getenv('BATCH_FANOUT_WORKERS', 32))    # shared per-process pool for batch cache misses
+BATCH_DEADLINE_SECONDS = float(os.getenv('BATCH_DEADLINE_SECONDS', 25))
+
+# Deadline Configuration (total time budget per request, in seconds, measured from arrival)
+REQUEST_DEADLINES = {
+    'translate': float(os.getenv('TRANSLATE_DEADLINE_SECONDS', 8)),
+    'translate-batch': BATCH_DEADLINE_SECONDS,
+    'demo-translate': float(os.getenv('DEMO_TRANSLATE_DEADLINE_SECONDS', 5)),
+    'translate-multi': float(os.getenv('TRANSLATE_MULTI_DEADLINE_SECONDS', 15)),
+    'translate-document': float(os.getenv('TRANSLATE_DOCUMENT_DEADLINE_SECONDS', 30)),
+}
+DEFAULT_REQUEST_DEADLINE = 10
+REQUEST_DEADLINE_HEADER = 'X-Request-Timeout'  # clients may shorten (never extend) the budget
+UPSTREAM_MIN_TIMEOUT = 0.5            # don't start an upstream call with less budget than this
+UPSTREAM_ADAPTIVE_TIMEOUT_FLOOR = 2.0
+UPSTREAM_TIMEOUT_PERCENTILE = 0.99    # upstream timeout = percentile of observed latency x headroom
+UPSTREAM_TIMEOUT_HEADROOM = 2.0
+UPSTREAM_LATENCY_MIN_SAMPLES = 20
+
+# Multi-target Configuration
+SUPPORTED_TARGET_LANGUAGES = canonical.SUPPORTED_TARGET_LANGUAGES  # DeepL target languages; aliases map onto these
+MULTI_MAX_TEXTS = 50
+UPSTREAM_BATCH_TEXTS = 50  # texts per multi-text upstream call (DeepL accepts up to 50)
+
+# Document Translation Configuration
+DOCUMENT_MAX_STRINGS = int(os.getenv('DOCUMENT_MAX_STRINGS', 2000))  # unique translatable strings per document
+
+# Segment Cache Configuration
+SEGMENT_LONG_TEXTS = os.getenv('SEGMENT_LONG_TEXTS', '0') == '1'  # default for /translate requests without "segment"
+SEGMENT_MIN_LENGTH = int(os.getenv('SEGMENT_MIN_LENGTH', 200))    # shorter texts are always translated whole
+
+# Oversized Input Configuration
+MAX_REQUEST_BYTES = int(os.getenv('MAX_REQUEST_BYTES', 1024 * 1024))  # larger request bodies are refused (413) unread
+MAX_TEXT_LENGTH = int(os.getenv('MAX_TEXT_LENGTH', 100000))          # characters per /translate text
+CHUNK_MAX_CHARS = int(os.getenv('CHUNK_MAX_CHARS', 5000))            # longer texts go upstream as chunks of at most this
+CHUNK_MAX_ATTEMPTS = 2                                               # per chunk, on top of the client's own retries
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BYTES
+
+# Source Language Detection Configuration
+LANGUAGE_DETECTION = os.getenv('LANGUAGE_DETECTION', '1') == '1'                     # offline identifier on /translate
+LANGUAGE_SOURCE_CONFIDENCE = float(os.getenv('LANGUAGE_SOURCE_CONFIDENCE', 0.9))    # detected source sent upstream
+LANGUAGE_SKIP_CONFIDENCE = float(os.getenv('LANGUAGE_SKIP_CONFIDENCE', 0.97))       # text already in target returned as-is
+
+# Translation Memory Configuration
+TRANSLATION_MEMORY = os.getenv('TRANSLATION_MEMORY', '1') == '1'  # cache templates with numbers/emails/URLs masked
+
+# Priority Cache Configuration
+PRIORITY_POPULATE_WORKERS = int(os.getenv('PRIORITY_POPULATE_WORKERS', 8))  # languages warmed in parallel
+PRIORITY_REFRESH_LEAD_HOURS = float(os.getenv('PRIORITY_REFRESH_LEAD_HOURS', 2))  # re-translate this long before expiry
+PRIORITY_REFRESH_JITTER = float(os.getenv('PRIORITY_REFRESH_JITTER', 1800))     # seconds, spreads languages' refreshes apart
+PRIORITY_REFRESH_INTERVAL = float(os.getenv('PRIORITY_REFRESH_INTERVAL', 60))   # seconds between due-refresh checks
+PRIORITY_REFRESH_RETRY = 300                 # seconds before a failed population is retried
+PRIORITY_POPULATE_STALE_SECONDS = 300        # a 'started' population older than this belonged to a dead worker
+
+# Hot Phrase Configuration (traffic-learned priority tier)
+HOT_SKETCH_SIZE = int(os.getenv('HOT_SKETCH_SIZE', 1000))         # (text, language) counters kept per process
+HOT_MAX_PHRASES = int(os.getenv('HOT_MAX_PHRASES', 200))          # promoted (text, language) pairs, across workers
+HOT_PROMOTE_COUNT = int(os.getenv('HOT_PROMOTE_COUNT', 20))       # guaranteed requests in one window to be promoted
+HOT_KEEP_COUNT = 5                                                # requests per window that keep a promoted pair hot
+HOT_WINDOW_SECONDS = float(os.getenv('HOT_WINDOW_SECONDS', 300))  # counting window; counts halve after each one
+HOT_DEMOTE_SECONDS = float(os.getenv('HOT_DEMOTE_SECONDS', 3600)) # a pair no worker has seen hot for this long is demoted
+HOT_SYNC_SECONDS = 60                                             # how often a worker reloads the promoted set
+HOT_MAX_TEXT_LENGTH = 200                                         # longer texts are never tracked
+
+# Translation Job Configuration
+JOB_MAX_TEXTS = int(os.getenv('JOB_MAX_TEXTS', 20000))   # texts per job
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))           # jobs processed concurrently per process
+JOB_CHUNK_SIZE = 50                                      # texts per translate_batch call
+JOB_MAX_ATTEMPTS = 5                                     # per text, for transient upstream failures
+JOB_RETRY_DELAY = 5                                      # seconds, when a chunk made no progress
+JOB_STALE_SECONDS = 120                                  # a running job without heartbeat for this long is resumed
+JOB_RECOVERY_INTERVAL = 60                               # seconds between scans for stale or unclaimed jobs
+JOB_RESULTS_PAGE_SIZE = 500
+JOB_RESULTS_MAX_PAGE_SIZE = 1000
 CACHE_EXPIRY_HOURS = 24
+CACHE_STALE_GRACE_HOURS = float(os.getenv('CACHE_STALE_GRACE_HOURS', 6))  # expired entries are still served (and refreshed) this long
+CACHE_REVALIDATE_LEASE = 60  # seconds one worker owns the background refresh of a stale entry
 PRIORITY_CACHE_SIZE = 50
+API_KEY_QUOTA = 2000  # translations per API key
+
+# Real-time (Socket.IO) Configuration
+SOCKET_RATE_LIMIT = int(os.getenv('SOCKET_RATE_LIMIT', 20))        # translate events per second per connection
+SOCKET_MAX_IN_FLIGHT = int(os.getenv('SOCKET_MAX_IN_FLIGHT', 16))  # unanswered translations per connection (backpressure)
+SOCKET_WORKERS = int(os.getenv('SOCKET_WORKERS', 32))              # per-process pool serving socket translations
+
+# Startup Configuration
+AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', '1') == '1'  # apply pending migrations on first request
+STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', 500))
 
 # IP Rate Limiting Configuration (only for actual API calls)
 IP_RATE_LIMITS = {
@@ -71,29 +209,6 @@ def inject_now():
 class IPRateLimiter:
     """IP-based rate limiting for actual DeepL API calls only"""
     
-    def __init__(self):
-        self.init_rate_limit_db()
-    
-    def init_rate_limit_db(self):
-        """Initialize IP rate limiting database table"""
-        conn = sqlite3.connect('api_keys.db')
-        c = conn.cursor()
-        c.execute('''CREATE TABLE IF NOT EXISTS ip_rate_limits (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ip_address TEXT NOT NULL,
-            endpoint_type TEXT NOT NULL,
-            minute_count INTEGER DEFAULT 0,
-            hour_count INTEGER DEFAULT 0,
-            day_count INTEGER DEFAULT 0,
-            minute_reset TIMESTAMP NOT NULL,
-            hour_reset TIMESTAMP NOT NULL,
-            day_reset TIMESTAMP NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(ip_address, endpoint_type)
-        )''')
-        conn.commit()
-        conn.close()
-    
     def get_client_ip(self, request):
         """Get client IP address, handling proxies"""
         # Check for forwarded IPs (common in production)
@@ -256,525 +371,3279 @@ class IPRateLimiter:
 # Initialize rate limiter
 ip_rate_limiter = IPRateLimiter()
 
-# ==== ENHANCED TRANSLATION PIPELINE COMPONENTS ====
+# ==== UPSTREAM RESILIENCE ====
 
-class PriorityCacheManager:
-    """Manages priority-based caching for critical translation messages"""
+class DeepLError(Exception):
+    """Non-200 response from the DeepL API"""
     
-    def __init__(self):
-        self.executor = ThreadPoolExecutor(max_workers=3)
-        self.cache_lock = threading.Lock()
-        self.populate_status = {}
-        self.init_priority_cache_db()
+    def __init__(self, status_code: int, message: str = '', retry_after: Optional[float] = None):
+        super().__init__(f'DeepL API error: {status_code}')
+        self.status_code = status_code
+        self.message = message
+        self.retry_after = retry_after
+
+class UpstreamUnavailableError(Exception):
+    """Raised without calling upstream while the circuit breaker is open"""
     
-    def init_priority_cache_db(self):
-        """Initialize priority cache database table"""
-        conn = sqlite3.connect('api_keys.db')
-        c = conn.cursor()
-        c.execute('''CREATE TABLE IF NOT EXISTS priority_cache (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            cache_key TEXT NOT NULL,
-            target_lang TEXT NOT NULL,
-            translation TEXT NOT NULL,
-            priority INTEGER NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            expires_at TIMESTAMP NOT NULL,
-            uses INTEGER DEFAULT 0,
-            UNIQUE(cache_key, target_lang)
-        )''')
-        
-        # Create translation cache table for regular translations
-        c.execute('''CREATE TABLE IF NOT EXISTS translation_cache (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            text_hash TEXT NOT NULL,
-            source_text TEXT NOT NULL,
-            target_lang TEXT NOT NULL,
-            translation TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            expires_at TIMESTAMP NOT NULL,
-            uses INTEGER DEFAULT 0,
-            UNIQUE(text_hash, target_lang)
-        )''')
-        
-        conn.commit()
-        conn.close()
+    def __init__(self, retry_after: float):
+        super().__init__('Translation service temporarily unavailable')
+        self.retry_after = retry_after
+
+class DeadlineExceededError(Exception):
+    """The request's time budget ran out before the work could be done"""
     
-    def get_critical_messages(self) -> Dict[str, str]:
-        """Critical messages that need instant translation"""
-        return {
-            "welcome": "Welcome to TranslateAll API!",
-            "error_general": "An error occurred. Please try again.",
-            "success_general": "Translation completed successfully.",
-            "rate_limit": "Rate limit exceeded. Please try again later.",
-            "invalid_key": "Invalid API key provided.",
-            "quota_exceeded": "Translation quota exceeded.",
-            "network_error": "Network connection error.",
-            "processing": "Processing your translation...",
-            "completed": "Translation completed!",
-            "failed": "Translation failed. Please try again.",
-            "timeout": "Translation timeout. Please try again.",
-            "service_unavailable": "Service temporarily unavailable.",
-            "invalid_text": "Invalid text provided for translation.",
-            "language_not_supported": "Language not supported.",
-            "text_too_long": "Text too long for translation."
-        }
+    def __init__(self, message: str = 'Deadline exceeded'):
+        super().__init__(message)
+
+class Deadline:
+    """Absolute time budget for a request, propagated through the translation pipeline"""
     
-    def get_common_responses(self) -> Dict[str, str]:
-        """Common responses for priority 2 caching"""
+    def __init__(self, seconds: float, started: Optional[float] = None):
+        self.started = started or time.time()
+        self.expires_at = self.started + seconds
+    
+    @classmethod
+    def for_request(cls, endpoint: str, request=None, started: Optional[float] = None) -> 'Deadline':
+        """Deadline from the endpoint's configured budget, optionally shortened by the client header"""
+        budget = REQUEST_DEADLINES.get(endpoint, DEFAULT_REQUEST_DEADLINE)
+        if request is not None:
+            try:
+                client_budget = float(request.headers.get(REQUEST_DEADLINE_HEADER, ''))
+                if client_budget > 0:
+                    budget = min(budget, client_budget)
+            except ValueError:
+                pass
+        return cls(budget, started)
+    
+    def remaining(self) -> float:
+        return self.expires_at - time.time()
+    
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+    
+    def check(self):
+        """Raise DeadlineExceededError if the budget is spent"""
+        if self.expired():
+            raise DeadlineExceededError()
+
+class UpstreamLatencyTracker:
+    """Rolling window of successful upstream latencies, used to size upstream timeouts"""
+    
+    def __init__(self, window: int = 500):
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+    
+    def reset_after_fork(self):
+        self.lock = threading.Lock()
+        self.samples.clear()
+    
+    def record(self, seconds: float):
+        with self.lock:
+            self.samples.append(seconds)
+    
+    def percentile(self, p: float) -> Optional[float]:
+        with self.lock:
+            if len(self.samples) < UPSTREAM_LATENCY_MIN_SAMPLES:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+    
+    def adaptive_timeout(self) -> float:
+        """Timeout from observed latency, falling back to DEEPL_TIMEOUT until there is enough data"""
+        observed = self.percentile(UPSTREAM_TIMEOUT_PERCENTILE)
+        if observed is None:
+            return DEEPL_TIMEOUT
+        return min(DEEPL_TIMEOUT, max(UPSTREAM_ADAPTIVE_TIMEOUT_FLOOR, observed * UPSTREAM_TIMEOUT_HEADROOM))
+    
+    def timeout_for(self, deadline: Optional[Deadline], timeout: Optional[float] = None) -> Tuple[float, bool]:
+        """
+        Upstream timeout for the next call: the adaptive timeout (or an explicit one), capped by the
+        remaining budget. Returns (timeout, deadline_bound); raises DeadlineExceededError when there
+        isn't enough budget left to make the call worthwhile.
+        """
+        upstream_timeout = timeout or self.adaptive_timeout()
+        if deadline is None:
+            return upstream_timeout, False
+        remaining = deadline.remaining()
+        if remaining < UPSTREAM_MIN_TIMEOUT:
+            raise DeadlineExceededError()
+        return min(upstream_timeout, remaining), remaining < upstream_timeout
+    
+    def get_status(self) -> Dict[str, any]:
         return {
-            "hello": "Hello",
-            "goodbye": "Goodbye",
-            "thank_you": "Thank you",
-            "please": "Please",
-            "yes": "Yes",
-            "no": "No",
-            "help": "Help",
-            "cancel": "Cancel",
-            "confirm": "Confirm",
-            "save": "Save",
-            "delete": "Delete",
-            "edit": "Edit",
-            "search": "Search",
-            "filter": "Filter",
-            "sort": "Sort",
-            "loading": "Loading...",
-            "waiting": "Please wait...",
-            "done": "Done",
-            "continue": "Continue",
-            "back": "Back",
-            "next": "Next",
-            "previous": "Previous",
-            "home": "Home",
-            "settings": "Settings",
-            "profile": "Profile",
-            "logout": "Logout",
-            "login": "Login",
-            "register": "Register",
-            "forgot_password": "Forgot Password",
-            "reset_password": "Reset Password",
-            "change_password": "Change Password"
+            'samples': len(self.samples),
+            'p50': self.percentile(0.5),
+            'p99': self.percentile(0.99),
+            'adaptive_timeout': self.adaptive_timeout()
         }
+
+def parse_retry_after(value) -> Optional[float]:
+    """Parse a Retry-After header given in seconds"""
+    try:
+        return max(0.0, float(value)) if value else None
+    except (TypeError, ValueError):
+        return None
+
+class UpstreamCircuitBreaker:
+    """
+    Circuit breaker around an upstream translation provider.
+    closed: calls flow; consecutive failures are counted.
+    open: calls fail fast until the cooldown (or upstream's Retry-After) has passed.
+    half_open: a single probe call is let through; success closes, failure re-opens.
+    """
     
-    def populate_priority_cache(self, target_lang: str) -> str:
-        """Populate priority cache in background"""
-        if target_lang in self.populate_status:
-            return self.populate_status[target_lang]
-        
-        self.populate_status[target_lang] = "started"
-        
-        def populate():
-            try:
-                critical_messages = self.get_critical_messages()
-                common_responses = self.get_common_responses()
-                
-                conn = sqlite3.connect('api_keys.db')
-                c = conn.cursor()
-                
-                # Priority 1: Critical messages
-                for key, message in critical_messages.items():
-                    translation = self._translate_with_deepl(message, target_lang)
-                    if translation:
-                        expires_at = datetime.now(timezone.utc) + timedelta(hours=CACHE_EXPIRY_HOURS)
-                        c.execute('''INSERT OR REPLACE INTO priority_cache 
-                                    (cache_key, target_lang, translation, priority, expires_at) 
-                                    VALUES (?, ?, ?, ?, ?)''',
-                                (key, target_lang, translation, 1, expires_at))
-                    time.sleep(0.1)  # Rate limiting
-                
-                # Priority 2: Common responses
-                for key, message in common_responses.items():
-                    translation = self._translate_with_deepl(message, target_lang)
-                    if translation:
-                        expires_at = datetime.now(timezone.utc) + timedelta(hours=CACHE_EXPIRY_HOURS)
-                        c.execute('''INSERT OR REPLACE INTO priority_cache 
-                                    (cache_key, target_lang, translation, priority, expires_at) 
-                                    VALUES (?, ?, ?, ?, ?)''',
-                                (key, target_lang, translation, 2, expires_at))
-                    time.sleep(0.1)  # Rate limiting
-                
-                conn.commit()
-                conn.close()
-                
-                self.populate_status[target_lang] = "completed"
-                
-            except Exception as e:
-                self.populate_status[target_lang] = f"failed: {str(e)}"
-        
-        self.executor.submit(populate)
-        return "started"
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
     
-    def _translate_with_deepl(self, text: str, target_lang: str) -> Optional[str]:
-        """Internal method to translate with DeepL API"""
-        if not DEEPL_API_KEY:
-            print("❌ DeepL API key not configured")
-            return None
-            
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 open_seconds: float = CIRCUIT_OPEN_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.lock = threading.Lock()
+        self._reset_state()
+    
+    def _reset_state(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.probe_in_flight = False
+        self.probe_started = 0.0
+        self.last_error = None
+        self.stats = defaultdict(int)
+    
+    def reset_after_fork(self):
+        self.lock = threading.Lock()
+        self._reset_state()
+    
+    def allow_request(self) -> bool:
+        """Return True if a call may go upstream now"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.time()
+            if self.state == self.OPEN and now >= self.open_until:
+                self.state = self.HALF_OPEN
+                self.probe_in_flight = False
+            if self.state == self.HALF_OPEN and self.probe_in_flight and now - self.probe_started >= CIRCUIT_PROBE_TIMEOUT:
+                # The probe never reported back (hung or lost); let another call probe
+                self.stats['probes_reclaimed'] += 1
+                self.probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                self.probe_started = now
+                self.stats['probes'] += 1
+                return True
+            self.stats['rejected'] += 1
+            return False
+    
+    def retry_after(self) -> float:
+        with self.lock:
+            return max(1.0, self.open_until - time.time())
+    
+    def record_abandoned(self):
+        """The call was cut short by the caller's deadline; it says nothing about upstream health"""
+        with self.lock:
+            self.probe_in_flight = False
+    
+    def record_success(self):
+        with self.lock:
+            self.stats['successes'] += 1
+            if self.state != self.CLOSED:
+                print(f"✅ Upstream '{self.name}' circuit closed")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+    
+    def record_failure(self, error: Exception, open_seconds: Optional[float] = None, force_open: bool = False):
+        """Count a failure; open the circuit at the threshold, on a failed probe, or when forced"""
+        with self.lock:
+            self.stats['failures'] += 1
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+            if force_open or self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                cooldown = max(open_seconds or 0.0, self.open_seconds)
+                if self.state != self.OPEN:
+                    self.stats['opened'] += 1
+                    print(f"⚠️  Upstream '{self.name}' circuit open for {cooldown:.0f}s: {error}")
+                self.state = self.OPEN
+                self.open_until = max(self.open_until, time.time() + cooldown)
+                self.probe_in_flight = False
+    
+    def get_status(self) -> Dict[str, any]:
+        with self.lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'retry_after': max(0.0, self.open_until - time.time()) if self.state != self.CLOSED else 0.0,
+                'last_error': self.last_error,
+                **self.stats
+            }
+
+class UpstreamRetryPolicy:
+    """Classifies upstream errors and computes jittered exponential backoff"""
+    
+    RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504, 529)
+    # Quota exhausted / key rejected: retrying won't help, stop calling for a while
+    CIRCUIT_TRIP_STATUS_CODES = (403, 456)
+    
+    def __init__(self, max_retries: int = UPSTREAM_MAX_RETRIES, backoff_base: float = UPSTREAM_BACKOFF_BASE,
+                 backoff_max: float = UPSTREAM_BACKOFF_MAX):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+    
+    def is_timeout_or_connection_error(self, error: Exception) -> bool:
+        if isinstance(error, (requests.Timeout, requests.ConnectionError, asyncio.TimeoutError)):
+            return True
         try:
-            resp = requests.post(
-                'https://api.deepl.com/v2/translate',
-                headers={'Authorization': f'DeepL-Auth-Key {DEEPL_API_KEY}'},
-                data={'text': text, 'target_lang': target_lang},
-                timeout=10
-            )
-            
-            if resp.status_code == 200:
-                return resp.json()['translations'][0]['text']
-            elif resp.status_code == 403:
-                print(f"❌ DeepL API 403 Forbidden - Check your API key and quota")
-                print(f"   Response: {resp.text}")
-                return None
-            elif resp.status_code == 456:
-                print(f"❌ DeepL API 456 Quota Exceeded")
+            import aiohttp
+            return isinstance(error, aiohttp.ClientError)
+        except ImportError:
+            return False
+    
+    def handle_failure(self, breaker: UpstreamCircuitBreaker, error: Exception, attempt: int) -> Optional[float]:
+        """Record the failure on the breaker; return the delay before retrying, or None to give up"""
+        if isinstance(error, DeepLError):
+            if error.status_code in self.CIRCUIT_TRIP_STATUS_CODES:
+                breaker.record_failure(error, open_seconds=CIRCUIT_QUOTA_OPEN_SECONDS, force_open=True)
                 return None
-            else:
-                print(f"❌ DeepL API error {resp.status_code}: {resp.text}")
+            if error.status_code not in self.RETRYABLE_STATUS_CODES:
+                # Our request was bad (e.g. unsupported language); upstream itself is healthy
+                breaker.record_success()
                 return None
-            
-        except Exception as e:
-            print(f"DeepL translation error: {e}")
+            retry_after = error.retry_after
+        elif self.is_timeout_or_connection_error(error):
+            retry_after = None
+        else:
+            # Unclassified (e.g. a malformed 200 body): count it, but don't retry
+            breaker.record_failure(error)
             return None
-    
-    def get_cached_translation(self, key: str, target_lang: str) -> Optional[str]:
-        """Get cached translation for a priority message"""
-        conn = sqlite3.connect('api_keys.db')
-        c = conn.cursor()
-        
-        # Check if cache is still valid
-        now = datetime.now(timezone.utc)
-        c.execute('''SELECT translation FROM priority_cache 
-                     WHERE cache_key=? AND target_lang=? AND expires_at > ?''', 
-                 (key, target_lang, now))
-        result = c.fetchone()
         
-        if result:
-            # Update usage counter
-            c.execute('UPDATE priority_cache SET uses = uses + 1 WHERE cache_key=? AND target_lang=?',
-                     (key, target_lang))
-            conn.commit()
+        if retry_after is not None and retry_after > self.backoff_max:
+            # Upstream asked for a long pause: fail fast for that long instead of sleeping
+            breaker.record_failure(error, open_seconds=retry_after, force_open=True)
+            return None
         
-        conn.close()
-        return result[0] if result else None
+        breaker.record_failure(error)
+        if attempt >= self.max_retries or breaker.state == breaker.OPEN:
+            return None
+        return self.backoff(attempt, retry_after)
     
-    def get_cache_status(self, target_lang: str) -> Dict[str, any]:
-        """Get cache status for a language"""
-        conn = sqlite3.connect('api_keys.db')
-        c = conn.cursor()
-        
-        c.execute('SELECT priority, COUNT(*) FROM priority_cache WHERE target_lang=? GROUP BY priority',
-                 (target_lang,))
-        priority_counts = dict(c.fetchall())
-        
-        c.execute('SELECT COUNT(*) FROM priority_cache WHERE target_lang=?', (target_lang,))
-        total_cached = c.fetchone()[0]
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before the retry after the given attempt: upstream's Retry-After, else full-jitter exponential"""
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.backoff_base)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+deepl_breaker = UpstreamCircuitBreaker('deepl')
+upstream_retry_policy = UpstreamRetryPolicy()
+upstream_latency = UpstreamLatencyTracker()
+
+# ==== UPSTREAM DEEPL CLIENTS ====
+
+class DeepLClient:
+    """DeepL API client with a pooled, per-process HTTP session"""
+    
+    def __init__(self, api_key: str = DEEPL_API_KEY, url: str = DEEPL_API_URL, timeout: float = DEEPL_TIMEOUT,
+                 usage_url: str = DEEPL_USAGE_URL):
+        self.api_key = api_key
+        self.url = url
+        self.usage_url = usage_url
+        self.timeout = timeout
+        self._session = None
+        self._session_pid = None
+    
+    @property
+    def session(self) -> requests.Session:
+        # Sessions hold sockets, so each forked worker gets its own
+        if self._session is None or self._session_pid != os.getpid():
+            self._session = requests.Session()
+            self._session.headers['Authorization'] = f'DeepL-Auth-Key {self.api_key}'
+            self._session_pid = os.getpid()
+        return self._session
+    
+    def _post(self, texts: List[str], target_lang: str, timeout: Optional[float],
+              source_lang: Optional[str] = None) -> List[str]:
+        data = {'text': texts, 'target_lang': target_lang}
+        if source_lang:
+            data['source_lang'] = source_lang
+        resp = self.session.post(self.url, data=data, timeout=timeout or self.timeout)
+        if resp.status_code != 200:
+            raise DeepLError(resp.status_code, resp.text, parse_retry_after(resp.headers.get('Retry-After')))
+        return [t['text'] for t in resp.json()['translations']]
+    
+    def usage(self) -> Dict[str, int]:
+        """Character usage for the current billing period ({'character_count', 'character_limit'})"""
+        resp = self.session.get(self.usage_url, timeout=self.timeout)
+        if resp.status_code != 200:
+            raise DeepLError(resp.status_code, resp.text)
+        return resp.json()
+    
+    def translate(self, texts: List[str], target_lang: str, timeout: Optional[float] = None,
+                  deadline: Optional[Deadline] = None, source_lang: Optional[str] = None) -> List[str]:
+        """
+        Translate texts in one request through the circuit breaker, retrying retryable errors.
+        The upstream timeout comes from observed latency and the remaining deadline budget.
+        Raises DeepLError on non-200 responses, UpstreamUnavailableError while the circuit is open
+        and DeadlineExceededError when the budget runs out.
+        """
+        attempt = 0
+        while True:
+            request_timeout, deadline_bound = upstream_latency.timeout_for(deadline, timeout)
+            if not deepl_breaker.allow_request():
+                raise UpstreamUnavailableError(deepl_breaker.retry_after())
+            started = time.time()
+            settled = False
+            try:
+                translations = self._post(texts, target_lang, request_timeout, source_lang)
+                upstream_latency.record(time.time() - started)
+                deepl_breaker.record_success()
+                settled = True
+                return translations
+            except Exception as e:
+                settled = True
+                if deadline_bound and upstream_retry_policy.is_timeout_or_connection_error(e):
+                    deepl_breaker.record_abandoned()
+                    raise DeadlineExceededError() from e
+                delay = upstream_retry_policy.handle_failure(deepl_breaker, e, attempt)
+                if delay is None:
+                    raise
+                if deadline is not None and delay >= deadline.remaining():
+                    raise DeadlineExceededError() from e
+                time.sleep(delay)
+                attempt += 1
+            finally:
+                if not settled:
+                    # Cancelled or interrupted mid-call: release a half-open probe slot
+                    deepl_breaker.record_abandoned()
+
+class AsyncDeepLClient:
+    """asyncio DeepL API client built on aiohttp, for the ASGI translation path"""
+    
+    def __init__(self, api_key: str = DEEPL_API_KEY, url: str = DEEPL_API_URL,
+                 timeout: float = DEEPL_TIMEOUT, max_connections: int = ASYNC_UPSTREAM_CONNECTIONS):
+        self.api_key = api_key
+        self.url = url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._session = None
+        self._session_loop = None
+    
+    def _get_session(self):
+        import aiohttp
         
-        conn.close()
+        loop = asyncio.get_running_loop()
+        # aiohttp sessions are bound to the event loop that created them
+        if self._session is None or self._session_loop is not loop or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={'Authorization': f'DeepL-Auth-Key {self.api_key}'},
+                connector=aiohttp.TCPConnector(limit=self.max_connections)
+            )
+            self._session_loop = loop
+        return self._session
+    
+    async def _post(self, texts: List[str], target_lang: str, timeout: Optional[float],
+                    source_lang: Optional[str] = None) -> List[str]:
+        import aiohttp
         
-        return {
-            'language': target_lang,
-            'total_cached': total_cached,
-            'priority_1': priority_counts.get(1, 0),
-            'priority_2': priority_counts.get(2, 0),
-            'populate_status': self.populate_status.get(target_lang, 'not_started'),
-            'cache_ready': total_cached >= 10
-        }
+        session = self._get_session()
+        data = [('text', text) for text in texts] + [('target_lang', target_lang)]
+        if source_lang:
+            data.append(('source_lang', source_lang))
+        async with session.post(self.url, data=data,
+                                timeout=aiohttp.ClientTimeout(total=timeout or self.timeout)) as resp:
+            if resp.status != 200:
+                raise DeepLError(resp.status, await resp.text(), parse_retry_after(resp.headers.get('Retry-After')))
+            payload = await resp.json(content_type=None)
+        return [t['text'] for t in payload['translations']]
+    
+    async def translate(self, texts: List[str], target_lang: str, timeout: Optional[float] = None,
+                        deadline: Optional[Deadline] = None, source_lang: Optional[str] = None) -> List[str]:
+        """Async variant of DeepLClient.translate, sharing the same circuit breaker and latency data"""
+        attempt = 0
+        while True:
+            request_timeout, deadline_bound = upstream_latency.timeout_for(deadline, timeout)
+            if not deepl_breaker.allow_request():
+                raise UpstreamUnavailableError(deepl_breaker.retry_after())
+            started = time.time()
+            settled = False
+            try:
+                translations = await self._post(texts, target_lang, request_timeout, source_lang)
+                upstream_latency.record(time.time() - started)
+                deepl_breaker.record_success()
+                settled = True
+                return translations
+            except Exception as e:
+                settled = True
+                if deadline_bound and upstream_retry_policy.is_timeout_or_connection_error(e):
+                    deepl_breaker.record_abandoned()
+                    raise DeadlineExceededError() from e
+                delay = upstream_retry_policy.handle_failure(deepl_breaker, e, attempt)
+                if delay is None:
+                    raise
+                if deadline is not None and delay >= deadline.remaining():
+                    raise DeadlineExceededError() from e
+                await asyncio.sleep(delay)
+                attempt += 1
+            finally:
+                if not settled:
+                    # Cancelled or interrupted mid-call: release a half-open probe slot
+                    deepl_breaker.record_abandoned()
+    
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
 
-class TranslationBatcher:
-    """Handles batch translation processing with rate limiting and smart IP-based DeepL call limiting"""
+deepl_client = DeepLClient()
+async_deepl_client = AsyncDeepLClient()
+
+# ==== TRANSLATION BACKENDS ====
+
+class BackendRateLimitedError(Exception):
+    """The backend's own call rate is used up; the chain moves on to the next backend"""
+
+class TranslationBackend:
+    """Interface for translation providers used by the fallback chain"""
     
-    def __init__(self, rate_limit: int = TRANSLATION_RATE_LIMIT):
+    name = 'base'
+    capabilities = frozenset()   # 'batch', 'async', 'usage', 'deterministic'
+    cost_per_char = 0.0          # relative cost, used for cost ordering
+    default_latency = 1.0        # seconds, assumed until real samples exist
+    test_only = False            # never ranked ahead of real providers, output never cached
+    
+    def __init__(self, rate_limit: float = 0):
         self.rate_limit = rate_limit
-        self.batch_size = BATCH_SIZE
-        self.last_request_time = 0
-        self.request_count = 0
         self.rate_lock = threading.Lock()
+        self.next_slot = 0.0
+        self.latency = UpstreamLatencyTracker()
+        self.breaker = None
     
-    def _rate_limit_check(self):
-        """Implement classic synthetic rate limiting (in addition to IP-based for DeepL calls)"""
-        with self.rate_lock:
-            current_time = time.time()
-            if current_time - self.last_request_time >= 1.0:
-                self.request_count = 0
-                self.last_request_time = current_time
-            
-            if self.request_count >= self.rate_limit:
-                sleep_time = 1.0 - (current_time - self.last_request_time)
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
-                self.request_count = 0
-                self.last_request_time = time.time()
-            
-            self.request_count += 1
+    def reset_after_fork(self):
+        self.rate_lock = threading.Lock()
+        self.latency.reset_after_fork()
     
-    def _get_text_hash(self, text: str) -> str:
-        """Generate hash for text caching"""
-        return hashlib.md5(text.encode()).hexdigest()
+    def is_configured(self) -> bool:
+        return True
     
-    def _get_cached_translation(self, text: str, target_lang: str) -> Optional[str]:
-        """Check for cached translation"""
-        text_hash = self._get_text_hash(text)
-        conn = sqlite3.connect('api_keys.db')
-        c = conn.cursor()
-        
-        now = datetime.now(timezone.utc)
-        c.execute('''SELECT translation FROM translation_cache 
-                     WHERE text_hash=? AND target_lang=? AND expires_at > ?''',
-                 (text_hash, target_lang, now))
-        result = c.fetchone()
-        
-        if result:
-            # Update usage counter
-            c.execute('UPDATE translation_cache SET uses = uses + 1 WHERE text_hash=? AND target_lang=?',
-                     (text_hash, target_lang))
-            conn.commit()
-        
-        conn.close()
-        return result[0] if result else None
+    def is_available(self) -> bool:
+        """False while the backend's circuit is open and cooling down; once the cooldown ends the next call probes"""
+        if self.breaker is None or self.breaker.state != UpstreamCircuitBreaker.OPEN:
+            return True
+        return self.breaker.open_until <= time.time()
     
-    def _cache_translation(self, text: str, target_lang: str, translation: str):
-        """Cache translation result"""
-        text_hash = self._get_text_hash(text)
-        conn = sqlite3.connect('api_keys.db')
-        c = conn.cursor()
-        
-        expires_at = datetime.now(timezone.utc) + timedelta(hours=CACHE_EXPIRY_HOURS)
-        c.execute('''INSERT OR REPLACE INTO translation_cache 
-                     (text_hash, source_text, target_lang, translation, expires_at) 
-                     VALUES (?, ?, ?, ?, ?)''',
-                 (text_hash, text, target_lang, translation, expires_at))
-        
-        conn.commit()
-        conn.close()
+    def expected_latency(self) -> float:
+        return self.latency.percentile(0.5) or self.default_latency
     
-    def translate_single(self, text: str, target_lang: str, request=None, api_key=None, endpoint_type='demo') -> Dict[str, any]:
-        """Translate single text with caching and rate limiting and DeepL IP call limiting
-        NOTE: request and api_key are only required for IP-based rate limiting.
+    def acquire(self, deadline: Optional[Deadline] = None, wait: bool = False):
         """
-        start_time = time.time()
-        
-        # Check cache first
-        cached_translation = self._get_cached_translation(text, target_lang)
-        if cached_translation:
-            return {
-                'success': True,
-                'translation': cached_translation,
-                'cached': True,
-                'response_time': time.time() - start_time
-            }
-        
-        # Only if NOT cached, we check IP DeepL call limits
+        Take a slot under the backend's rate limit. Without wait, raises BackendRateLimitedError
+        if no slot is free right now; with wait, sleeps for the slot unless it is past the deadline.
+        """
+        if not self.rate_limit:
+            return
+        with self.rate_lock:
+            now = time.time()
+            delay = max(0.0, self.next_slot - now)
+            if delay > 0 and not wait:
+                raise BackendRateLimitedError(self.name)
+            if deadline is not None and delay >= deadline.remaining():
+                raise DeadlineExceededError()
+            self.next_slot = max(now, self.next_slot) + 1.0 / self.rate_limit
+        if delay > 0:
+            time.sleep(delay)
+    
+    def translate_batch(self, texts: List[str], target_lang: str, deadline: Optional[Deadline] = None,
+                        source_lang: Optional[str] = None) -> List[str]:
+        """Translate texts; source_lang is a hint (None lets the provider detect it)"""
+        raise NotImplementedError
+    
+    def translate(self, text: str, target_lang: str, deadline: Optional[Deadline] = None,
+                  source_lang: Optional[str] = None) -> str:
+        return self.translate_batch([text], target_lang, deadline=deadline, source_lang=source_lang)[0]
+    
+    async def translate_batch_async(self, texts: List[str], target_lang: str, deadline: Optional[Deadline] = None,
+                                    source_lang: Optional[str] = None) -> List[str]:
+        return await asyncio.to_thread(self.translate_batch, texts, target_lang, deadline, source_lang)
+    
+    def usage(self) -> Optional[Dict[str, int]]:
+        """Quota usage in DeepL's /v2/usage shape, or None if the backend has no quota"""
+        return None
+    
+    def get_status(self) -> Dict[str, any]:
+        return {
+            'configured': self.is_configured(),
+            'available': self.is_available(),
+            'capabilities': sorted(self.capabilities),
+            'rate_limit': self.rate_limit or None,
+            'expected_latency': self.expected_latency(),
+            'cost_per_char': self.cost_per_char,
+            'test_only': self.test_only
+        }
+
+class DeepLBackend(TranslationBackend):
+    """DeepL through the shared pooled clients and the deepl circuit breaker"""
+    
+    name = 'deepl'
+    capabilities = frozenset({'batch', 'async', 'usage'})
+    cost_per_char = 20.0 / 1000000  # EUR per character, DeepL API Pro
+    default_latency = 0.5
+    
+    def __init__(self, rate_limit: float = 0):
+        super().__init__(rate_limit)
+        # Shared with DeepLClient, which records latency and breaker outcomes itself
+        self.latency = upstream_latency
+        self.breaker = deepl_breaker
+    
+    def reset_after_fork(self):
+        self.rate_lock = threading.Lock()
+    
+    def is_configured(self) -> bool:
+        return bool(DEEPL_API_KEY)
+    
+    def translate_batch(self, texts: List[str], target_lang: str, deadline: Optional[Deadline] = None,
+                        source_lang: Optional[str] = None) -> List[str]:
+        return deepl_client.translate(texts, target_lang, deadline=deadline, source_lang=source_lang)
+    
+    async def translate_batch_async(self, texts: List[str], target_lang: str, deadline: Optional[Deadline] = None,
+                                    source_lang: Optional[str] = None) -> List[str]:
+        return await async_deepl_client.translate(texts, target_lang, deadline=deadline, source_lang=source_lang)
+    
+    def usage(self) -> Dict[str, int]:
+        return deepl_client.usage()
+
+class EchoBackend(TranslationBackend):
+    """Deterministic local backend for tests and benchmarks: returns '[LANG] text' without network calls"""
+    
+    name = 'echo'
+    capabilities = frozenset({'batch', 'async', 'usage', 'deterministic'})
+    cost_per_char = 0.0
+    default_latency = 0.0
+    test_only = True
+    
+    def __init__(self, rate_limit: float = 0):
+        super().__init__(rate_limit)
+        self.characters = 0
+    
+    def translate_batch(self, texts: List[str], target_lang: str, deadline: Optional[Deadline] = None,
+                        source_lang: Optional[str] = None) -> List[str]:
+        started = time.time()
+        if ECHO_CHARACTER_LIMIT and self.characters >= ECHO_CHARACTER_LIMIT:
+            raise DeepLError(456, 'Quota exceeded')
+        translations = [f'[{target_lang.upper()}] {text}' for text in texts]
+        self.characters += sum(len(text) for text in texts)
+        self.latency.record(time.time() - started)
+        return translations
+    
+    def usage(self) -> Dict[str, int]:
+        """Serves the same shape as DeepL's /v2/usage so quota handling can be exercised locally"""
+        return {'character_count': self.characters, 'character_limit': ECHO_CHARACTER_LIMIT}
+    
+    async def translate_batch_async(self, texts: List[str], target_lang: str, deadline: Optional[Deadline] = None,
+                                    source_lang: Optional[str] = None) -> List[str]:
+        return self.translate_batch(texts, target_lang, deadline, source_lang)
+
+TRANSLATION_BACKEND_TYPES = {
+    'deepl': DeepLBackend,
+    'echo': EchoBackend,
+}
+
+class TranslationBackendChain:
+    """
+    Tries configured backends in latency, cost or configured order, moving on when a backend
+    is unavailable, rate limited or failing upstream. Request errors and deadlines are not retried
+    on other backends.
+    """
+    
+    def __init__(self, names: List[str], order: str = 'latency'):
+        unknown = [name for name in names if name not in TRANSLATION_BACKEND_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown translation backend(s): {', '.join(unknown)}")
+        self.backends = [TRANSLATION_BACKEND_TYPES[name](BACKEND_RATE_LIMITS.get(name, 0)) for name in names]
+        self.order = order
+        self.stats = defaultdict(lambda: defaultdict(int))
+    
+    def reset_after_fork(self):
+        for backend in self.backends:
+            backend.reset_after_fork()
+    
+    def is_configured(self) -> bool:
+        return any(backend.is_configured() for backend in self.backends)
+    
+    def ordered_backends(self) -> List[TranslationBackend]:
+        backends = [b for b in self.backends if b.is_configured() and not b.test_only]
+        if self.order == 'latency':
+            backends.sort(key=lambda b: b.expected_latency())
+        elif self.order == 'cost':
+            backends.sort(key=lambda b: b.cost_per_char)
+        # Test-only backends are free and instant, so they would always win; they only serve as a last resort
+        return backends + [b for b in self.backends if b.is_configured() and b.test_only]
+    
+    def is_cacheable(self, name: str) -> bool:
+        """Whether translations served by the named backend may be stored in the caches"""
+        return not any(b.test_only for b in self.backends if b.name == name)
+    
+    def _should_fall_back(self, error: Exception) -> bool:
+        if isinstance(error, DeadlineExceededError):
+            return False
+        if isinstance(error, DeepLError):
+            # Bad requests fail the same way everywhere; quota and server errors don't
+            return error.status_code in (403, 429, 456) or error.status_code >= 500
+        return True
+    
+    def _candidates(self) -> List[TranslationBackend]:
+        backends = self.ordered_backends()
+        if not backends:
+            raise UpstreamUnavailableError(0)
+        backends = [b for b in backends if not upstream_quota.is_exhausted(b.name)]
+        if not backends:
+            raise QuotaExhaustedError()
+        # Backends with an open circuit go last; they fail fast but still report retry_after
+        return [b for b in backends if b.is_available()] + [b for b in backends if not b.is_available()]
+    
+    def _record_failure(self, backend: TranslationBackend, error: Exception):
+        self.stats[backend.name]['failures'] += 1
+        if isinstance(error, DeepLError) and error.status_code == 456:
+            upstream_quota.mark_exhausted(backend.name)
+    
+    def _record_success(self, backend: TranslationBackend, position: int, texts: List[str]):
+        self.stats[backend.name]['served'] += 1
+        if position:
+            self.stats[backend.name]['fallbacks'] += 1
+        upstream_quota.record(backend.name, sum(len(text) for text in texts))
+    
+    def translate_batch(self, texts: List[str], target_lang: str, deadline: Optional[Deadline] = None,
+                        source_lang: Optional[str] = None) -> Tuple[List[str], str]:
+        """Translate with the first backend that succeeds; returns (translations, backend name)"""
+        candidates = self._candidates()
+        last_error = None
+        for position, backend in enumerate(candidates):
+            try:
+                backend.acquire(deadline, wait=position == len(candidates) - 1)
+                translations = backend.translate_batch(texts, target_lang, deadline=deadline, source_lang=source_lang)
+            except Exception as e:
+                self._record_failure(backend, e)
+                if not self._should_fall_back(e):
+                    raise
+                last_error = e
+                continue
+            self._record_success(backend, position, texts)
+            return translations, backend.name
+        raise last_error
+    
+    async def translate_batch_async(self, texts: List[str], target_lang: str, deadline: Optional[Deadline] = None,
+                                    source_lang: Optional[str] = None) -> Tuple[List[str], str]:
+        """Async variant of translate_batch"""
+        candidates = self._candidates()
+        last_error = None
+        for position, backend in enumerate(candidates):
+            try:
+                if position == len(candidates) - 1:
+                    await asyncio.to_thread(backend.acquire, deadline, True)
+                else:
+                    backend.acquire(deadline)
+                translations = await backend.translate_batch_async(texts, target_lang, deadline=deadline,
+                                                                   source_lang=source_lang)
+            except Exception as e:
+                self._record_failure(backend, e)
+                if not self._should_fall_back(e):
+                    raise
+                last_error = e
+                continue
+            self._record_success(backend, position, texts)
+            return translations, backend.name
+        raise last_error
+    
+    def get_status(self) -> Dict[str, any]:
+        return {
+            'order': self.order,
+            'chain': [b.name for b in self.ordered_backends()],
+            'backends': {b.name: dict(b.get_status(), **self.stats[b.name]) for b in self.backends}
+        }
+
+translation_backends = TranslationBackendChain(TRANSLATION_BACKENDS, TRANSLATION_BACKEND_ORDER)
+
+# ==== UPSTREAM SCHEDULER ====
+
+class UpstreamOverloadedError(Exception):
+    """Low-priority work shed because the upstream queue is over its latency target"""
+    
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__('Translation service busy, please retry shortly')
+
+class UpstreamScheduler:
+    """
+    Hands out upstream call slots at TRANSLATION_RATE_LIMIT per second in strict class order:
+    paid interactive, paid batch, demo, then background warming. Within a class, flows (API keys,
+    or client IPs for demo) share slots by weighted fair queuing so one busy key can't starve others.
+    Demo work is shed up front when its expected queueing delay exceeds SCHEDULER_LATENCY_TARGET.
+    """
+    
+    PAID_INTERACTIVE = 0
+    PAID_BATCH = 1
+    DEMO = 2
+    BACKGROUND = 3
+    CLASS_NAMES = {
+        PAID_INTERACTIVE: 'paid_interactive',
+        PAID_BATCH: 'paid_batch',
+        DEMO: 'demo',
+        BACKGROUND: 'background'
+    }
+    SHEDDABLE = (DEMO,)
+    
+    def __init__(self, rate_limit: float = TRANSLATION_RATE_LIMIT, latency_target: float = SCHEDULER_LATENCY_TARGET):
+        self.interval = 1.0 / rate_limit
+        self.latency_target = latency_target
+        self._reset_state()
+    
+    def _reset_state(self):
+        self.cond = threading.Condition()
+        self.queues = {cls: [] for cls in self.CLASS_NAMES}       # heaps of [finish_tag, seq, flow, enqueued_at]
+        self.virtual_time = {cls: 0.0 for cls in self.CLASS_NAMES}
+        self.flow_finish = {}
+        self.next_slot = 0.0
+        self.seq = itertools.count()
+        self.stats = {cls: defaultdict(int) for cls in self.CLASS_NAMES}
+        self.waits = {cls: deque(maxlen=500) for cls in self.CLASS_NAMES}
+    
+    def reset_after_fork(self):
+        self._reset_state()
+    
+    @classmethod
+    def classify(cls, endpoint_type: str, batch: bool = False) -> int:
+        """Priority class for a call from the given endpoint type"""
+        if endpoint_type == 'paid':
+            return cls.PAID_BATCH if batch else cls.PAID_INTERACTIVE
+        if endpoint_type == 'background':
+            return cls.BACKGROUND
+        return cls.DEMO
+    
+    def expected_wait(self, priority: int) -> float:
+        """Queueing delay a new call of this class would see right now"""
+        with self.cond:
+            ahead = sum(len(self.queues[cls]) for cls in self.CLASS_NAMES if cls <= priority)
+            return max(0.0, self.next_slot - time.time()) + ahead * self.interval
+    
+    def _enqueue(self, priority: int, flow: str, weight: float) -> list:
+        with self.cond:
+            if priority in self.SHEDDABLE:
+                expected = self.expected_wait(priority)
+                if expected > self.latency_target:
+                    self.stats[priority]['shed'] += 1
+                    raise UpstreamOverloadedError(expected)
+            # Start-time fair queuing: a flow's next call is tagged after its previous one
+            start = max(self.virtual_time[priority], self.flow_finish.get((priority, flow), 0.0))
+            finish = start + 1.0 / weight
+            self.flow_finish[(priority, flow)] = finish
+            ticket = [finish, next(self.seq), flow, time.time()]
+            heapq.heappush(self.queues[priority], ticket)
+            self.stats[priority]['queued'] += 1
+            return ticket
+    
+    def _poll(self, priority: int, ticket: list) -> float:
+        """Grant the slot if the ticket is next in line and due; returns 0 when granted, else seconds to wait"""
+        with self.cond:
+            head_class = next(cls for cls in self.CLASS_NAMES if self.queues[cls])
+            if head_class != priority or self.queues[priority][0] is not ticket:
+                return self.interval
+            now = time.time()
+            if self.next_slot > now:
+                return self.next_slot - now
+            heapq.heappop(self.queues[priority])
+            self.virtual_time[priority] = ticket[0]
+            self.next_slot = max(now, self.next_slot) + self.interval
+            if not self.queues[priority]:
+                # Idle class: forget finish tags so they don't grow without bound
+                self.flow_finish = {k: v for k, v in self.flow_finish.items() if k[0] != priority}
+            self.stats[priority]['granted'] += 1
+            self.waits[priority].append(now - ticket[3])
+            self.cond.notify_all()
+            return 0.0
+    
+    def _cancel(self, priority: int, ticket: list):
+        with self.cond:
+            queue = self.queues[priority]
+            if ticket in queue:
+                queue.remove(ticket)
+                heapq.heapify(queue)
+                self.stats[priority]['abandoned'] += 1
+                self.cond.notify_all()
+    
+    def _wait_time(self, wait_for: float, deadline: Optional[Deadline]) -> float:
+        if deadline is None:
+            return wait_for
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise DeadlineExceededError()
+        return min(wait_for, remaining)
+    
+    def acquire(self, priority: int, flow: str, deadline: Optional[Deadline] = None, weight: float = 1.0):
+        """Block until this call may go upstream; raises UpstreamOverloadedError or DeadlineExceededError"""
+        ticket = self._enqueue(priority, flow, weight)
+        try:
+            with self.cond:
+                while True:
+                    wait_for = self._poll(priority, ticket)
+                    if not wait_for:
+                        return
+                    self.cond.wait(self._wait_time(wait_for, deadline))
+        except BaseException:
+            self._cancel(priority, ticket)
+            raise
+    
+    async def acquire_async(self, priority: int, flow: str, deadline: Optional[Deadline] = None, weight: float = 1.0):
+        """Async variant of acquire that polls instead of blocking the event loop"""
+        ticket = self._enqueue(priority, flow, weight)
+        try:
+            while True:
+                wait_for = self._poll(priority, ticket)
+                if not wait_for:
+                    return
+                await asyncio.sleep(self._wait_time(wait_for, deadline))
+        except BaseException:
+            self._cancel(priority, ticket)
+            raise
+    
+    def get_status(self) -> Dict[str, any]:
+        status = {}
+        with self.cond:
+            for cls, name in self.CLASS_NAMES.items():
+                waits = sorted(self.waits[cls])
+                status[name] = dict(self.stats[cls], waiting=len(self.queues[cls]),
+                                    p99_wait=waits[int(0.99 * (len(waits) - 1))] if waits else None)
+        status['rate_limit'] = 1.0 / self.interval
+        status['latency_target'] = self.latency_target
+        return status
+
+upstream_scheduler = UpstreamScheduler()
+
+# ==== UPSTREAM QUOTA ====
+
+class QuotaExhaustedError(Exception):
+    """Upstream character quota is (nearly) used up; only cached translations can be served"""
+    
+    def __init__(self, message: str = 'Translation quota exhausted - serving cached translations only'):
+        super().__init__(message)
+
+class UpstreamQuotaTracker:
+    """
+    Tracks each backend's character quota from periodic usage polls plus locally counted characters,
+    and forecasts exhaustion from the recent consumption rate. Modes:
+    normal: all traffic goes upstream.
+    conserving: quota is nearly used up or forecast to run out soon; demo and warming misses are refused.
+    degraded: no backend has quota left; only cache and priority-cache hits are served, misses fail fast.
+    """
+    
+    NORMAL = 'normal'
+    CONSERVING = 'conserving'
+    DEGRADED = 'degraded'
+    CONSERVED_CLASSES = (UpstreamScheduler.DEMO, UpstreamScheduler.BACKGROUND)
+    
+    def __init__(self, chain: TranslationBackendChain, poll_seconds: float = QUOTA_POLL_SECONDS):
+        self.chain = chain
+        self.poll_seconds = poll_seconds
+        self._reset_state()
+    
+    def _reset_state(self):
+        self.lock = threading.Lock()
+        self.usage = {}                                          # backend -> {'used', 'limit', 'polled_at'}
+        self.exhausted = set()                                   # backends that answered 456 since their last poll
+        self.history = defaultdict(lambda: deque(maxlen=256))   # backend -> (timestamp, used)
+        self.last_poll = 0.0
+        self.polling = False
+    
+    def reset_after_fork(self):
+        self._reset_state()
+    
+    def maybe_poll(self):
+        """Refresh usage in the background when the last poll is stale"""
+        with self.lock:
+            if self.polling or time.time() - self.last_poll < self.poll_seconds:
+                return
+            self.polling = True
+        threading.Thread(target=self.poll, name='quota-poll', daemon=True).start()
+    
+    def poll(self):
+        """Fetch usage from every configured backend that reports it"""
+        try:
+            for backend in self.chain.backends:
+                if not backend.is_configured():
+                    continue
+                try:
+                    usage = backend.usage()
+                except Exception as e:
+                    print(f"⚠️  Usage poll failed for '{backend.name}': {e}")
+                    continue
+                if usage is None:
+                    continue
+                now = time.time()
+                with self.lock:
+                    used = usage.get('character_count', 0)
+                    self.usage[backend.name] = {
+                        'used': used,
+                        'limit': usage.get('character_limit') or None,
+                        'polled_at': now
+                    }
+                    self.history[backend.name].append((now, used))
+                    self.exhausted.discard(backend.name)
+        finally:
+            with self.lock:
+                self.last_poll = time.time()
+                self.polling = False
+    
+    def record(self, backend: str, characters: int):
+        """Count characters sent upstream since the last poll"""
+        with self.lock:
+            state = self.usage.get(backend)
+            if state is None:
+                return
+            state['used'] += characters
+            self.history[backend].append((time.time(), state['used']))
+    
+    def mark_exhausted(self, backend: str):
+        with self.lock:
+            if backend not in self.exhausted:
+                print(f"⚠️  Upstream '{backend}' quota exhausted")
+            self.exhausted.add(backend)
+    
+    def remaining(self, backend: str) -> Optional[int]:
+        state = self.usage.get(backend)
+        if state is None or not state['limit']:
+            return None
+        return max(0, state['limit'] - state['used'])
+    
+    def forecast_seconds(self, backend: str) -> Optional[float]:
+        """Seconds until the quota runs out at the recent consumption rate, if it is being consumed"""
+        remaining = self.remaining(backend)
+        with self.lock:
+            samples = [(t, used) for t, used in self.history[backend] if t >= time.time() - QUOTA_FORECAST_WINDOW]
+        if remaining is None or len(samples) < 2:
+            return None
+        (first_t, first_used), (last_t, last_used) = samples[0], samples[-1]
+        if last_t - first_t < QUOTA_FORECAST_MIN_SPAN or last_used <= first_used:
+            return None
+        return remaining / ((last_used - first_used) / (last_t - first_t))
+    
+    def is_exhausted(self, backend: str) -> bool:
+        if backend in self.exhausted:
+            return True
+        remaining = self.remaining(backend)
+        return remaining is not None and remaining <= QUOTA_RESERVE_CHARS
+    
+    def is_conserving(self, backend: str) -> bool:
+        if self.is_exhausted(backend):
+            return True
+        state = self.usage.get(backend)
+        if state is not None and state['limit'] and state['used'] >= state['limit'] * QUOTA_CONSERVE_FRACTION:
+            return True
+        forecast = self.forecast_seconds(backend)
+        return forecast is not None and forecast < QUOTA_CONSERVE_HORIZON
+    
+    def mode(self) -> str:
+        backends = [b.name for b in self.chain.backends if b.is_configured()]
+        if backends and all(self.is_exhausted(name) for name in backends):
+            return self.DEGRADED
+        if backends and all(self.is_conserving(name) for name in backends):
+            return self.CONSERVING
+        return self.NORMAL
+    
+    def check(self, priority: int):
+        """Raise QuotaExhaustedError if a cache miss of this priority class must not go upstream"""
+        self.maybe_poll()
+        mode = self.mode()
+        if mode == self.DEGRADED:
+            raise QuotaExhaustedError()
+        if mode == self.CONSERVING and priority in self.CONSERVED_CLASSES:
+            raise QuotaExhaustedError('Demo translations are paused to conserve translation quota - cached translations only')
+    
+    def get_status(self) -> Dict[str, any]:
+        backends = {}
+        for name, state in list(self.usage.items()):
+            forecast = self.forecast_seconds(name)
+            backends[name] = {
+                'used': state['used'],
+                'limit': state['limit'],
+                'remaining': self.remaining(name),
+                'exhausted': self.is_exhausted(name),
+                'forecast_exhaustion_seconds': round(forecast) if forecast is not None else None,
+                'polled_at': datetime.fromtimestamp(state['polled_at'], timezone.utc).isoformat()
+            }
+        return {'mode': self.mode(), 'backends': backends}
+
+upstream_quota = UpstreamQuotaTracker(translation_backends)
+
+# ==== ADMISSION CONTROL ====
+
+class AdmissionController:
+    """
+    Tracks in-flight requests and how long requests queued before reaching the app, and refuses
+    upstream work for low-priority classes (demo first) when the process is overloaded. Shedding
+    happens at the cache-miss decision point, so health checks and cache hits are always served.
+    """
+    
+    def __init__(self, max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+                 queue_delay_target: float = ADMISSION_QUEUE_DELAY_TARGET):
+        self.max_in_flight = max(1, max_in_flight)
+        self.queue_delay_target = queue_delay_target
+        self._reset_state()
+    
+    def _reset_state(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.queue_delays = deque(maxlen=200)   # (timestamp, seconds)
+        self.stats = defaultdict(lambda: defaultdict(int))
+    
+    def reset_after_fork(self):
+        self._reset_state()
+    
+    @staticmethod
+    def parse_request_start(value) -> Optional[float]:
+        """Parse a proxy's X-Request-Start header ('t=<seconds|ms|us>') to a unix timestamp"""
+        if not value:
+            return None
+        try:
+            started = float(value.strip().lstrip('t='))
+        except ValueError:
+            return None
+        if started > 1e14:
+            return started / 1e6
+        if started > 1e11:
+            return started / 1e3
+        return started
+    
+    def request_started(self, headers, arrived: float):
+        with self.lock:
+            self.in_flight += 1
+            proxy_started = self.parse_request_start(headers.get('X-Request-Start'))
+            if proxy_started is not None:
+                self.queue_delays.append((arrived, max(0.0, arrived - proxy_started)))
+    
+    def request_finished(self):
+        with self.lock:
+            self.in_flight = max(0, self.in_flight - 1)
+    
+    def queue_delay(self) -> float:
+        """Recent (last 10s) p90 queueing delay"""
+        with self.lock:
+            cutoff = time.time() - 10
+            delays = sorted(delay for t, delay in self.queue_delays if t >= cutoff)
+        return delays[int(0.9 * (len(delays) - 1))] if delays else 0.0
+    
+    def load(self) -> float:
+        return max(self.in_flight / self.max_in_flight, self.queue_delay() / self.queue_delay_target)
+    
+    def admit(self, priority: int):
+        """Raise UpstreamOverloadedError if a cache miss of this class should be shed at the current load"""
+        name = UpstreamScheduler.CLASS_NAMES[priority]
+        limit = ADMISSION_SHED_LOAD.get(name)
+        load = self.load()
+        if limit is not None and load > limit:
+            self.stats[name]['shed'] += 1
+            raise UpstreamOverloadedError(max(1.0, self.queue_delay()))
+        self.stats[name]['admitted'] += 1
+    
+    def get_status(self) -> Dict[str, any]:
+        return {
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'queue_delay': self.queue_delay(),
+            'load': round(self.load(), 3),
+            'classes': {name: dict(stats) for name, stats in self.stats.items()}
+        }
+
+admission_controller = AdmissionController()
+
+# ==== TEXT SEGMENTATION ====
+
+# Tokens ending in '.' that don't end a sentence, per source language (lowercase, final dot dropped)
+SEGMENT_ABBREVIATIONS = {
+    'EN': {'mr', 'mrs', 'ms', 'dr', 'prof', 'sr', 'jr', 'st', 'vs', 'etc', 'e.g', 'i.e', 'inc', 'ltd', 'co',
+           'corp', 'no', 'fig', 'approx', 'dept', 'est', 'u.s', 'a.m', 'p.m', 'jan', 'feb', 'mar', 'apr',
+           'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec'},
+    'DE': {'z.b', 'bzw', 'usw', 'ca', 'd.h', 'u.a', 'nr', 'str', 'dr', 'prof', 'hr', 'fr', 'vgl', 'evtl',
+           'ggf', 'inkl', 'zzgl', 'bspw', 'sog', 'geb', 'abs'},
+    'FR': {'m', 'mm', 'mme', 'mlle', 'dr', 'env', 'etc', 'cf', 'p.ex', 'av', 'bd', 'no', 'p'},
+    'ES': {'sr', 'sra', 'srta', 'dr', 'dra', 'ud', 'uds', 'etc', 'p.ej', 'aprox', 'núm', 'pág', 'avda'},
+    'IT': {'sig', 'sig.ra', 'dott', 'ecc', 'es', 'pag', 'n', 'avv', 'ing'},
+    'NL': {'dhr', 'mevr', 'bijv', 'enz', 'o.a', 'd.w.z', 'nr', 'ca'},
+    'PT': {'sr', 'sra', 'dr', 'dra', 'etc', 'p.ex', 'pág', 'nº', 'av'},
+}
+_ALL_ABBREVIATIONS = set().union(*SEGMENT_ABBREVIATIONS.values())
+
+_LINE_BREAK = re.compile(r'[ \t]*\n\s*')
+_SENTENCE_END = re.compile(r'[.!?…؟।]+["\'”’»)\]]*(?=\s)')   # needs whitespace after it
+_CJK_SENTENCE_END = re.compile(r'[。！？]+[」』）)”’]*')         # ends a sentence on its own
+_TOKEN_BEFORE = re.compile(r'(\S+)$')
+_WHITESPACE = re.compile(r'\s*')
+
+def split_segments(text: str, source_lang: Optional[str] = None) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    Split text into sentences for the segment cache. Returns the leading whitespace and a list of
+    (segment, whitespace that followed it), so that prefix + segments joined with their separators
+    reproduces the input exactly. Line breaks always end a segment; '.', '!' and '?' only when
+    followed by whitespace and a non-lowercase character, and not after an abbreviation or initial
+    (abbreviations per source language, all known ones when it is unknown); CJK full stops always.
+    """
+    body = text.lstrip()
+    prefix = text[:len(text) - len(body)]
+    abbreviations = SEGMENT_ABBREVIATIONS.get((source_lang or '').upper().split('-')[0], _ALL_ABBREVIATIONS)
+    
+    cuts = [(m.start(), m.end()) for m in _LINE_BREAK.finditer(body)]
+    for m in _CJK_SENTENCE_END.finditer(body):
+        cuts.append((m.end(), _WHITESPACE.match(body, m.end()).end()))
+    for m in _SENTENCE_END.finditer(body):
+        resume = _WHITESPACE.match(body, m.end()).end()
+        if body[resume:resume + 1].islower():
+            continue
+        if m.group().rstrip('"\'”’»)]') == '.':
+            token = _TOKEN_BEFORE.search(body, max(0, m.start() - 32), m.start())
+            token = token.group(1).lstrip('"\'“‘«([').lower() if token else ''
+            if token in abbreviations or (len(token) == 1 and token.isalpha()):
+                continue
+        cuts.append((m.end(), resume))
+    
+    segments = []
+    position = 0
+    for end, resume in sorted(cuts):
+        if end <= position:
+            position = max(position, resume)
+            continue
+        segments.append((body[position:end], body[end:resume]))
+        position = resume
+    if position < len(body):
+        tail = body[position:]
+        segments.append((tail.rstrip(), tail[len(tail.rstrip()):]))
+    return prefix, segments
+
+def join_segments(prefix: str, segments: List[Tuple[str, str]], translations: Dict[str, str]) -> str:
+    """Reassemble split_segments output with each segment replaced by its translation"""
+    return prefix + ''.join(translations[segment] + separator for segment, separator in segments)
+
+def split_chunks(text: str, max_chars: int, source_lang: Optional[str] = None) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    Split an oversized text into chunks of at most max_chars, in the same (prefix, [(chunk, separator)])
+    form as split_segments. Sentences are packed greedily and a chunk at least half full closes at the
+    next paragraph break; a single sentence longer than max_chars is cut at its last space that fits
+    (or at max_chars when it has none, e.g. CJK without punctuation).
+    """
+    prefix, segments = split_segments(text, source_lang)
+    pieces = []
+    for segment, separator in segments:
+        while len(segment) > max_chars:
+            cut = segment.rfind(' ', 1, max_chars + 1)
+            if cut < 0:
+                cut = max_chars
+            piece = segment[:cut].rstrip()
+            rest = segment[cut:].lstrip()
+            pieces.append((piece, segment[len(piece):len(segment) - len(rest)]))
+            segment = rest
+        pieces.append((segment, separator))
+
+    chunks = []
+    current, size = [], 0
+    for piece, separator in pieces:
+        if current and size + len(piece) > max_chars:
+            chunks.append(current)
+            current, size = [], 0
+        current.append((piece, separator))
+        size += len(piece) + len(separator)
+        if size >= max_chars // 2 and separator.count('\n') >= 2:
+            chunks.append(current)
+            current, size = [], 0
+    if current:
+        chunks.append(current)
+    return prefix, [(''.join(p + s for p, s in chunk[:-1]) + chunk[-1][0], chunk[-1][1]) for chunk in chunks]
+
+# ==== TRANSLATION MEMORY TEMPLATES ====
+
+# Variable spans masked out of texts so that strings differing only in them share one cached
+# template translation. Integers next to a word are left alone ("5 files"): the target grammar
+# (plural forms) can depend on the value. Decimals stay literal so upstream formats them per locale.
+_VARIABLE_SPAN = re.compile(
+    r'(?P<URL>https?://[^\s<>"\']*[^\s<>"\'.,;:!?)\]])'
+    r'|(?P<EMAIL>[\w.+-]+@[\w-]+(?:\.[\w-]+)+)'
+    r'|(?P<NUM>(?<=#)\d+\b|(?<![\w.,/:#-])\d+(?![\w]|[.,:/]\d)(?!\s+[^\W\d_]))'
+)
+_PLACEHOLDER = re.compile(r'\{\{(URL|EMAIL|NUM)_(\d+)\}\}')
+
+def mask_placeholders(text: str) -> Tuple[str, Optional[Dict[str, str]]]:
+    """Replace variable spans with typed placeholders: ('Order {{NUM_1}} for {{EMAIL_1}}', {placeholder: value})"""
+    if not TRANSLATION_MEMORY or '{{' in text:
+        return text, None
+    values = {}
+    counts = defaultdict(int)
+    
+    def placeholder(match):
+        kind = match.lastgroup
+        counts[kind] += 1
+        token = f'{{{{{kind}_{counts[kind]}}}}}'
+        values[token] = match.group()
+        return token
+    
+    template = _VARIABLE_SPAN.sub(placeholder, text)
+    return (template, values) if values else (text, None)
+
+def placeholders_intact(template: str, translation: str) -> bool:
+    """Whether a template's translation kept exactly the template's placeholders (only then is it worth caching)"""
+    return sorted(m.group() for m in _PLACEHOLDER.finditer(translation)) == \
+        sorted(m.group() for m in _PLACEHOLDER.finditer(template))
+
+def fill_placeholders(translation: str, values: Dict[str, str]) -> Optional[str]:
+    """Put the values back into a translated template; None if the placeholders didn't survive intact"""
+    found = [match.group() for match in _PLACEHOLDER.finditer(translation)]
+    if sorted(found) != sorted(values):
+        return None
+    return _PLACEHOLDER.sub(lambda match: values[match.group()], translation)
+
+# ==== ENHANCED TRANSLATION PIPELINE COMPONENTS ====
+
+class PriorityCacheManager:
+    """Manages priority-based caching for critical translation messages"""
+    
+    def __init__(self):
+        self._executor = None
+        self._executor_pid = None
+        self.cache_lock = threading.Lock()
+        self._refresh_pid = None
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Background executor, created lazily in the process that uses it (fork-safe)"""
+        with self.cache_lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=PRIORITY_POPULATE_WORKERS)
+                self._executor_pid = os.getpid()
+            return self._executor
+    
+    def reset_after_fork(self):
+        """Drop thread pool and lock state inherited from the parent process"""
+        self.cache_lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        # The parent's refresh thread does not exist in this process
+        self._refresh_pid = None
+    
+    def get_critical_messages(self) -> Dict[str, str]:
+        """Critical messages that need instant translation"""
+        return {
+            "welcome": "Welcome to TranslateAll API!",
+            "error_general": "An error occurred. Please try again.",
+            "success_general": "Translation completed successfully.",
+            "rate_limit": "Rate limit exceeded. Please try again later.",
+            "invalid_key": "Invalid API key provided.",
+            "quota_exceeded": "Translation quota exceeded.",
+            "network_error": "Network connection error.",
+            "processing": "Processing your translation...",
+            "completed": "Translation completed!",
+            "failed": "Translation failed. Please try again.",
+            "timeout": "Translation timeout. Please try again.",
+            "service_unavailable": "Service temporarily unavailable.",
+            "invalid_text": "Invalid text provided for translation.",
+            "language_not_supported": "Language not supported.",
+            "text_too_long": "Text too long for translation."
+        }
+    
+    def get_common_responses(self) -> Dict[str, str]:
+        """Common responses for priority 2 caching"""
+        return {
+            "hello": "Hello",
+            "goodbye": "Goodbye",
+            "thank_you": "Thank you",
+            "please": "Please",
+            "yes": "Yes",
+            "no": "No",
+            "help": "Help",
+            "cancel": "Cancel",
+            "confirm": "Confirm",
+            "save": "Save",
+            "delete": "Delete",
+            "edit": "Edit",
+            "search": "Search",
+            "filter": "Filter",
+            "sort": "Sort",
+            "loading": "Loading...",
+            "waiting": "Please wait...",
+            "done": "Done",
+            "continue": "Continue",
+            "back": "Back",
+            "next": "Next",
+            "previous": "Previous",
+            "home": "Home",
+            "settings": "Settings",
+            "profile": "Profile",
+            "logout": "Logout",
+            "login": "Login",
+            "register": "Register",
+            "forgot_password": "Forgot Password",
+            "reset_password": "Reset Password",
+            "change_password": "Change Password"
+        }
+    
+    def get_priority_tiers(self, target_lang: Optional[str] = None) -> Dict[int, Dict[str, str]]:
+        """Messages to warm per priority level; with a language, includes its learned hot phrases (level 3)"""
+        tiers = {1: self.get_critical_messages(), 2: self.get_common_responses()}
+        if target_lang:
+            hot = self.get_hot_phrases(target_lang)
+            if hot:
+                tiers[3] = hot
+        return tiers
+    
+    def get_hot_phrases(self, target_lang: str) -> Dict[str, str]:
+        """Promoted hot phrases for a language: {cache_key: text}"""
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        c.execute('SELECT cache_key, source_text FROM hot_phrases WHERE target_lang=? AND promoted_at IS NOT NULL',
+                  (target_lang,))
+        rows = c.fetchall()
+        conn.close()
+        return dict(rows)
+    
+    def populate_priority_cache(self, target_lang: str) -> str:
+        """Populate priority cache in background, unless it is fresh or another worker is already on it"""
+        if not self._claim(target_lang):
+            return self.get_populate_status(target_lang)
+        
+        self.executor.submit(self._populate, target_lang)
+        return "started"
+    
+    def populate_languages(self, target_langs: List[str]) -> Dict[str, str]:
+        """Warm several languages at once; they run in parallel, paced by the upstream scheduler"""
+        return {lang: self.populate_priority_cache(lang) for lang in target_langs}
+    
+    def _claim(self, target_lang: str) -> bool:
+        """Atomically mark a language as being populated by this process; False if it is fresh or taken"""
+        now = time.time()
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        c.execute('''INSERT INTO priority_cache_state (target_lang, status, worker, started_at)
+                     VALUES (?, 'started', ?, ?)
+                     ON CONFLICT (target_lang) DO UPDATE SET status='started', error=NULL,
+                         worker=excluded.worker, started_at=excluded.started_at
+                     WHERE NOT (status='started' AND started_at >= ?)
+                       AND NOT (status='completed' AND refresh_at > ?)''',
+                  (target_lang, str(os.getpid()), now, now - PRIORITY_POPULATE_STALE_SECONDS, now))
+        claimed = c.rowcount == 1
+        conn.commit()
+        conn.close()
+        return claimed
+    
+    def _set_state(self, target_lang: str, status: str, refresh_at: float, error: Optional[str] = None):
+        conn = sqlite3.connect('api_keys.db')
+        conn.execute('''UPDATE priority_cache_state SET status=?, error=?, completed_at=?, refresh_at=?
+                        WHERE target_lang=?''', (status, error, time.time(), refresh_at, target_lang))
+        conn.commit()
+        conn.close()
+    
+    def _next_refresh(self) -> float:
+        """Shortly before the new entries expire, jittered so languages don't all renew together"""
+        lead = min(PRIORITY_REFRESH_LEAD_HOURS, CACHE_EXPIRY_HOURS / 2) * 3600
+        return time.time() + CACHE_EXPIRY_HOURS * 3600 - lead - random.uniform(0, PRIORITY_REFRESH_JITTER)
+    
+    def get_populate_status(self, target_lang: str) -> str:
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        c.execute('SELECT status, error FROM priority_cache_state WHERE target_lang=?', (target_lang,))
+        row = c.fetchone()
+        conn.close()
+        if not row:
+            return 'not_started'
+        status, error = row
+        return f"{status}: {error}" if status in ('failed', 'partial') else status
+    
+    def refresh_due(self) -> List[str]:
+        """Re-populate every language whose refresh time has come (or whose populating worker died)"""
+        now = time.time()
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        c.execute('''SELECT target_lang FROM priority_cache_state
+                     WHERE (status IN ('completed', 'partial', 'failed') AND refresh_at <= ?)
+                        OR (status='started' AND started_at < ?)''', (now, now - PRIORITY_POPULATE_STALE_SECONDS))
+        due = [row[0] for row in c.fetchall()]
+        conn.close()
+        return [lang for lang in due if self.populate_priority_cache(lang) == "started"]
+    
+    def start_refresh_scheduler(self):
+        """Run refresh_due periodically in a daemon thread, once per process"""
+        with self.cache_lock:
+            if self._refresh_pid == os.getpid():
+                return
+            self._refresh_pid = os.getpid()
+        
+        def run():
+            while True:
+                time.sleep(PRIORITY_REFRESH_INTERVAL * random.uniform(0.8, 1.2))
+                try:
+                    refreshed = self.refresh_due()
+                    if refreshed:
+                        print(f"🔄 Refreshing priority cache for {', '.join(refreshed)}")
+                except Exception as e:
+                    print(f"⚠️  Priority cache refresh check failed: {e}")
+        
+        threading.Thread(target=run, name='priority-cache-refresh', daemon=True).start()
+    
+    def _populate(self, target_lang: str):
+        """One upstream call per priority tier, then a single bulk write for the language"""
+        try:
+            expires_at = datetime.now(timezone.utc) + timedelta(hours=CACHE_EXPIRY_HOURS)
+            rows = []
+            failed = []
+            for priority, messages in self.get_priority_tiers(target_lang).items():
+                translations = self._translate_upstream(list(messages.values()), target_lang)
+                if translations is None:
+                    failed.append(priority)
+                    continue
+                rows.extend((key, target_lang, translation, priority, expires_at)
+                            for key, translation in zip(messages, translations))
+            
+            if rows:
+                self._store(rows)
+            if not failed:
+                self._set_state(target_lang, "completed", self._next_refresh())
+            elif rows:
+                # Keep what was translated, but retry the missing tiers soon rather than at the next refresh
+                self._set_state(target_lang, "partial", time.time() + PRIORITY_REFRESH_RETRY,
+                                f"priority {', '.join(map(str, failed))} not translated")
+            else:
+                self._set_state(target_lang, "failed", time.time() + PRIORITY_REFRESH_RETRY, "no translations")
+            
+        except Exception as e:
+            self._set_state(target_lang, "failed", time.time() + PRIORITY_REFRESH_RETRY, str(e))
+    
+    def _store(self, rows: List[Tuple[str, str, str, int, datetime]]):
+        """Bulk write (cache_key, target_lang, translation, priority, expires_at) rows"""
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        # Upsert so a refresh keeps the usage counters
+        c.executemany('''INSERT INTO priority_cache 
+                         (cache_key, target_lang, translation, priority, expires_at) 
+                         VALUES (?, ?, ?, ?, ?)
+                         ON CONFLICT (cache_key, target_lang) DO UPDATE SET
+                             translation=excluded.translation, priority=excluded.priority,
+                             expires_at=excluded.expires_at''', rows)
+        conn.commit()
+        conn.close()
+    
+    def warm_hot_phrases(self, target_lang: str, phrases: Dict[str, str]) -> bool:
+        """
+        Put newly promoted phrases ({cache_key: text}) into the priority cache. They were just requested
+        many times, so most are copied from the regular translation cache; only the rest go upstream.
+        """
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(hours=CACHE_EXPIRY_HOURS)
+        by_hash = {key.split(':', 1)[1]: key for key in phrases}
+        
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        c.execute(f'''SELECT text_hash, translation FROM translation_cache
+                      WHERE target_lang=? AND text_hash IN ({','.join('?' * len(by_hash))}) AND expires_at > ?''',
+                  (target_lang, *by_hash, now))
+        rows = [(by_hash[text_hash], target_lang, translation, 3, expires_at) for text_hash, translation in c.fetchall()]
+        conn.close()
+        
+        found = {row[0] for row in rows}
+        missing = {key: text for key, text in phrases.items() if key not in found}
+        if missing:
+            translations = self._translate_upstream(list(missing.values()), target_lang)
+            if translations is not None:
+                rows.extend((key, target_lang, translation, 3, expires_at)
+                            for key, translation in zip(missing, translations))
+        
+        if rows:
+            self._store(rows)
+        return len(rows) == len(phrases)
+    
+    def _translate_upstream(self, texts: List[str], target_lang: str) -> Optional[List[str]]:
+        """Translate one priority tier through the backend chain in a single request"""
+        if not translation_backends.is_configured():
+            print("❌ No translation backend configured")
+            return None
+            
+        try:
+            upstream_quota.check(UpstreamScheduler.BACKGROUND)
+            upstream_scheduler.acquire(UpstreamScheduler.BACKGROUND, 'priority-cache')
+            translations, backend = translation_backends.translate_batch(texts, target_lang)
+            if not translation_backends.is_cacheable(backend):
+                print(f"⚠️  Not storing {backend} output in the priority cache")
+                return None
+            return translations
+        
+        except QuotaExhaustedError as e:
+            print(f"⚠️  Skipping priority cache warm-up: {e}")
+            return None
+            
+        except DeepLError as e:
+            if e.status_code == 403:
+                print(f"❌ DeepL API 403 Forbidden - Check your API key and quota")
+                print(f"   Response: {e.message}")
+            elif e.status_code == 456:
+                print(f"❌ DeepL API 456 Quota Exceeded")
+            else:
+                print(f"❌ DeepL API error {e.status_code}: {e.message}")
+            return None
+            
+        except Exception as e:
+            print(f"DeepL translation error: {e}")
+            return None
+    
+    def get_cached_translation(self, key: str, target_lang: str) -> Optional[Tuple[str, bool]]:
+        """
+        Get cached translation for a priority message as (translation, stale).
+        Expired entries are served within CACHE_STALE_GRACE_HOURS and re-populate the language.
+        """
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        
+        # Check if cache is still valid (or stale within the grace window)
+        now = datetime.now(timezone.utc)
+        c.execute('''SELECT translation, expires_at <= ? FROM priority_cache 
+                     WHERE cache_key=? AND target_lang=? AND expires_at > ?''', 
+                 (now, key, target_lang, now - timedelta(hours=CACHE_STALE_GRACE_HOURS)))
+        result = c.fetchone()
+        
+        if result:
+            # Update usage counter
+            c.execute('UPDATE priority_cache SET uses = uses + 1 WHERE cache_key=? AND target_lang=?',
+                     (key, target_lang))
+            conn.commit()
+        
+        conn.close()
+        if not result:
+            return None
+        if result[1]:
+            self.populate_priority_cache(target_lang)
+        return result[0], bool(result[1])
+    
+    def get_cached_translations(self, keys: List[str], target_langs: List[str]) -> Dict[Tuple[str, str], Tuple[str, bool]]:
+        """Bulk lookup of priority messages: {(key, target_lang): (translation, stale)} for every servable entry"""
+        if not keys or not target_langs:
+            return {}
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        
+        now = datetime.now(timezone.utc)
+        c.execute(f'''SELECT cache_key, target_lang, translation, expires_at <= ? FROM priority_cache
+                      WHERE cache_key IN ({','.join('?' * len(keys))})
+                      AND target_lang IN ({','.join('?' * len(target_langs))}) AND expires_at > ?''',
+                  (now, *keys, *target_langs, now - timedelta(hours=CACHE_STALE_GRACE_HOURS)))
+        rows = c.fetchall()
+        
+        if rows:
+            c.executemany('UPDATE priority_cache SET uses = uses + 1 WHERE cache_key=? AND target_lang=?',
+                          [(key, lang) for key, lang, _, _ in rows])
+            conn.commit()
+        
+        conn.close()
+        for lang in {lang for _, lang, _, stale in rows if stale}:
+            self.populate_priority_cache(lang)
+        return {(key, lang): (translation, bool(stale)) for key, lang, translation, stale in rows}
+    
+    def get_cache_status(self, target_lang: str) -> Dict[str, any]:
+        """Get cache status for a language"""
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        
+        c.execute('SELECT priority, COUNT(*) FROM priority_cache WHERE target_lang=? GROUP BY priority',
+                 (target_lang,))
+        priority_counts = dict(c.fetchall())
+        
+        c.execute('SELECT COUNT(*) FROM priority_cache WHERE target_lang=?', (target_lang,))
+        total_cached = c.fetchone()[0]
+        
+        conn.close()
+        
+        return {
+            'language': target_lang,
+            'total_cached': total_cached,
+            'priority_1': priority_counts.get(1, 0),
+            'priority_2': priority_counts.get(2, 0),
+            'hot': priority_counts.get(3, 0),
+            'populate_status': self.get_populate_status(target_lang),
+            # Ready once every built-in message is cached, not just some of them
+            'cache_ready': priority_counts.get(1, 0) >= len(self.get_critical_messages())
+                           and priority_counts.get(2, 0) >= len(self.get_common_responses())
+        }
+
+class SpaceSavingSketch:
+    """
+    Space-Saving heavy hitters: approximate counts of the most frequent items in fixed memory.
+    Items are also grouped by count (stream summary), so the smallest counter is found in O(1).
+    """
+    
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts = {}   # item -> [count, overestimate]
+        self.buckets = {}  # count -> {item: None} in insertion order
+        self.min_count = 0
+    
+    def _link(self, item, count: int):
+        self.buckets.setdefault(count, {})[item] = None
+    
+    def _unlink(self, item, count: int):
+        bucket = self.buckets[count]
+        del bucket[item]
+        if not bucket:
+            del self.buckets[count]
+    
+    def add(self, item):
+        entry = self.counts.get(item)
+        if entry:
+            self._unlink(item, entry[0])
+            entry[0] += 1
+            self._link(item, entry[0])
+            if entry[0] - 1 == self.min_count and self.min_count not in self.buckets:
+                self.min_count += 1
+            return
+        if len(self.counts) < self.capacity:
+            self.counts[item] = [1, 0]
+            self._link(item, 1)
+            self.min_count = 1
+            return
+        # Full: the new item replaces the oldest smallest counter and inherits its count as error
+        floor = self.min_count
+        victim = next(iter(self.buckets[floor]))
+        self._unlink(victim, floor)
+        del self.counts[victim]
+        self.counts[item] = [floor + 1, floor]
+        self._link(item, floor + 1)
+        if floor not in self.buckets:
+            self.min_count = floor + 1
+    
+    def heavy_hitters(self, threshold: int) -> Dict[any, int]:
+        """Items seen at least threshold times for certain (count minus overestimate)"""
+        return {item: count - error for item, (count, error) in self.counts.items() if count - error >= threshold}
+    
+    def decay(self):
+        """Halve every counter so items that cool off fall out over a few windows"""
+        self.buckets = {}
+        for item in list(self.counts):
+            entry = self.counts[item]
+            entry[0] //= 2
+            entry[1] //= 2
+            if entry[0]:
+                self._link(item, entry[0])
+            else:
+                del self.counts[item]
+        self.min_count = min(self.buckets, default=0)
+
+class HotPhraseTracker:
+    """
+    Learns the most requested (text, language) pairs from live traffic and promotes them into
+    the priority cache (level 3). Each worker counts its own requests in a fixed-size sketch;
+    promotions live in the hot_phrases table so every worker serves them, and pairs that no
+    worker has seen hot for HOT_DEMOTE_SECONDS are demoted.
+    """
+    
+    def __init__(self, priority_cache: PriorityCacheManager):
+        self.priority_cache = priority_cache
+        self.promoted = set()  # cache keys with a hot priority entry in at least one language
+        self._reset_state()
+    
+    def _reset_state(self):
+        self.lock = threading.Lock()
+        self.sketch = SpaceSavingSketch(HOT_SKETCH_SIZE)
+        self.window_started = time.time()
+        self.synced_at = 0.0
+        self.maintaining = False
+        self.stats = defaultdict(int)
+    
+    def reset_after_fork(self):
+        # The promoted set is still valid in the child; only counters and locks start over
+        self._reset_state()
+    
+    @staticmethod
+    def key_for(text: str) -> str:
+        return 'hot:' + canonical.text_hash(text)
+    
+    def lookup_key(self, text: str) -> Optional[str]:
+        """Priority cache key for text if it is a promoted hot phrase"""
+        if not self.promoted or len(text) > HOT_MAX_TEXT_LENGTH:
+            return None
+        key = self.key_for(text)
+        return key if key in self.promoted else None
+    
+    def record(self, text: str, target_lang: str):
+        """Count one request; kicks off background maintenance when a sync or window is due"""
+        if len(text) > HOT_MAX_TEXT_LENGTH:
+            return
+        text = canonical.normalize_text(text)
+        now = time.time()
+        with self.lock:
+            self.sketch.add((text, target_lang))
+            if self.maintaining or now - self.synced_at < HOT_SYNC_SECONDS:
+                return
+            self.maintaining = True
+            hot = None
+            if now - self.window_started >= HOT_WINDOW_SECONDS:
+                hot = self.sketch.heavy_hitters(HOT_KEEP_COUNT)
+                self.sketch.decay()
+                self.window_started = now
+        self.priority_cache.executor.submit(self.maintain, hot)
+    
+    def maintain(self, hot: Optional[Dict[Tuple[str, str], int]] = None):
+        """Publish a finished window's hot pairs, demote cooled ones, warm new ones and reload the promoted set"""
+        try:
+            if hot is not None:
+                self._publish(hot)
+            self._warm_pending()
+            conn = sqlite3.connect('api_keys.db')
+            c = conn.cursor()
+            c.execute('SELECT DISTINCT cache_key FROM hot_phrases WHERE promoted_at IS NOT NULL')
+            self.promoted = {row[0] for row in c.fetchall()}
+            conn.close()
+        except Exception as e:
+            print(f"⚠️  Hot phrase maintenance failed: {e}")
+        finally:
+            with self.lock:
+                self.synced_at = time.time()
+                self.maintaining = False
+    
+    def _publish(self, hot: Dict[Tuple[str, str], int]):
+        now = time.time()
+        rows = [(self.key_for(text), lang, text, count, now) for (text, lang), count in hot.items()]
+        conn = sqlite3.connect('api_keys.db')
+        try:
+            c = conn.cursor()
+            # Take the write lock up front: this transaction reads before it deletes
+            c.execute('BEGIN IMMEDIATE')
+            
+            # Still hot here: keep promoted pairs alive; promote pairs that crossed the threshold
+            c.executemany('UPDATE hot_phrases SET hits=?, last_hot_at=? WHERE cache_key=? AND target_lang=?',
+                          [(count, now, key, lang) for key, lang, _, count, _ in rows])
+            c.executemany('''INSERT OR IGNORE INTO hot_phrases (cache_key, target_lang, source_text, hits, last_hot_at)
+                             VALUES (?, ?, ?, ?, ?)''', [row for row in rows if row[3] >= HOT_PROMOTE_COUNT])
+            
+            # Demote pairs that cooled off everywhere, then the least requested beyond the budget
+            c.execute('SELECT cache_key, target_lang FROM hot_phrases WHERE last_hot_at < ?', (now - HOT_DEMOTE_SECONDS,))
+            demoted = c.fetchall()
+            c.execute('''SELECT cache_key, target_lang FROM hot_phrases
+                         ORDER BY hits DESC, last_hot_at DESC LIMIT -1 OFFSET ?''', (HOT_MAX_PHRASES,))
+            demoted += c.fetchall()
+            c.executemany('DELETE FROM hot_phrases WHERE cache_key=? AND target_lang=?', demoted)
+            c.executemany('DELETE FROM priority_cache WHERE cache_key=? AND target_lang=?', demoted)
+            
+            conn.commit()
+        finally:
+            conn.close()
+        self.stats['demoted'] += len(set(demoted))
+    
+    def _warm_pending(self):
+        """Warm newly promoted pairs, grouped per language; each pair is claimed by exactly one worker"""
+        now = time.time()
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        c.execute('SELECT cache_key, target_lang, source_text FROM hot_phrases WHERE promoted_at IS NULL')
+        pending = defaultdict(dict)
+        for key, lang, text in c.fetchall():
+            c.execute('UPDATE hot_phrases SET promoted_at=? WHERE cache_key=? AND target_lang=? AND promoted_at IS NULL',
+                      (now, key, lang))
+            if c.rowcount == 1:
+                pending[lang][key] = text
+        conn.commit()
+        conn.close()
+        
+        for lang, phrases in pending.items():
+            if self.priority_cache.warm_hot_phrases(lang, phrases):
+                self.stats['promoted'] += len(phrases)
+                continue
+            # Not everything could be translated; release the claims so a later window retries
+            conn = sqlite3.connect('api_keys.db')
+            conn.executemany('''UPDATE hot_phrases SET promoted_at=NULL WHERE cache_key=? AND target_lang=?
+                                AND cache_key NOT IN (SELECT cache_key FROM priority_cache WHERE target_lang=?)''',
+                             [(key, lang, lang) for key in phrases])
+            conn.commit()
+            conn.close()
+    
+    def get_status(self) -> Dict[str, any]:
+        with self.lock:
+            top = sorted(self.sketch.counts.items(), key=lambda item: item[1][0], reverse=True)[:10]
+            return {
+                'tracked': len(self.sketch.counts),
+                'capacity': self.sketch.capacity,
+                'promoted': len(self.promoted),
+                'top': [{'text': text, 'target_lang': lang, 'count': count, 'error': error}
+                        for (text, lang), (count, error) in top],
+                'promotions': self.stats['promoted'],
+                'demotions': self.stats['demoted']
+            }
+
+class TranslationBatcher:
+    """Handles batch translation processing with rate limiting and smart IP-based DeepL call limiting"""
+    
+    def __init__(self, rate_limit: int = TRANSLATION_RATE_LIMIT):
+        self.rate_limit = rate_limit
+        self.batch_size = BATCH_SIZE
+        self.max_concurrency = max(1, min(BATCH_MAX_CONCURRENCY, rate_limit))
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Shared pool for batch cache misses, created lazily in the process that uses it (fork-safe)"""
+        with self._executor_lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=BATCH_FANOUT_WORKERS,
+                                                    thread_name_prefix='batch-fanout')
+                self._executor_pid = os.getpid()
+            return self._executor
+    
+    def reset_after_fork(self):
+        """Reset per-process executor state in a forked worker"""
+        self._executor_lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+    
+    def _schedule_for(self, request, api_key, endpoint_type: str, batch: bool = False) -> Tuple[int, str]:
+        """Scheduler priority class and fair-queuing flow (API key, or client IP for demo) for upstream calls"""
+        priority = UpstreamScheduler.classify(endpoint_type, batch)
+        if endpoint_type == 'paid' and api_key:
+            return priority, api_key
+        if request is not None:
+            return priority, ip_rate_limiter.get_client_ip(request) or endpoint_type
+        return priority, endpoint_type
+    
+    def _get_text_hash(self, text: str, source_lang: Optional[str] = None) -> str:
+        """Generate hash for text caching (of the canonical text, so whitespace variants share an entry)"""
+        return canonical.text_hash(text, source_lang)
+    
+    def _get_cached_translation(self, text: str, target_lang: str,
+                                source_lang: Optional[str] = None) -> Optional[Tuple[str, bool]]:
+        """
+        Check for cached translation, returned as (translation, stale). Entries past expiry are
+        still served within CACHE_STALE_GRACE_HOURS while one background refresh renews them.
+        """
+        text_hash = self._get_text_hash(text, source_lang)
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        
+        now = datetime.now(timezone.utc)
+        c.execute('''SELECT translation, expires_at <= ? FROM translation_cache 
+                     WHERE text_hash=? AND target_lang=? AND expires_at > ?''',
+                 (now, text_hash, target_lang, now - timedelta(hours=CACHE_STALE_GRACE_HOURS)))
+        result = c.fetchone()
+        
+        if result:
+            # Update usage counter
+            c.execute('UPDATE translation_cache SET uses = uses + 1 WHERE text_hash=? AND target_lang=?',
+                     (text_hash, target_lang))
+            conn.commit()
+        
+        conn.close()
+        if not result:
+            return None
+        if result[1]:
+            self._revalidate([text], target_lang, source_lang)
+        return result[0], bool(result[1])
+    
+    def _cache_translation(self, text: str, target_lang: str, translation: str):
+        """Cache translation result"""
+        self._cache_translations([(text, target_lang, translation)])
+    
+    def _get_cached_translations(self, texts: List[str], target_langs: List[str],
+                                 source_lang: Optional[str] = None) -> Dict[Tuple[str, str], Tuple[str, bool]]:
+        """Bulk cache lookup: {(text, target_lang): (translation, stale)} for every servable pair, in one query"""
+        hashes = defaultdict(list)
+        for text in dict.fromkeys(texts):
+            hashes[self._get_text_hash(text, source_lang)].append(text)
+        if not hashes or not target_langs:
+            return {}
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        
+        now = datetime.now(timezone.utc)
+        c.execute(f'''SELECT text_hash, target_lang, translation, expires_at <= ? FROM translation_cache
+                      WHERE text_hash IN ({','.join('?' * len(hashes))})
+                      AND target_lang IN ({','.join('?' * len(target_langs))}) AND expires_at > ?''',
+                  (now, *hashes, *target_langs, now - timedelta(hours=CACHE_STALE_GRACE_HOURS)))
+        rows = c.fetchall()
+        
+        if rows:
+            c.executemany('UPDATE translation_cache SET uses = uses + 1 WHERE text_hash=? AND target_lang=?',
+                          [(text_hash, lang) for text_hash, lang, _, _ in rows])
+            conn.commit()
+        
+        conn.close()
+        stale = defaultdict(list)
+        for text_hash, lang, _, is_stale in rows:
+            if is_stale:
+                stale[lang].append(hashes[text_hash][0])
+        for lang, stale_texts in stale.items():
+            self._revalidate(stale_texts, lang, source_lang)
+        return {(text, lang): (translation, bool(is_stale))
+                for text_hash, lang, translation, is_stale in rows for text in hashes[text_hash]}
+    
+    def _cache_translations(self, entries: List[Tuple[str, str, str]], source_lang: Optional[str] = None,
+                            backend: Optional[str] = None):
+        """Cache many (text, target_lang, translation) results in one transaction, unless a test-only backend served them"""
+        if backend and not translation_backends.is_cacheable(backend):
+            return
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=CACHE_EXPIRY_HOURS)
+        # Upsert so refreshes keep the usage counters and release the revalidation lease
+        c.executemany('''INSERT INTO translation_cache 
+                         (text_hash, source_text, target_lang, translation, expires_at) 
+                         VALUES (?, ?, ?, ?, ?)
+                         ON CONFLICT (text_hash, target_lang) DO UPDATE SET
+                             source_text=excluded.source_text, translation=excluded.translation,
+                             expires_at=excluded.expires_at, created_at=CURRENT_TIMESTAMP, revalidate_at=NULL''',
+                      [(self._get_text_hash(text, source_lang), canonical.normalize_text(text), lang, translation,
+                        expires_at) for text, lang, translation in entries])
+        
+        conn.commit()
+        conn.close()
+    
+    def _revalidate(self, texts: List[str], target_lang: str, source_lang: Optional[str] = None):
+        """Refresh stale entries in the background; a lease makes sure only one caller (in any worker) does it"""
+        now = time.time()
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        claimed = []
+        for text in texts:
+            c.execute('''UPDATE translation_cache SET revalidate_at=?
+                         WHERE text_hash=? AND target_lang=? AND (revalidate_at IS NULL OR revalidate_at < ?)''',
+                      (now, self._get_text_hash(text, source_lang), target_lang, now - CACHE_REVALIDATE_LEASE))
+            if c.rowcount == 1:
+                claimed.append(text)
+        conn.commit()
+        conn.close()
+        
+        if claimed:
+            self.executor.submit(self._refresh, claimed, target_lang, source_lang)
+    
+    def _refresh(self, texts: List[str], target_lang: str, source_lang: Optional[str] = None):
+        """Re-translate stale entries at background priority; on failure they are retried once the lease lapses"""
+        try:
+            upstream_quota.check(UpstreamScheduler.BACKGROUND)
+            admission_controller.admit(UpstreamScheduler.BACKGROUND)
+            upstream_scheduler.acquire(UpstreamScheduler.BACKGROUND, 'revalidate')
+            translations, backend = translation_backends.translate_batch(texts, target_lang, source_lang=source_lang)
+            self._cache_translations([(text, target_lang, translation) for text, translation in zip(texts, translations)],
+                                     source_lang, backend)
+        except Exception as e:
+            print(f"⚠️  Stale cache refresh failed for {len(texts)} {target_lang} entries: {e}")
+    
+    def translate_single(self, text: str, target_lang: str, request=None, api_key=None, endpoint_type='demo',
+                         deadline: Optional[Deadline] = None, source_lang: Optional[str] = None) -> Dict[str, any]:
+        """Translate single text with caching and rate limiting and DeepL IP call limiting
+        NOTE: request and api_key are only required for IP-based rate limiting.
+        """
+        start_time = time.time()
+        
+        # Check cache first
+        cached, upstream_text, values = self._lookup(text, target_lang, source_lang)
+        if cached:
+            return self._cached_result(cached[0], start_time, stale=cached[1])
+        
+        schedule = self._schedule_for(request, api_key, endpoint_type)
+        result = self._translate_uncached(upstream_text, target_lang, request, endpoint_type, start_time, deadline, schedule,
+                                          source_lang, template=bool(values))
+        filled = self._fill_result(result, values)
+        if filled is None:
+            # The template's placeholders didn't survive translation (so it wasn't cached); translate the
+            # text as-is. The IP limit already counted this text's call.
+            return self._translate_uncached(text, target_lang, None, endpoint_type, start_time, deadline, schedule,
+                                            source_lang)
+        return filled
+    
+    def _lookup(self, text: str, target_lang: str,
+                source_lang: Optional[str] = None) -> Tuple[Optional[Tuple[str, bool]], str, Optional[Dict[str, str]]]:
+        """
+        Cache lookup through the translation memory. Returns the hit as (translation, stale) or None,
+        the text to send upstream on a miss (the masked template when text has variable spans) and
+        the placeholder values to fill into its translation. Texts are canonicalized first, so
+        whitespace variants of one text also share a single upstream call.
+        """
+        text = canonical.normalize_text(text)
+        template, values = mask_placeholders(text)
+        if values:
+            cached = self._get_cached_translation(template, target_lang, source_lang)
+            if cached:
+                filled = fill_placeholders(cached[0], values)
+                if filled is not None:
+                    return (filled, cached[1]), template, values
+            else:
+                literal = self._get_cached_translation(text, target_lang, source_lang)
+                return literal, template, values
+        # No variable spans, or the cached template lost its placeholders
+        return self._get_cached_translation(text, target_lang, source_lang), text, None
+    
+    def _fill_result(self, result: Dict[str, any], values: Optional[Dict[str, str]]) -> Optional[Dict[str, any]]:
+        """Result for one text from its template's result; None if the placeholders didn't survive"""
+        if not values or not result.get('success'):
+            return result
+        filled = fill_placeholders(result['translation'], values)
+        return dict(result, translation=filled) if filled is not None else None
+    
+    def _translate_uncached(self, text: str, target_lang: str, request, endpoint_type: str, start_time: float,
+                            deadline: Optional[Deadline] = None, schedule: Tuple[int, str] = None,
+                            source_lang: Optional[str] = None, template: bool = False) -> Dict[str, any]:
+        """Upstream half of translate_single, for texts already known to miss the cache"""
+        translations, backend, error = self._fetch_upstream([text], target_lang, request, endpoint_type, start_time,
+                                                            deadline, schedule, source_lang, template)
+        if error:
+            return error
+        return self._translated_result(translations[0], start_time, backend)
+    
+    def _fetch_upstream(self, texts: List[str], target_lang: str, request, endpoint_type: str, start_time: float,
+                        deadline: Optional[Deadline] = None, schedule: Tuple[int, str] = None,
+                        source_lang: Optional[str] = None, template: bool = False
+                        ) -> Tuple[Optional[List[str]], Optional[str], Optional[Dict[str, any]]]:
+        """
+        Translate cache misses in one upstream call and cache them (templates only if their placeholders
+        survived). Returns (translations, backend, None), or (None, None, error result) when the call is
+        refused or fails.
+        """
+        # Work queued past its deadline is abandoned, not sent upstream
+        if deadline is not None and deadline.expired():
+            return None, None, self._deadline_result(start_time)
+        
+        # Misses fail fast when the upstream quota can't (or shouldn't) be spent on them
+        schedule = schedule or self._schedule_for(request, None, endpoint_type)
+        try:
+            upstream_quota.check(schedule[0])
+            admission_controller.admit(schedule[0])
+        except (QuotaExhaustedError, UpstreamOverloadedError) as e:
+            return None, None, self._upstream_error_result(e, start_time)
+        
+        # Only if NOT cached, we check IP DeepL call limits
         if request:
             allowed, remaining, reset_times = ip_rate_limiter.check_and_update_rate_limit(
                 request, endpoint_type, increment=True
             )
             if not allowed:
-                return {
-                    'success': False,
-                    'error': f"Rate limit exceeded for DeepL API calls from your IP. Limit resets at: {reset_times}",
-                    'ip_rate_limit': {
-                        'allowed': False,
-                        'remaining': remaining,
-                        'reset_times': reset_times,
-                        'limits': IP_RATE_LIMITS.get(endpoint_type, IP_RATE_LIMITS['demo'])
-                    },
-                    'cached': False,
-                    'response_time': time.time() - start_time
-                }
+                return None, None, self._ip_limited_result(remaining, reset_times, endpoint_type, start_time)
+        
+        # Translate with DeepL
+        try:
+            # Wait for an upstream slot in priority order (per-process rate limit)
+            upstream_scheduler.acquire(*schedule, deadline=deadline)
+            
+            translations, backend = translation_backends.translate_batch(texts, target_lang, deadline=deadline,
+                                                                         source_lang=source_lang)
+            
+            # Cache the result
+            self._cache_translations([(text, target_lang, translation) for text, translation in zip(texts, translations)
+                                      if not template or placeholders_intact(text, translation)],
+                                     source_lang, backend)
+            
+            return translations, backend, None
+            
+        except Exception as e:
+            return None, None, self._upstream_error_result(e, start_time)
+    
+    def _lookup_segments(self, text: str, target_lang: str, source_lang: Optional[str] = None,
+                         max_chars: Optional[int] = None):
+        """Split text (into sentences, or chunks of at most max_chars) and look up the whole text and every part in one query"""
+        prefix, segments = split_chunks(text, max_chars, source_lang) if max_chars else split_segments(text, source_lang)
+        unique = list(dict.fromkeys(segment for segment, _ in segments))
+        cached = self._get_cached_translations([text] + unique, [target_lang], source_lang)
+        return prefix, segments, unique, {segment: hit[0] for (segment, _), hit in cached.items()}
+    
+    def _segmented_result(self, prefix: str, segments: List[Tuple[str, str]], unique: List[str],
+                          translations: Dict[str, str], missing: List[str], start_time: float,
+                          backend: Optional[str] = None) -> Dict[str, any]:
+        return {
+            'success': True,
+            'translation': join_segments(prefix, segments, translations),
+            'cached': not missing,
+            'backend': backend,
+            'segments': {'total': len(unique), 'cached': len(unique) - len(missing)},
+            'response_time': time.time() - start_time
+        }
+    
+    def translate_segmented(self, text: str, target_lang: str, request=None, api_key=None, endpoint_type='demo',
+                            deadline: Optional[Deadline] = None, source_lang: Optional[str] = None) -> Dict[str, any]:
+        """
+        Translate a long text sentence by sentence: each segment is looked up in the cache and only the
+        missing ones go upstream, in calls of up to UPSTREAM_BATCH_TEXTS segments. Whitespace between
+        segments is kept as-is. A text cached whole (translated without segmentation earlier) is served
+        directly. The text counts as one DeepL call for IP rate limiting.
+        """
+        start_time = time.time()
+        prefix, segments, unique, translations = self._lookup_segments(text, target_lang, source_lang)
+        if text in translations:
+            return self._cached_result(translations[text], start_time)
+        
+        missing = [segment for segment in unique if segment not in translations]
+        backend = None
+        schedule = self._schedule_for(request, api_key, endpoint_type)
+        for i in range(0, len(missing), UPSTREAM_BATCH_TEXTS):
+            group = missing[i:i + UPSTREAM_BATCH_TEXTS]
+            fetched, backend, error = self._fetch_upstream(group, target_lang, request if i == 0 else None, endpoint_type,
+                                                           start_time, deadline, schedule, source_lang)
+            if error:
+                return error
+            translations.update(zip(group, fetched))
+        return self._segmented_result(prefix, segments, unique, translations, missing, start_time, backend)
+    
+    def translate_chunked(self, text: str, target_lang: str, request=None, api_key=None, endpoint_type='demo',
+                          deadline: Optional[Deadline] = None, source_lang: Optional[str] = None) -> Dict[str, any]:
+        """
+        Translate an oversized text as chunks of at most CHUNK_MAX_CHARS, split at paragraph and sentence
+        boundaries. Every chunk is cached on its own; the missing ones go upstream in parallel (up to the
+        batch concurrency cap, paced by the scheduler) and a chunk that fails transiently is retried alone.
+        The whole text counts as one DeepL call for IP rate limiting.
+        """
+        start_time = time.time()
+        deadline = deadline or Deadline(REQUEST_DEADLINES['translate'], start_time)
+        prefix, chunks, unique, translations = self._lookup_segments(text, target_lang, source_lang, CHUNK_MAX_CHARS)
+        if text in translations:
+            return self._cached_result(translations[text], start_time)
+        
+        missing = [chunk for chunk in unique if chunk not in translations]
+        results = {}
+        if missing:
+            if hasattr(request, '_get_current_object'):
+                request = request._get_current_object()
+            if request:
+                allowed, remaining, reset_times = ip_rate_limiter.check_and_update_rate_limit(
+                    request, endpoint_type, increment=True
+                )
+                if not allowed:
+                    return self._ip_limited_result(remaining, reset_times, endpoint_type, start_time)
+            
+            schedule = self._schedule_for(request, api_key, endpoint_type)
+            pending_chunks = list(missing)
+            in_flight = {}
+            try:
+                while pending_chunks or in_flight:
+                    while pending_chunks and len(in_flight) < self.max_concurrency:
+                        chunk = pending_chunks.pop(0)
+                        future = self.executor.submit(self._translate_chunk, chunk, target_lang, start_time, deadline,
+                                                      schedule, source_lang)
+                        in_flight[future] = chunk
+                    
+                    remaining = deadline.remaining()
+                    if remaining <= 0:
+                        break
+                    done, _ = wait(in_flight, timeout=remaining, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        chunk = in_flight.pop(future)
+                        try:
+                            results[chunk] = future.result()
+                        except Exception as e:
+                            results[chunk] = self._upstream_error_result(e, start_time)
+            finally:
+                for future in in_flight:
+                    future.cancel()
+        return self._chunked_result(prefix, chunks, unique, translations, missing, results, start_time)
+    
+    def _translate_chunk(self, chunk: str, target_lang: str, start_time: float, deadline: Deadline,
+                         schedule: Tuple[int, str], source_lang: Optional[str] = None) -> Dict[str, any]:
+        """One upstream call for one chunk of an oversized text, retried with backoff up to CHUNK_MAX_ATTEMPTS times"""
+        for attempt in range(1, CHUNK_MAX_ATTEMPTS + 1):
+            try:
+                deadline.check()
+                upstream_quota.check(schedule[0])
+                admission_controller.admit(schedule[0])
+                upstream_scheduler.acquire(*schedule, deadline=deadline)
+                translations, backend = translation_backends.translate_batch([chunk], target_lang, deadline=deadline,
+                                                                             source_lang=source_lang)
+            except Exception as e:
+                delay = self._chunk_retry_delay(e, attempt, deadline)
+                if delay is None:
+                    return self._upstream_error_result(e, start_time)
+                time.sleep(delay)
+                continue
+            self._cache_translations([(chunk, target_lang, translations[0])], source_lang, backend)
+            return self._translated_result(translations[0], start_time, backend)
+    
+    @staticmethod
+    def _chunk_retryable(error: Exception) -> bool:
+        """Failures another attempt at the same chunk could fix (not spent budgets, open circuits or bad requests)"""
+        if isinstance(error, (DeadlineExceededError, QuotaExhaustedError, UpstreamOverloadedError, UpstreamUnavailableError)):
+            return False
+        if isinstance(error, DeepLError):
+            return error.status_code in UpstreamRetryPolicy.RETRYABLE_STATUS_CODES
+        return True
+    
+    def _chunk_retry_delay(self, error: Exception, attempt: int, deadline: Deadline) -> Optional[float]:
+        """Backoff before retrying a failed chunk, or None if it should not be retried (or would miss the deadline)"""
+        if attempt >= CHUNK_MAX_ATTEMPTS or not self._chunk_retryable(error):
+            return None
+        delay = upstream_retry_policy.backoff(attempt, getattr(error, 'retry_after', None))
+        return delay if delay < deadline.remaining() else None
+    
+    def _chunked_result(self, prefix: str, chunks: List[Tuple[str, str]], unique: List[str], translations: Dict[str, str],
+                        missing: List[str], results: Dict[str, Dict[str, any]], start_time: float) -> Dict[str, any]:
+        """Stitch the chunk translations back in order, or report each chunk that failed"""
+        backend = None
+        for chunk, result in results.items():
+            if result.get('success'):
+                translations[chunk] = result['translation']
+                backend = backend or result.get('backend')
+        summary = {'total': len(unique), 'cached': len(unique) - len(missing)}
+        # Indexes are positions in the text, so a chunk repeated in it is reported at every position
+        failed = [(i, results.get(chunk) or self._deadline_result(start_time))
+                  for i, (chunk, _) in enumerate(chunks) if chunk not in translations]
+        if failed:
+            # Translated chunks are cached, so retrying the request only sends the failed ones upstream
+            first = failed[0][1]
+            summary['failed'] = [{'index': i, 'error': result.get('error')} for i, result in failed]
+            return dict(first, error=f"{len(failed)} of {len(chunks)} chunks failed: {first.get('error')}",
+                        chunks=summary, response_time=time.time() - start_time)
+        return {
+            'success': True,
+            'translation': join_segments(prefix, chunks, translations),
+            'cached': not missing,
+            'backend': backend,
+            'chunks': summary,
+            'response_time': time.time() - start_time
+        }
+    
+    def _cached_result(self, translation: str, start_time: float, stale: bool = False) -> Dict[str, any]:
+        return {
+            'success': True,
+            'translation': translation,
+            'cached': True,
+            'fresh': not stale,
+            'response_time': time.time() - start_time
+        }
+    
+    def _translated_result(self, translation: str, start_time: float, backend: Optional[str] = None) -> Dict[str, any]:
+        return {
+            'success': True,
+            'translation': translation,
+            'cached': False,
+            'backend': backend,
+            'response_time': time.time() - start_time
+        }
+    
+    def _upstream_error_result(self, error: Exception, start_time: float) -> Dict[str, any]:
+        if isinstance(error, DeadlineExceededError):
+            return self._deadline_result(start_time)
+        if isinstance(error, QuotaExhaustedError):
+            return {
+                'success': False,
+                'error': str(error),
+                'degraded': True,
+                'quota_mode': upstream_quota.mode(),
+                'response_time': time.time() - start_time
+            }
+        if isinstance(error, UpstreamOverloadedError):
+            return {
+                'success': False,
+                'error': str(error),
+                'overloaded': True,
+                'retry_after': error.retry_after,
+                'response_time': time.time() - start_time
+            }
+        if isinstance(error, UpstreamUnavailableError):
+            return {
+                'success': False,
+                'error': str(error),
+                'circuit_open': True,
+                'retry_after': error.retry_after,
+                'response_time': time.time() - start_time
+            }
+        if isinstance(error, DeepLError):
+            message = str(error)
+        else:
+            message = f'Translation error: {str(error)}'
+        return {
+            'success': False,
+            'error': message,
+            'response_time': time.time() - start_time
+        }
+    
+    def _ip_limited_result(self, remaining: dict, reset_times: dict, endpoint_type: str, start_time: float) -> Dict[str, any]:
+        return {
+            'success': False,
+            'error': f"Rate limit exceeded for DeepL API calls from your IP. Limit resets at: {reset_times}",
+            'ip_rate_limit': {
+                'allowed': False,
+                'remaining': remaining,
+                'reset_times': reset_times,
+                'limits': IP_RATE_LIMITS.get(endpoint_type, IP_RATE_LIMITS['demo'])
+            },
+            'cached': False,
+            'response_time': time.time() - start_time
+        }
+    
+    def _deadline_result(self, start_time: float) -> Dict[str, any]:
+        return {
+            'success': False,
+            'error': 'Deadline exceeded',
+            'deadline_exceeded': True,
+            'cached': False,
+            'response_time': time.time() - start_time
+        }
+    
+    def _collect_misses(self, texts: List[str], target_lang: str, results: List,
+                        start_time: float) -> Dict[str, List[Tuple[int, Optional[Dict[str, str]]]]]:
+        """
+        Fill cache hits into results; return each distinct text to send upstream (a template shared by a
+        family of texts, or a literal text) with the (index, placeholder values) pairs it will serve
+        """
+        misses = {}
+        for i, text in enumerate(texts):
+            cached, upstream_text, values = self._lookup(text, target_lang)
+            if cached:
+                results[i] = self._cached_result(cached[0], start_time, stale=cached[1])
+            else:
+                misses.setdefault(upstream_text, []).append((i, values))
+        return misses
+    
+    def _resolve_misses(self, members: List[Tuple[int, Optional[Dict[str, str]]]],
+                        result: Dict[str, any]) -> Tuple[List[Tuple[int, Dict[str, any]]], List[int]]:
+        """Fan one upstream result out to the texts sharing it: (index, result) pairs, and indices needing a literal retry"""
+        resolved, literal = [], []
+        for i, values in members:
+            filled = self._fill_result(result, values)
+            if filled is None:
+                literal.append(i)
+            else:
+                resolved.append((i, filled))
+        return resolved, literal
+    
+    def translate_batch(self, texts: List[str], target_lang: str, request=None, api_key=None, endpoint_type='demo',
+                        deadline: Optional[Deadline] = None) -> List[Dict[str, any]]:
+        """
+        Translate multiple texts in batch, honoring IP rate limits for actual API calls only.
+        Results keep input order; texts still pending at the batch deadline get a per-text
+        'deadline exceeded' error.
+        """
+        results = [None] * len(texts)
+        for i, result in self.iter_batch(texts, target_lang, request, api_key, endpoint_type, deadline):
+            results[i] = result
+        return results
+    
+    def iter_batch(self, texts: List[str], target_lang: str, request=None, api_key=None, endpoint_type='demo',
+                   deadline: Optional[Deadline] = None) -> Iterator[Tuple[int, Dict[str, any]]]:
+        """
+        Yield (index, result) for every text as soon as it resolves: cache hits first, then cache
+        misses in completion order. Misses are fanned out to a bounded worker pool; texts still
+        pending at the deadline are yielded last with a 'deadline exceeded' error.
+        """
+        start_time = time.time()
+        deadline = deadline or Deadline(BATCH_DEADLINE_SECONDS, start_time)
+        
+        misses = {}
+        for i, text in enumerate(texts):
+            cached, upstream_text, values = self._lookup(text, target_lang)
+            if cached:
+                yield i, self._cached_result(cached[0], start_time, stale=cached[1])
+            else:
+                misses.setdefault(upstream_text, []).append((i, values))
         
-        # Apply synthetic rate limiting guard (simple per-process)
-        self._rate_limit_check()
+        if not misses:
+            return
         
-        # Translate with DeepL
+        # Worker threads can't see Flask's request context, so hand them the real request object
+        if hasattr(request, '_get_current_object'):
+            request = request._get_current_object()
+        schedule = self._schedule_for(request, api_key, endpoint_type, batch=True)
+        
+        pending_texts = list(misses)
+        retries = set()  # literal retries of damaged templates; their IP call was already counted
+        in_flight = {}
         try:
-            resp = requests.post(
-                'https://api.deepl.com/v2/translate',
-                headers={'Authorization': f'DeepL-Auth-Key {DEEPL_API_KEY}'},
-                data={'text': text, 'target_lang': target_lang},
-                timeout=10
-            )
-            
-            if resp.status_code == 200:
-                translation = resp.json()['translations'][0]['text']
-                
-                # Cache the result
-                self._cache_translation(text, target_lang, translation)
+            while pending_texts or in_flight:
+                while pending_texts and len(in_flight) < self.max_concurrency:
+                    text = pending_texts.pop(0)
+                    future = self.executor.submit(self._translate_uncached, text, target_lang,
+                                                  None if text in retries else request, endpoint_type, start_time,
+                                                  deadline, schedule, None, misses[text][0][1] is not None)
+                    in_flight[future] = text
                 
-                return {
-                    'success': True,
-                    'translation': translation,
-                    'cached': False,
-                    'response_time': time.time() - start_time
-                }
+                remaining = deadline.remaining()
+                if remaining <= 0:
+                    break
+                done, _ = wait(in_flight, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    text = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = self._upstream_error_result(e, start_time)
+                    resolved, literal = self._resolve_misses(misses.pop(text), result)
+                    yield from resolved
+                    for i in literal:
+                        if texts[i] not in misses:
+                            pending_texts.append(texts[i])
+                            retries.add(texts[i])
+                        misses.setdefault(texts[i], []).append((i, None))
+        finally:
+            # Deadline passed (or the consumer went away): abandon work that hasn't started
+            for future in in_flight:
+                future.cancel()
+        
+        for members in misses.values():
+            for i, _ in members:
+                yield i, self._deadline_result(start_time)
+    
+    def translate_multi(self, texts: List[str], target_langs: List[str], request=None, api_key=None, endpoint_type='demo',
+                        deadline: Optional[Deadline] = None,
+                        resolved: Optional[Dict[Tuple[str, str], Dict[str, any]]] = None) -> Dict[str, List[Dict[str, any]]]:
+        """
+        Translate every text into every target language: {target_lang: [result per text]}.
+        Cache hits for all pairs come from one bulk lookup; each language's misses then go upstream
+        in multi-text calls of up to UPSTREAM_BATCH_TEXTS texts, several at a time (up to the batch
+        concurrency cap). Pairs in resolved (e.g. priority cache hits) are used as-is. The whole
+        request counts as one DeepL call for IP rate limiting.
+        """
+        start_time = time.time()
+        deadline = deadline or Deadline(BATCH_DEADLINE_SECONDS, start_time)
+        resolved = dict(resolved or {})
+        
+        cached = self._get_cached_translations(texts, target_langs)
+        for pair, (translation, stale) in cached.items():
+            resolved.setdefault(pair, self._cached_result(translation, start_time, stale=stale))
+        
+        misses = {}
+        for lang in target_langs:
+            missing = [text for text in dict.fromkeys(texts) if (text, lang) not in resolved]
+            if missing:
+                misses[lang] = missing
+        
+        if misses:
+            if hasattr(request, '_get_current_object'):
+                request = request._get_current_object()
+            
+            ip_limited = None
+            if request:
+                allowed, remaining, reset_times = ip_rate_limiter.check_and_update_rate_limit(
+                    request, endpoint_type, increment=True
+                )
+                if not allowed:
+                    ip_limited = self._ip_limited_result(remaining, reset_times, endpoint_type, start_time)
+            
+            if ip_limited:
+                for lang, missing in misses.items():
+                    for text in missing:
+                        resolved[(text, lang)] = ip_limited
             else:
-                return {
-                    'success': False,
-                    'error': f'DeepL API error: {resp.status_code}',
-                    'response_time': time.time() - start_time
-                }
-                
+                schedule = self._schedule_for(request, api_key, endpoint_type, batch=True)
+                groups = [(lang, missing[i:i + UPSTREAM_BATCH_TEXTS])
+                          for lang, missing in misses.items() for i in range(0, len(missing), UPSTREAM_BATCH_TEXTS)]
+                in_flight = {}
+                try:
+                    while groups or in_flight:
+                        while groups and len(in_flight) < self.max_concurrency:
+                            lang, group = groups.pop(0)
+                            future = self.executor.submit(self._translate_language, group, lang, start_time,
+                                                          deadline, schedule)
+                            in_flight[future] = (lang, group)
+                        
+                        remaining = deadline.remaining()
+                        if remaining <= 0:
+                            break
+                        done, _ = wait(in_flight, timeout=remaining, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            lang, group = in_flight.pop(future)
+                            try:
+                                group_results = future.result()
+                            except Exception as e:
+                                group_results = [self._upstream_error_result(e, start_time)] * len(group)
+                            for text, result in zip(group, group_results):
+                                resolved[(text, lang)] = result
+                finally:
+                    for future in in_flight:
+                        future.cancel()
+        
+        return {
+            lang: [resolved.get((text, lang)) or self._deadline_result(start_time) for text in texts]
+            for lang in target_langs
+        }
+    
+    def _translate_language(self, texts: List[str], target_lang: str, start_time: float, deadline: Deadline,
+                            schedule: Tuple[int, str]) -> List[Dict[str, any]]:
+        """One upstream call for a group of a language's cache misses"""
+        try:
+            upstream_quota.check(schedule[0])
+            admission_controller.admit(schedule[0])
+            upstream_scheduler.acquire(*schedule, deadline=deadline)
+            translations, backend = translation_backends.translate_batch(texts, target_lang, deadline=deadline)
+            self._cache_translations([(text, target_lang, translation) for text, translation in zip(texts, translations)],
+                                     backend=backend)
+            return [self._translated_result(translation, start_time, backend) for translation in translations]
         except Exception as e:
-            return {
-                'success': False,
-                'error': f'Translation error: {str(e)}',
-                'response_time': time.time() - start_time
-            }
+            return [self._upstream_error_result(e, start_time)] * len(texts)
+    
+    # ---- Async path (ASGI) ----
+    
+    async def translate_single_async(self, text: str, target_lang: str, request=None, api_key=None, endpoint_type='demo',
+                                     deadline: Optional[Deadline] = None, source_lang: Optional[str] = None) -> Dict[str, any]:
+        """Async variant of translate_single: SQLite work runs in threads, DeepL is awaited"""
+        start_time = time.time()
+        
+        # Check cache first
+        cached, upstream_text, values = await asyncio.to_thread(self._lookup, text, target_lang, source_lang)
+        if cached:
+            return self._cached_result(cached[0], start_time, stale=cached[1])
+        
+        schedule = self._schedule_for(request, api_key, endpoint_type)
+        result = await self._translate_uncached_async(upstream_text, target_lang, request, endpoint_type, start_time,
+                                                      deadline, schedule, source_lang, template=bool(values))
+        filled = self._fill_result(result, values)
+        if filled is None:
+            return await self._translate_uncached_async(text, target_lang, None, endpoint_type, start_time,
+                                                        deadline, schedule, source_lang)
+        return filled
     
-    def translate_batch(self, texts: List[str], target_lang: str, request=None, api_key=None, endpoint_type='demo') -> List[Dict[str, any]]:
-        """Translate multiple texts in batch, honoring IP rate limits for actual API calls only"""
-        results = []
+    async def _translate_uncached_async(self, text: str, target_lang: str, request, endpoint_type: str, start_time: float,
+                                        deadline: Optional[Deadline] = None, schedule: Tuple[int, str] = None,
+                                        source_lang: Optional[str] = None, template: bool = False) -> Dict[str, any]:
+        """Async upstream half of translate_single_async"""
+        if deadline is not None and deadline.expired():
+            return self._deadline_result(start_time)
         
-        for i in range(0, len(texts), self.batch_size):
-            batch = texts[i:i + self.batch_size]
-            batch_results = []
+        schedule = schedule or self._schedule_for(request, None, endpoint_type)
+        try:
+            upstream_quota.check(schedule[0])
+            admission_controller.admit(schedule[0])
+        except (QuotaExhaustedError, UpstreamOverloadedError) as e:
+            return self._upstream_error_result(e, start_time)
+        
+        # Only if NOT cached, we check IP DeepL call limits
+        if request:
+            allowed, remaining, reset_times = await asyncio.to_thread(
+                ip_rate_limiter.check_and_update_rate_limit, request, endpoint_type, True
+            )
+            if not allowed:
+                return self._ip_limited_result(remaining, reset_times, endpoint_type, start_time)
+        
+        try:
+            await upstream_scheduler.acquire_async(*schedule, deadline=deadline)
             
-            for text in batch:
-                result = self.translate_single(text, target_lang, request=request, api_key=api_key, endpoint_type=endpoint_type)
-                batch_results.append(result)
+            translations, backend = await translation_backends.translate_batch_async([text], target_lang, deadline=deadline,
+                                                                                     source_lang=source_lang)
+            translation = translations[0]
+            if not template or placeholders_intact(text, translation):
+                await asyncio.to_thread(self._cache_translations, [(text, target_lang, translation)], source_lang, backend)
+            return self._translated_result(translation, start_time, backend)
             
-            results.extend(batch_results)
+        except Exception as e:
+            return self._upstream_error_result(e, start_time)
+    
+    async def translate_segmented_async(self, text: str, target_lang: str, request=None, api_key=None, endpoint_type='demo',
+                                        deadline: Optional[Deadline] = None, source_lang: Optional[str] = None) -> Dict[str, any]:
+        """Async variant of translate_segmented"""
+        start_time = time.time()
+        prefix, segments, unique, translations = await asyncio.to_thread(
+            self._lookup_segments, text, target_lang, source_lang
+        )
+        if text in translations:
+            return self._cached_result(translations[text], start_time)
+        
+        missing = [segment for segment in unique if segment not in translations]
+        backend = None
+        if missing:
+            if deadline is not None and deadline.expired():
+                return self._deadline_result(start_time)
+            schedule = self._schedule_for(request, api_key, endpoint_type)
+            try:
+                upstream_quota.check(schedule[0])
+                admission_controller.admit(schedule[0])
+            except (QuotaExhaustedError, UpstreamOverloadedError) as e:
+                return self._upstream_error_result(e, start_time)
+            if request:
+                allowed, remaining, reset_times = await asyncio.to_thread(
+                    ip_rate_limiter.check_and_update_rate_limit, request, endpoint_type, True
+                )
+                if not allowed:
+                    return self._ip_limited_result(remaining, reset_times, endpoint_type, start_time)
+            try:
+                for i in range(0, len(missing), UPSTREAM_BATCH_TEXTS):
+                    group = missing[i:i + UPSTREAM_BATCH_TEXTS]
+                    await upstream_scheduler.acquire_async(*schedule, deadline=deadline)
+                    fetched, backend = await translation_backends.translate_batch_async(group, target_lang, deadline=deadline,
+                                                                                        source_lang=source_lang)
+                    await asyncio.to_thread(self._cache_translations,
+                                            [(segment, target_lang, translation) for segment, translation in zip(group, fetched)],
+                                            source_lang, backend)
+                    translations.update(zip(group, fetched))
+            except Exception as e:
+                return self._upstream_error_result(e, start_time)
+        return self._segmented_result(prefix, segments, unique, translations, missing, start_time, backend)
+    
+    async def translate_chunked_async(self, text: str, target_lang: str, request=None, api_key=None, endpoint_type='demo',
+                                      deadline: Optional[Deadline] = None, source_lang: Optional[str] = None) -> Dict[str, any]:
+        """Async variant of translate_chunked"""
+        start_time = time.time()
+        deadline = deadline or Deadline(REQUEST_DEADLINES['translate'], start_time)
+        prefix, chunks, unique, translations = await asyncio.to_thread(
+            self._lookup_segments, text, target_lang, source_lang, CHUNK_MAX_CHARS
+        )
+        if text in translations:
+            return self._cached_result(translations[text], start_time)
         
+        missing = [chunk for chunk in unique if chunk not in translations]
+        results = {}
+        if missing:
+            if request:
+                allowed, remaining, reset_times = await asyncio.to_thread(
+                    ip_rate_limiter.check_and_update_rate_limit, request, endpoint_type, True
+                )
+                if not allowed:
+                    return self._ip_limited_result(remaining, reset_times, endpoint_type, start_time)
+            
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            schedule = self._schedule_for(request, api_key, endpoint_type)
+            
+            async def translate_chunk(chunk):
+                async with semaphore:
+                    results[chunk] = await self._translate_chunk_async(chunk, target_lang, start_time, deadline,
+                                                                       schedule, source_lang)
+            
+            tasks = [asyncio.ensure_future(translate_chunk(chunk)) for chunk in missing]
+            _, pending = await asyncio.wait(tasks, timeout=max(0.0, deadline.remaining()))
+            for task in pending:
+                task.cancel()
+        return self._chunked_result(prefix, chunks, unique, translations, missing, results, start_time)
+    
+    async def _translate_chunk_async(self, chunk: str, target_lang: str, start_time: float, deadline: Deadline,
+                                     schedule: Tuple[int, str], source_lang: Optional[str] = None) -> Dict[str, any]:
+        """Async variant of _translate_chunk"""
+        for attempt in range(1, CHUNK_MAX_ATTEMPTS + 1):
+            try:
+                deadline.check()
+                upstream_quota.check(schedule[0])
+                admission_controller.admit(schedule[0])
+                await upstream_scheduler.acquire_async(*schedule, deadline=deadline)
+                translations, backend = await translation_backends.translate_batch_async([chunk], target_lang,
+                                                                                         deadline=deadline,
+                                                                                         source_lang=source_lang)
+            except Exception as e:
+                delay = self._chunk_retry_delay(e, attempt, deadline)
+                if delay is None:
+                    return self._upstream_error_result(e, start_time)
+                await asyncio.sleep(delay)
+                continue
+            await asyncio.to_thread(self._cache_translations, [(chunk, target_lang, translations[0])], source_lang, backend)
+            return self._translated_result(translations[0], start_time, backend)
+    
+    async def translate_batch_async(self, texts: List[str], target_lang: str, request=None, api_key=None, endpoint_type='demo',
+                                    deadline: Optional[Deadline] = None) -> List[Dict[str, any]]:
+        """Async variant of translate_batch with the same concurrency cap, ordering and deadline"""
+        results = [None] * len(texts)
+        async for i, result in self.iter_batch_async(texts, target_lang, request, api_key, endpoint_type, deadline):
+            results[i] = result
         return results
+    
+    async def iter_batch_async(self, texts: List[str], target_lang: str, request=None, api_key=None, endpoint_type='demo',
+                               deadline: Optional[Deadline] = None) -> AsyncIterator[Tuple[int, Dict[str, any]]]:
+        """Async variant of iter_batch: cache hits first, then misses as they complete"""
+        start_time = time.time()
+        deadline = deadline or Deadline(BATCH_DEADLINE_SECONDS, start_time)
+        hits = [None] * len(texts)
+        misses = await asyncio.to_thread(self._collect_misses, texts, target_lang, hits, start_time)
+        for i, result in enumerate(hits):
+            if result:
+                yield i, result
+        del hits
+        
+        if not misses:
+            return
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        schedule = self._schedule_for(request, api_key, endpoint_type, batch=True)
+        
+        retries = set()  # literal retries of damaged templates; their IP call was already counted
+        
+        async def translate_miss(text):
+            async with semaphore:
+                try:
+                    result = await self._translate_uncached_async(text, target_lang,
+                                                                  None if text in retries else request, endpoint_type,
+                                                                  start_time, deadline, schedule, None,
+                                                                  misses[text][0][1] is not None)
+                except Exception as e:
+                    result = self._upstream_error_result(e, start_time)
+            return text, result
+        
+        pending = {asyncio.ensure_future(translate_miss(text)) for text in misses}
+        try:
+            while pending:
+                remaining = deadline.remaining()
+                if remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    text, result = task.result()
+                    resolved, literal = self._resolve_misses(misses.pop(text), result)
+                    for i, filled in resolved:
+                        yield i, filled
+                    for i in literal:
+                        if texts[i] not in misses:
+                            retries.add(texts[i])
+                            pending.add(asyncio.ensure_future(translate_miss(texts[i])))
+                        misses.setdefault(texts[i], []).append((i, None))
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        for members in misses.values():
+            for i, _ in members:
+                yield i, self._deadline_result(start_time)
 
 class SmartCacheOrchestrator:
     """Main orchestrator for the enhanced translation pipeline"""
     
     def __init__(self):
         self.priority_cache = PriorityCacheManager()
+        self.hot_phrases = HotPhraseTracker(self.priority_cache)
         self.batch_translator = TranslationBatcher()
         self.performance_metrics = defaultdict(list)
+        # Canonical text of every built-in priority message -> its key (critical messages win ties)
+        self.message_keys = {}
+        for messages in (self.priority_cache.get_common_responses(), self.priority_cache.get_critical_messages()):
+            self.message_keys.update((canonical.normalize_text(message), key) for key, message in messages.items())
+    
+    def reset_after_fork(self):
+        """Re-create per-process state so each forked worker starts clean"""
+        self.priority_cache.reset_after_fork()
+        self.hot_phrases.reset_after_fork()
+        self.batch_translator.reset_after_fork()
+        self.performance_metrics = defaultdict(list)
+        deepl_breaker.reset_after_fork()
+        upstream_latency.reset_after_fork()
+        translation_backends.reset_after_fork()
+        upstream_scheduler.reset_after_fork()
+        upstream_quota.reset_after_fork()
+        admission_controller.reset_after_fork()
     
     def _identify_message_key(self, text: str) -> Optional[str]:
-        """Identify if text matches a priority message"""
-        text_lower = text.lower().strip()
-        
-        # Check critical messages
-        critical_messages = self.priority_cache.get_critical_messages()
-        for key, message in critical_messages.items():
-            if text_lower == message.lower():
-                return key
+        """Identify if text matches a priority message (compared in canonical form, like every cache tier)"""
+        key = self.message_keys.get(canonical.normalize_text(text))
+        if key:
+            return key
         
-        # Check common responses
-        common_responses = self.priority_cache.get_common_responses()
-        for key, message in common_responses.items():
-            if text_lower == message.lower():
-                return key
-        
-        return None
+        # Check phrases learned from traffic
+        return self.hot_phrases.lookup_key(text)
+    
+    def _record_hot(self, text: str, target_lang: str, message_key: Optional[str]):
+        """Count a request for hot phrase learning; the built-in priority messages are always cached anyway"""
+        if message_key is None or message_key.startswith('hot:'):
+            self.hot_phrases.record(text, target_lang)
+    
+    def _source_language(self, text: str, target_lang: str, source_lang: Optional[str],
+                         start_time: float) -> Tuple[Optional[str], Optional[Dict[str, any]]]:
+        """
+        Source language for text (the client's, else a confident offline detection) and, when text is
+        already in the target language, the result to return without an upstream call. Regional targets
+        (EN-GB, PT-BR...) are still translated, since DeepL adapts spelling and vocabulary to them.
+        """
+        confidence = 1.0
+        if source_lang is None and LANGUAGE_DETECTION:
+            detected = language_id.detect(text)
+            if detected and detected[1] >= LANGUAGE_SOURCE_CONFIDENCE:
+                # Sent upstream, but kept out of cache keys (see canonical.DetectedLanguage)
+                source_lang, confidence = canonical.DetectedLanguage(detected[0]), detected[1]
+        if source_lang == target_lang and confidence >= LANGUAGE_SKIP_CONFIDENCE:
+            response_time = time.time() - start_time
+            self.performance_metrics['same_language'].append(response_time)
+            return source_lang, {
+                'success': True,
+                'translation': text,
+                'cached': False,
+                'same_language': True,
+                'source_lang': source_lang,
+                'response_time': response_time
+            }
+        return source_lang, None
     
-    def handle_translation_request(self, text: str, target_lang: str, api_key: str, request=None, endpoint_type='demo') -> Dict[str, any]:
+    def handle_translation_request(self, text: str, target_lang: str, api_key: str, request=None, endpoint_type='demo',
+                                   deadline: Optional[Deadline] = None, segment: bool = False,
+                                   source_lang: Optional[str] = None) -> Dict[str, any]:
         """Main translation orchestration method (now supports passing request for IP DeepL call rate limit)"""
         start_time = time.time()
         
         # Check if this is a priority message
         message_key = self._identify_message_key(text)
+        self._record_hot(text, target_lang, message_key)
         if message_key:
-            priority_translation = self.priority_cache.get_cached_translation(message_key, target_lang)
-            if priority_translation:
+            priority_hit = self.priority_cache.get_cached_translation(message_key, target_lang)
+            if priority_hit:
                 response_time = time.time() - start_time
                 self.performance_metrics['priority_cache_hits'].append(response_time)
                 
                 return {
                     'success': True,
-                    'translation': priority_translation,
+                    'translation': priority_hit[0],
                     'cached': True,
                     'priority': True,
+                    'fresh': not priority_hit[1],
                     'response_time': response_time
                 }
         
+        # Text already in the target language needs no upstream call
+        source_lang, same_language = self._source_language(text, target_lang, source_lang, start_time)
+        if same_language:
+            return same_language
+        
         # Paid or demo?
         if api_key and api_key != 'demo':
             call_endpoint_type = 'paid'
         else:
             call_endpoint_type = 'demo'
 
-        # Fall back to regular translation, pass request for IP rate limiting
-        result = self.batch_translator.translate_single(text, target_lang, request=request, api_key=api_key, endpoint_type=call_endpoint_type)
-        
-        # Log performance metrics
-        if result.get('success'):
-            cache_type = 'regular_cache_hit' if result['cached'] else 'api_translation'
-            self.performance_metrics[cache_type].append(result['response_time'])
-        
-        return result
-    
-    def get_performance_metrics(self) -> Dict[str, any]:
-        """Get performance metrics for monitoring"""
-        metrics = {}
-        
-        for metric_type, times in self.performance_metrics.items():
-            if times:
-                metrics[metric_type] = {
-                    'count': len(times),
-                    'avg_time': sum(times) / len(times),
-                    'min_time': min(times),
-                    'max_time': max(times)
-                }
-        
-        return metrics
+        # Fall back to regular translation, pass request for IP rate limiting
+        if len(text) > CHUNK_MAX_CHARS:
+            result = self.batch_translator.translate_chunked(text, target_lang, request=request, api_key=api_key,
+                                                             endpoint_type=call_endpoint_type, deadline=deadline,
+                                                             source_lang=source_lang)
+        elif segment and len(text) >= SEGMENT_MIN_LENGTH:
+            result = self.batch_translator.translate_segmented(text, target_lang, request=request, api_key=api_key,
+                                                               endpoint_type=call_endpoint_type, deadline=deadline,
+                                                               source_lang=source_lang)
+        else:
+            result = self.batch_translator.translate_single(text, target_lang, request=request, api_key=api_key,
+                                                            endpoint_type=call_endpoint_type, deadline=deadline,
+                                                            source_lang=source_lang)
+        
+        # Log performance metrics
+        if result.get('success'):
+            cache_type = 'regular_cache_hit' if result['cached'] else 'api_translation'
+            self.performance_metrics[cache_type].append(result['response_time'])
+            if source_lang:
+                result['source_lang'] = source_lang
+        
+        return result
+    
+    def handle_multi_target_request(self, texts: List[str], target_langs: List[str], api_key: str, request=None,
+                                    deadline: Optional[Deadline] = None) -> Dict[str, List[Dict[str, any]]]:
+        """Translate texts into several languages at once, priority cache first: {target_lang: [result per text]}"""
+        start_time = time.time()
+        texts = [canonical.normalize_text(text) for text in texts]
+        
+        message_keys = {text: self._identify_message_key(text) for text in dict.fromkeys(texts)}
+        for text in texts:
+            for lang in target_langs:
+                self._record_hot(text, lang, message_keys[text])
+        priority_hits = self.priority_cache.get_cached_translations(
+            [key for key in message_keys.values() if key], target_langs
+        )
+        resolved = {}
+        for text, key in message_keys.items():
+            for lang in target_langs:
+                if (key, lang) in priority_hits:
+                    translation, stale = priority_hits[(key, lang)]
+                    resolved[(text, lang)] = {
+                        'success': True,
+                        'translation': translation,
+                        'cached': True,
+                        'priority': True,
+                        'fresh': not stale,
+                        'response_time': time.time() - start_time
+                    }
+        
+        call_endpoint_type = 'paid' if api_key and api_key != 'demo' else 'demo'
+        return self.batch_translator.translate_multi(texts, target_langs, request=request, api_key=api_key,
+                                                     endpoint_type=call_endpoint_type, deadline=deadline,
+                                                     resolved=resolved)
+    
+    async def handle_translation_request_async(self, text: str, target_lang: str, api_key: str, request=None, endpoint_type='demo',
+                                               deadline: Optional[Deadline] = None, segment: bool = False,
+                                               source_lang: Optional[str] = None) -> Dict[str, any]:
+        """Async variant of handle_translation_request for the ASGI entry point"""
+        start_time = time.time()
+        
+        message_key = self._identify_message_key(text)
+        self._record_hot(text, target_lang, message_key)
+        if message_key:
+            priority_hit = await asyncio.to_thread(
+                self.priority_cache.get_cached_translation, message_key, target_lang
+            )
+            if priority_hit:
+                response_time = time.time() - start_time
+                self.performance_metrics['priority_cache_hits'].append(response_time)
+                
+                return {
+                    'success': True,
+                    'translation': priority_hit[0],
+                    'cached': True,
+                    'priority': True,
+                    'fresh': not priority_hit[1],
+                    'response_time': response_time
+                }
+        
+        source_lang, same_language = self._source_language(text, target_lang, source_lang, start_time)
+        if same_language:
+            return same_language
+        
+        call_endpoint_type = 'paid' if api_key and api_key != 'demo' else 'demo'
+        if len(text) > CHUNK_MAX_CHARS:
+            translate = self.batch_translator.translate_chunked_async
+        elif segment and len(text) >= SEGMENT_MIN_LENGTH:
+            translate = self.batch_translator.translate_segmented_async
+        else:
+            translate = self.batch_translator.translate_single_async
+        result = await translate(
+            text, target_lang, request=request, api_key=api_key, endpoint_type=call_endpoint_type, deadline=deadline,
+            source_lang=source_lang
+        )
+        
+        if result.get('success'):
+            cache_type = 'regular_cache_hit' if result['cached'] else 'api_translation'
+            self.performance_metrics[cache_type].append(result['response_time'])
+            if source_lang:
+                result['source_lang'] = source_lang
+        
+        return result
+    
+    def get_performance_metrics(self) -> Dict[str, any]:
+        """Get performance metrics for monitoring"""
+        metrics = {}
+        
+        for metric_type, times in self.performance_metrics.items():
+            if times:
+                metrics[metric_type] = {
+                    'count': len(times),
+                    'avg_time': sum(times) / len(times),
+                    'min_time': min(times),
+                    'max_time': max(times)
+                }
+        
+        metrics['upstream_circuit'] = deepl_breaker.get_status()
+        metrics['upstream_latency'] = upstream_latency.get_status()
+        metrics['translation_backends'] = translation_backends.get_status()
+        metrics['upstream_scheduler'] = upstream_scheduler.get_status()
+        metrics['upstream_quota'] = upstream_quota.get_status()
+        metrics['admission'] = admission_controller.get_status()
+        metrics['hot_phrases'] = self.hot_phrases.get_status()
+        return metrics
+
+# Initialize the orchestrator
+cache_orchestrator = SmartCacheOrchestrator()
+
+# ==== TRANSLATION JOBS ====
+
+class TranslationJobManager:
+    """
+    Background translation jobs for workloads too large for /translate-batch.
+    Jobs and their texts are persisted in SQLite and processed in chunks through the batcher
+    (cache first, then upstream fan-out) by a small per-process worker pool. A job is claimed
+    by one worker at a time via a heartbeat, so jobs interrupted by a restart are resumed.
+    The API key is charged per successfully translated text as the job progresses.
+    """
+    
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    TRANSIENT_ERRORS = ('deadline_exceeded', 'overloaded', 'circuit_open', 'degraded')
+    
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        self._resumed_pid = None
+        self._submitted = set()  # job IDs waiting in (or running on) this process's pool
+        self._submitted_lock = threading.Lock()
+    
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='translation-job')
+                self._executor_pid = os.getpid()
+            return self._executor
+    
+    def reset_after_fork(self):
+        self._executor_lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._resumed_pid = None
+        self._submitted = set()
+        self._submitted_lock = threading.Lock()
+    
+    def create_job(self, api_key: str, texts: List[str], target_lang: str) -> str:
+        """Persist a job and queue it for processing; returns the job ID"""
+        job_id = uuid.uuid4().hex
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        c.execute('''INSERT INTO translation_jobs (id, api_key, target_lang, status, total)
+                     VALUES (?, ?, ?, ?, ?)''', (job_id, api_key, target_lang, self.QUEUED, len(texts)))
+        c.executemany('INSERT INTO translation_job_items (job_id, idx, source_text) VALUES (?, ?, ?)',
+                      [(job_id, i, text) for i, text in enumerate(texts)])
+        conn.commit()
+        conn.close()
+        
+        self._submit(job_id)
+        return job_id
+    
+    def _submit(self, job_id: str) -> bool:
+        """Queue a job on this process's pool unless it is already there; request, recovery and pool threads race here"""
+        with self._submitted_lock:
+            if job_id in self._submitted:
+                return False
+            self._submitted.add(job_id)
+        self.executor.submit(self.run_job, job_id)
+        return True
+    
+    def resume_jobs(self):
+        """
+        Queue unfinished jobs, then keep scanning for stale ones every JOB_RECOVERY_INTERVAL (once per
+        process). A job that was running when its worker died still has a fresh heartbeat at boot, so it
+        is only picked up by a later scan, once the heartbeat is JOB_STALE_SECONDS old.
+        """
+        if self._resumed_pid == os.getpid():
+            return
+        self._resumed_pid = os.getpid()
+        self.recover_jobs()
+        
+        def run():
+            while True:
+                time.sleep(JOB_RECOVERY_INTERVAL * random.uniform(0.8, 1.2))
+                try:
+                    recovered = self.recover_jobs()
+                    if recovered:
+                        print(f"🔄 Resuming {len(recovered)} stale translation job(s)")
+                except Exception as e:
+                    print(f"⚠️  Translation job recovery check failed: {e}")
+        
+        threading.Thread(target=run, name='translation-job-recovery', daemon=True).start()
+    
+    def recover_jobs(self) -> List[str]:
+        """Queue every job no live worker owns: queued, or running without a heartbeat for JOB_STALE_SECONDS"""
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        c.execute('''SELECT id FROM translation_jobs
+                     WHERE status=? OR (status=? AND (heartbeat_at IS NULL OR heartbeat_at < ?))''',
+                  (self.QUEUED, self.RUNNING, time.time() - JOB_STALE_SECONDS))
+        job_ids = [row[0] for row in c.fetchall()]
+        conn.close()
+        return [job_id for job_id in job_ids if self._submit(job_id)]
+    
+    def _claim(self, job_id: str) -> Optional[Tuple[str, str]]:
+        """Atomically take ownership of a job; returns (api_key, target_lang) or None if someone else has it"""
+        now = time.time()
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        c.execute('''UPDATE translation_jobs SET status=?, worker=?, heartbeat_at=?, updated_at=CURRENT_TIMESTAMP
+                     WHERE id=? AND (status=? OR (status=? AND (heartbeat_at IS NULL OR heartbeat_at < ?)))''',
+                  (self.RUNNING, str(os.getpid()), now, job_id, self.QUEUED, self.RUNNING, now - JOB_STALE_SECONDS))
+        claimed = c.rowcount == 1
+        conn.commit()
+        row = None
+        if claimed:
+            c.execute('SELECT api_key, target_lang FROM translation_jobs WHERE id=?', (job_id,))
+            row = c.fetchone()
+        conn.close()
+        return row
+    
+    def _finish(self, job_id: str, status: str, error: Optional[str] = None):
+        conn = sqlite3.connect('api_keys.db')
+        conn.execute('''UPDATE translation_jobs SET status=?, error=?, updated_at=CURRENT_TIMESTAMP,
+                        completed_at=CURRENT_TIMESTAMP WHERE id=?''', (status, error, job_id))
+        conn.commit()
+        conn.close()
+    
+    def run_job(self, job_id: str):
+        try:
+            self._run(job_id)
+        except Exception as e:
+            print(f"❌ Translation job {job_id} failed: {e}")
+            self._finish(job_id, self.FAILED, str(e))
+        finally:
+            with self._submitted_lock:
+                self._submitted.discard(job_id)
+    
+    def _run(self, job_id: str):
+        claimed = self._claim(job_id)
+        if not claimed:
+            return
+        api_key, target_lang = claimed
+        
+        while True:
+            quota = get_remaining_quota(api_key)
+            if not quota:
+                self._finish(job_id, self.FAILED, 'Quota exceeded')
+                return
+            
+            conn = sqlite3.connect('api_keys.db')
+            c = conn.cursor()
+            c.execute('''SELECT idx, source_text, attempts FROM translation_job_items
+                         WHERE job_id=? AND status='pending' ORDER BY idx LIMIT ?''',
+                      (job_id, min(JOB_CHUNK_SIZE, quota)))
+            items = c.fetchall()
+            conn.close()
+            if not items:
+                self._finish(job_id, self.COMPLETED)
+                return
+            
+            results = cache_orchestrator.batch_translator.translate_batch(
+                [text for _, text, _ in items], target_lang, api_key=api_key, endpoint_type='paid',
+                deadline=Deadline(BATCH_DEADLINE_SECONDS)
+            )
+            
+            done, failed, retry = [], [], []
+            retry_after = JOB_RETRY_DELAY
+            for (idx, _, attempts), result in zip(items, results):
+                if result.get('success'):
+                    done.append((result['translation'], job_id, idx))
+                elif any(result.get(flag) for flag in self.TRANSIENT_ERRORS) and attempts + 1 < JOB_MAX_ATTEMPTS:
+                    retry.append((job_id, idx))
+                    retry_after = max(retry_after, result.get('retry_after') or 0)
+                else:
+                    failed.append((result.get('error', 'Translation failed'), job_id, idx))
+            
+            # Charge only what was actually translated
+            if done and charge_api_key(api_key, len(done)):
+                self._finish(job_id, self.FAILED, 'Quota exceeded')
+                return
+            
+            conn = sqlite3.connect('api_keys.db')
+            c = conn.cursor()
+            c.executemany('''UPDATE translation_job_items SET translation=?, status='done'
+                             WHERE job_id=? AND idx=?''', done)
+            c.executemany('''UPDATE translation_job_items SET error=?, status='failed', attempts=attempts + 1
+                             WHERE job_id=? AND idx=?''', failed)
+            c.executemany('''UPDATE translation_job_items SET attempts=attempts + 1
+                             WHERE job_id=? AND idx=?''', retry)
+            c.execute('''UPDATE translation_jobs SET succeeded=succeeded + ?, failed=failed + ?, charged=charged + ?,
+                         heartbeat_at=?, updated_at=CURRENT_TIMESTAMP WHERE id=?''',
+                      (len(done), len(failed), len(done), time.time(), job_id))
+            conn.commit()
+            conn.close()
+            
+            if retry and not done and not failed:
+                time.sleep(min(retry_after, JOB_STALE_SECONDS / 4))
+    
+    def get_job(self, job_id: str, api_key: str) -> Optional[Dict[str, any]]:
+        """Job status for its owner, or None"""
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        c.execute('''SELECT status, target_lang, total, succeeded, failed, charged, error, created_at, updated_at,
+                     completed_at FROM translation_jobs WHERE id=? AND api_key=?''', (job_id, api_key))
+        row = c.fetchone()
+        conn.close()
+        if not row:
+            return None
+        status, target_lang, total, succeeded, failed, charged, error, created_at, updated_at, completed_at = row
+        return {
+            'job_id': job_id,
+            'status': status,
+            'target': target_lang,
+            'total': total,
+            'processed': succeeded + failed,
+            'succeeded': succeeded,
+            'failed': failed,
+            'charged': charged,
+            'progress': round((succeeded + failed) / total, 4) if total else 1.0,
+            'error': error,
+            'created_at': created_at,
+            'updated_at': updated_at,
+            'completed_at': completed_at
+        }
+    
+    def get_results(self, job_id: str, offset: int, limit: int) -> List[Dict[str, any]]:
+        """One page of per-text results, in input order"""
+        conn = sqlite3.connect('api_keys.db')
+        c = conn.cursor()
+        c.execute('''SELECT idx, source_text, translation, status, error FROM translation_job_items
+                     WHERE job_id=? AND idx >= ? ORDER BY idx LIMIT ?''', (job_id, offset, limit))
+        rows = c.fetchall()
+        conn.close()
+        return [{'index': idx, 'text': text, 'translation': translation, 'status': status, 'error': error}
+                for idx, text, translation, status, error in rows]
+
+job_manager = TranslationJobManager()
+
+# ==== LAZY CLIENTS ====
+
+_ses_client = None
+_ses_client_pid = None
+_ses_client_lock = threading.Lock()
+
+def init_ses_client():
+    """Initialize SES client with error handling"""
+    try:
+        import boto3
+        client = boto3.client('ses', region_name=os.getenv('AWS_REGION'))
+        print("✅ AWS SES client initialized successfully")
+        return client
+    except Exception as e:
+        print(f"⚠️  WARNING: AWS SES client failed to initialize: {e}")
+        print("   Email features will be disabled")
+        return None
+
+def get_ses_client():
+    """SES client, created on first use in each process (boto3 import is slow and not fork-safe)"""
+    global _ses_client, _ses_client_pid
+    if _ses_client_pid != os.getpid():
+        with _ses_client_lock:
+            if _ses_client_pid != os.getpid():
+                _ses_client = init_ses_client()
+                _ses_client_pid = os.getpid()
+    return _ses_client
+
+_stripe = None
+
+def get_stripe():
+    """Stripe module, imported and configured on first use (the import alone takes ~1s)"""
+    global _stripe
+    if _stripe is None:
+        import stripe
+        stripe.api_key = STRIPE_SECRET_KEY
+        _stripe = stripe
+    return _stripe
+
+# ==== PROCESS LIFECYCLE (FORK SAFETY) ====
+
+def _reset_after_fork():
+    """Cheap, always-safe reset of locks and thread pools in any forked child"""
+    cache_orchestrator.reset_after_fork()
+    job_manager.reset_after_fork()
+    translation_namespace.reset_after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
-# Initialize the orchestrator
-cache_orchestrator = SmartCacheOrchestrator()
+def init_worker():
+    """
+    Per-worker initialization, called from gunicorn's post_fork hook.
+    Heavy clients (SES, Stripe) are created lazily on first use in each process,
+    so this only makes sure the schema is current, unfinished jobs are picked up,
+    the priority cache refresh scheduler is running and Socket.IO is being served.
+    """
+    if AUTO_MIGRATE:
+        ensure_schema()
+    job_manager.resume_jobs()
+    cache_orchestrator.priority_cache.start_refresh_scheduler()
+    init_socketio()
 
-# ==== DATABASE INITIALIZATION ====
+# ==== SCHEMA MIGRATION ====
 
-def init_db():
-    conn = sqlite3.connect('api_keys.db')
-    c = conn.cursor()
-    
-    # Create users table with email verification fields
-    c.execute('''CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    full_name TEXT,
-                    email TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    email_verified INTEGER DEFAULT 0,
-                    verification_token TEXT,
-                    verification_token_expires TIMESTAMP,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                  )''')
-    
-    # Create password_resets table
-    c.execute('''CREATE TABLE IF NOT EXISTS password_resets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    token TEXT NOT NULL,
-                    expires_at TIMESTAMP NOT NULL,
-                    used INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                  )''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS api_keys (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    key TEXT UNIQUE NOT NULL,
-                    created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    uses INTEGER DEFAULT 0
-                  )''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS subscriptions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    subscription_id TEXT NOT NULL,
-                    status TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users (id)
-                  )''')
-    
-    conn.commit()
-    conn.close()
+_schema_ready = False
+
+def ensure_schema():
+    """Apply pending schema migrations once per process"""
+    global _schema_ready
+    if not _schema_ready:
+        migrations.migrate_db()
+        _schema_ready = True
 
-# Initialize database and cache, and IP rate limiter table
-init_db()
-cache_orchestrator.priority_cache.init_priority_cache_db()
-ip_rate_limiter.init_rate_limit_db()
+@app.before_request
+def start_request_clock():
+    # Request deadlines are measured from arrival, before auth and rate-limit bookkeeping
+    g.request_started = time.time()
+    admission_controller.request_started(request.headers, g.request_started)
+    g.admission_tracked = True
 
-# Initialize SES client with error handling
-try:
-    ses_client = boto3.client('ses', region_name=os.getenv('AWS_REGION'))
-    print("✅ AWS SES client initialized successfully")
-except Exception as e:
-    print(f"⚠️  WARNING: AWS SES client failed to initialize: {e}")
-    print("   Email features will be disabled")
-    ses_client = None
+@app.teardown_request
+def finish_request_tracking(exc):
+    if g.pop('admission_tracked', False):
+        admission_controller.request_finished()
+
+@app.before_request
+def ensure_schema_before_request():
+    if AUTO_MIGRATE and not _schema_ready:
+        ensure_schema()
+
+@app.cli.command('migrate-db')
+def migrate_db_command():
+    """Apply pending database schema migrations"""
+    version = migrations.migrate_db()
+    print(f"✅ Schema at version {version}")
 
 # ==== ENHANCED API ROUTES ====
 
@@ -925,6 +3794,7 @@ def register():
             verification_url = f"{request.host_url.rstrip('/')}/verify-email?token={verification_token}"
             
             try:
+                ses_client = get_ses_client()
                 if ses_client:
                     ses_client.send_email(
                         Source=os.getenv('SES_EMAIL', 'noreply@argonautdigitalventures.com'),
@@ -999,7 +3869,11 @@ def register():
 
 @app.route('/health')
 def health():
-    return jsonify(status='healthy', service='Enhanced TranslateAll API')
+    return jsonify(status='healthy', service='Enhanced TranslateAll API',
+                   startup_time_ms=round(startup_time_ms, 1),
+                   degraded=upstream_quota.mode() == UpstreamQuotaTracker.DEGRADED,
+                   load=round(admission_controller.load(), 3),
+                   upstream={'deepl': deepl_breaker.get_status(), 'quota': upstream_quota.get_status()})
 
 @app.route('/create-key', methods=['POST'])
 def create_key():
@@ -1031,7 +3905,7 @@ def create_checkout_session():
     user_email = session.get('user_email')
     api_key = session.get('api_key')
     
-    ck = stripe.checkout.Session.create(
+    ck = get_stripe().checkout.Session.create(
         line_items=[{"price": stripe_price_id, "quantity": 1}],
         mode='subscription',
         success_url=request.host_url + '?success=true',
@@ -1043,38 +3917,131 @@ def create_checkout_session():
 
 # ==== ENHANCED TRANSLATION ENDPOINTS ====
 
-@app.route('/translate', methods=['POST'])
-def translate():
-    """Enhanced translation endpoint with smart caching and IP DeepL call rate limiting"""
-    key = request.headers.get('X-API-KEY')
-    if not key:
-        return jsonify(success=False, error='API key required'), 401
-    
-    # Check if DeepL API key is configured
-    if not DEEPL_API_KEY:
-        return jsonify(success=False, error='Translation service not configured. Please contact administrator.'), 503
-    
-    # Validate API key and quota
+def charge_api_key(key: str, units: int = 1, quota_error: str = 'Quota exceeded') -> Optional[Tuple[Dict[str, any], int]]:
+    """
+    Validate an API key and charge units against its quota.
+    Returns an error (payload, status) or None when the key was charged.
+    """
     conn = sqlite3.connect('api_keys.db')
     c = conn.cursor()
     c.execute('SELECT uses FROM api_keys WHERE key=?', (key,))
     row = c.fetchone()
     if not row:
         conn.close()
-        return jsonify(success=False, error='Invalid API key'), 401
+        return {'success': False, 'error': 'Invalid API key'}, 401
     
-    uses = row[0] + 1
-    if uses > 2000:
+    uses = row[0] + units
+    if uses > API_KEY_QUOTA:
         conn.close()
-        return jsonify(success=False, error='Quota exceeded'), 403
+        return {'success': False, 'error': quota_error}, 403
     
     c.execute('UPDATE api_keys SET uses=? WHERE key=?', (uses, key))
     conn.commit()
     conn.close()
+    return None
+
+def get_remaining_quota(key: str) -> Optional[int]:
+    """Translations left on an API key, or None if the key doesn't exist"""
+    conn = sqlite3.connect('api_keys.db')
+    c = conn.cursor()
+    c.execute('SELECT uses FROM api_keys WHERE key=?', (key,))
+    row = c.fetchone()
+    conn.close()
+    return max(0, API_KEY_QUOTA - row[0]) if row else None
+
+def json_response(payload: Dict[str, any], status: int = 200):
+    """jsonify with a Retry-After header when the payload carries retry_after"""
+    response = jsonify(payload)
+    response.status_code = status
+    if payload.get('retry_after'):
+        response.headers['Retry-After'] = str(math.ceil(payload["retry_after"]))
+    return response
+
+def wants_ndjson() -> bool:
+    """True when the client asked for a streamed NDJSON response (Accept header or ?stream=1)"""
+    return (request.args.get('stream', '').lower() in ('1', 'true')
+            or 'application/x-ndjson' in request.headers.get('Accept', ''))
+
+def ndjson_lines(indexed_results: Iterator[Tuple[int, Dict[str, any]]]) -> Iterator[str]:
+    """One JSON line per (index, result); a failure mid-stream becomes a final error line"""
+    try:
+        for index, result in indexed_results:
+            yield json.dumps(dict(result, index=index)) + '\n'
+    except Exception as e:
+        yield json.dumps({'success': False, 'error': str(e)}) + '\n'
+
+def unsupported_language_response(code) -> Tuple[Dict[str, any], int]:
+    """(payload, status) for a target language with no supported canonical code"""
+    return {'success': False, 'error': f'Unsupported target language: {code}',
+            'supported': SUPPORTED_TARGET_LANGUAGES}, 400
+
+def invalid_text_response() -> Tuple[Dict[str, any], int]:
+    """(payload, status) for a 'text' field that is not a string"""
+    return {'success': False, 'error': "'text' must be a string"}, 400
+
+def text_too_long_response() -> Tuple[Dict[str, any], int]:
+    """(payload, status) for a text over MAX_TEXT_LENGTH, refused before any quota is charged"""
+    return {'success': False, 'error': f'Text too long (max {MAX_TEXT_LENGTH} characters)'}, 413
 
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify(success=False, error=f'Request body too large (max {MAX_REQUEST_BYTES} bytes)'), 413
+
+def translation_failure_response(result: Dict[str, any]) -> Tuple[Dict[str, any], int]:
+    """Map a failed translation result to the (payload, status) returned by /translate"""
+    payload, status = _translation_failure_payload(result)
+    if 'chunks' in result:
+        payload['chunks'] = result['chunks']  # per-chunk errors for an oversized text
+    return payload, status
+
+def _translation_failure_payload(result: Dict[str, any]) -> Tuple[Dict[str, any], int]:
+    error_msg = result.get('error', 'Translation failed')
+    if result.get('deadline_exceeded'):
+        return {'success': False, 'error': error_msg, 'deadline_exceeded': True}, 504
+    if result.get('degraded'):
+        return {'success': False, 'error': error_msg, 'degraded': True, 'quota_mode': result.get('quota_mode')}, 503
+    if result.get('circuit_open') or result.get('overloaded'):
+        return {'success': False, 'error': error_msg, 'retry_after': result.get('retry_after')}, 503
+    if error_msg and "DeepL API calls from your IP" in error_msg:
+        # IP-based DeepL call rate limit exceeded
+        return {'success': False, 'error': error_msg, 'ip_rate_limit': result.get('ip_rate_limit')}, 429
+    if 'DeepL API error: 403' in error_msg:
+        return {'success': False, 'error': 'DeepL API error: 403 - Invalid API key or quota exceeded'}, 403
+    elif 'DeepL API error: 456' in error_msg:
+        return {'success': False, 'error': 'DeepL quota exceeded'}, 429
+    else:
+        return {'success': False, 'error': error_msg}, 500
+
+@app.route('/translate', methods=['POST'])
+def translate():
+    """Enhanced translation endpoint with smart caching and IP DeepL call rate limiting"""
+    key = request.headers.get('X-API-KEY')
+    if not key:
+        return jsonify(success=False, error='API key required'), 401
+    
+    # Check if a translation backend is configured
+    if not translation_backends.is_configured():
+        return jsonify(success=False, error='Translation service not configured. Please contact administrator.'), 503
+    
     body = request.get_json()
-    text = (body or {}).get('text', '').strip()
-    target_lang = body.get('target', 'ES')
+    text = (body or {}).get('text', '')
+    if not isinstance(text, str):
+        return json_response(*invalid_text_response())
+    text = text.strip()
+    target_lang = canonical.normalize_target_lang(body.get('target', 'ES'))
+    if not target_lang:
+        return json_response(*unsupported_language_response(body.get('target')))
+    source_lang = canonical.normalize_source_lang(body.get('source'))
+    if body.get('source') and not source_lang:
+        return jsonify(success=False, error=f"Unsupported source language: {body.get('source')}"), 400
+    if len(text) > MAX_TEXT_LENGTH:
+        return json_response(*text_too_long_response())
+    
+    # Validate API key and quota
+    error = charge_api_key(key)
+    if error:
+        payload, status = error
+        return jsonify(payload), status
     
     if not text:
         return jsonify(success=False, error='No text provided')
@@ -1085,21 +4052,16 @@ def translate():
     try:
         result = cache_orchestrator.handle_translation_request(
             text, target_lang, key, request=request,
-            endpoint_type='paid' if key != 'demo' else 'demo'
+            endpoint_type='paid' if key != 'demo' else 'demo',
+            deadline=Deadline.for_request('translate', request, g.get('request_started')),
+            segment=bool(body.get('segment', SEGMENT_LONG_TEXTS)),
+            source_lang=source_lang
         )
         
         # If translation failed due to API issues or explicit IP limit, catch that:
         if not result.get('success'):
-            error_msg = result.get('error', 'Translation failed')
-            if error_msg and "DeepL API calls from your IP" in error_msg:
-                # IP-based DeepL call rate limit exceeded
-                return jsonify(success=False, error=error_msg, ip_rate_limit=result.get('ip_rate_limit')), 429
-            if 'DeepL API error: 403' in error_msg:
-                return jsonify(success=False, error='DeepL API error: 403 - Invalid API key or quota exceeded'), 403
-            elif 'DeepL API error: 456' in error_msg:
-                return jsonify(success=False, error='DeepL quota exceeded'), 429
-            else:
-                return jsonify(success=False, error=error_msg), 500
+            payload, status = translation_failure_response(result)
+            return json_response(payload, status)
         
         return jsonify(result)
         
@@ -1113,40 +4075,42 @@ def translate_batch():
     if not key:
         return jsonify(success=False, error='API key required'), 401
     
-    # Validate API key
-    conn = sqlite3.connect('api_keys.db')
-    c = conn.cursor()
-    c.execute('SELECT uses FROM api_keys WHERE key=?', (key,))
-    row = c.fetchone()
-    if not row:
-        conn.close()
-        return jsonify(success=False, error='Invalid API key'), 401
-    
     body = request.get_json()
     texts = body.get('texts', [])
-    target_lang = body.get('target', 'ES')
+    target_lang = canonical.normalize_target_lang(body.get('target', 'ES'))
     
     if not texts or not isinstance(texts, list):
         return jsonify(success=False, error='No texts provided')
+    if not target_lang:
+        return json_response(*unsupported_language_response(body.get('target')))
     
     if len(texts) > 50:
         return jsonify(success=False, error='Too many texts (max 50)')
+    if not all(isinstance(text, str) for text in texts):
+        return json_response(*invalid_text_response())
     
-    # Check quota for batch
-    uses = row[0] + len(texts)
-    if uses > 2000:
-        conn.close()
-        return jsonify(success=False, error='Quota would be exceeded'), 403
-    
-    c.execute('UPDATE api_keys SET uses=? WHERE key=?', (uses, key))
-    conn.commit()
-    conn.close()
+    # Validate API key and check quota for batch
+    error = charge_api_key(key, len(texts), quota_error='Quota would be exceeded')
+    if error:
+        payload, status = error
+        return jsonify(payload), status
     
     # batch_translate applies smart DeepL IP call limiting ONLY for uncached requests
     try:
         call_endpoint_type = 'paid' if key != 'demo' else 'demo'
+        
+        # Streaming mode: one line per text as it resolves, cache hits first
+        if wants_ndjson():
+            indexed_results = cache_orchestrator.batch_translator.iter_batch(
+                texts, target_lang, request=request, api_key=key, endpoint_type=call_endpoint_type,
+                deadline=Deadline.for_request('translate-batch', request, g.get('request_started'))
+            )
+            return Response(stream_with_context(ndjson_lines(indexed_results)), mimetype='application/x-ndjson',
+                            headers={'X-Accel-Buffering': 'no'})
+        
         results = cache_orchestrator.batch_translator.translate_batch(
-            texts, target_lang, request=request, api_key=key, endpoint_type=call_endpoint_type
+            texts, target_lang, request=request, api_key=key, endpoint_type=call_endpoint_type,
+            deadline=Deadline.for_request('translate-batch', request, g.get('request_started'))
         )
         # Any IP-based limit blocking gets returned in the individual result(s)
         return jsonify(success=True, results=results)
@@ -1154,6 +4118,179 @@ def translate_batch():
     except Exception as e:
         return jsonify(success=False, error=str(e)), 500
 
+@app.route('/translate-multi', methods=['POST'])
+def translate_multi():
+    """Translate a text (or list of texts) into several target languages with one auth check and one charge"""
+    key = request.headers.get('X-API-KEY')
+    if not key:
+        return jsonify(success=False, error='API key required'), 401
+    
+    body = request.get_json(silent=True) or {}
+    single = 'text' in body
+    texts = [body.get('text')] if single else body.get('texts', [])
+    requested = body.get('targets', [])
+    targets = list(dict.fromkeys(canonical.normalize_target_lang(t) for t in requested))
+    
+    if not texts or not isinstance(texts, list) or not all(isinstance(t, str) and t.strip() for t in texts):
+        return jsonify(success=False, error='No text provided'), 400
+    if len(texts) > MULTI_MAX_TEXTS:
+        return jsonify(success=False, error=f'Too many texts (max {MULTI_MAX_TEXTS})'), 400
+    if not targets:
+        return jsonify(success=False, error='No target languages provided'), 400
+    unsupported = [str(t) for t in requested if not canonical.normalize_target_lang(t)]
+    if unsupported:
+        return jsonify(success=False, error=f"Unsupported target language(s): {', '.join(unsupported)}",
+                       supported=SUPPORTED_TARGET_LANGUAGES), 400
+    
+    if not translation_backends.is_configured():
+        return jsonify(success=False, error='Translation service not configured. Please contact administrator.'), 503
+    
+    # One auth check and one charge for every text/language pair
+    error = charge_api_key(key, len(texts) * len(targets), quota_error='Quota would be exceeded')
+    if error:
+        payload, status = error
+        return jsonify(payload), status
+    
+    try:
+        results = cache_orchestrator.handle_multi_target_request(
+            [t.strip() for t in texts], targets, key, request=request,
+            deadline=Deadline.for_request('translate-multi', request, g.get('request_started'))
+        )
+    except Exception as e:
+        return jsonify(success=False, error=f'Translation service error: {str(e)}'), 500
+    
+    if single:
+        return jsonify(success=True, text=texts[0],
+                       translations={lang: lang_results[0].get('translation') for lang, lang_results in results.items()},
+                       results={lang: lang_results[0] for lang, lang_results in results.items()})
+    return jsonify(success=True,
+                   translations=[{lang: results[lang][i].get('translation') for lang in targets} for i in range(len(texts))],
+                   results=results)
+
+@app.route('/translate-document', methods=['POST'])
+def translate_document():
+    """Translate an HTML fragment or JSON/i18n bundle, keeping its structure, with one auth check and one charge"""
+    key = request.headers.get('X-API-KEY')
+    if not key:
+        return jsonify(success=False, error='API key required'), 401
+    
+    body = request.get_json(silent=True) or {}
+    target_lang = canonical.normalize_target_lang(body.get('target', 'ES'))
+    if not target_lang:
+        return json_response(*unsupported_language_response(body.get('target')))
+    if body.get('document') is None:
+        return jsonify(success=False, error='No document provided'), 400
+    try:
+        document = documents.parse_document(body.get('document'), body.get('format'))
+    except ValueError as e:
+        return jsonify(success=False, error=str(e)), 400
+    
+    # Identical strings (in canonical form) are translated and charged once per document
+    strings = [canonical.normalize_text(text) for text in document.strings()]
+    unique = list(dict.fromkeys(strings))
+    if len(unique) > DOCUMENT_MAX_STRINGS:
+        return jsonify(success=False, error=f'Too many translatable strings (max {DOCUMENT_MAX_STRINGS})'), 413
+    if not unique:
+        return jsonify(success=True, document=body.get('document'), format=document.format,
+                       strings={'total': 0, 'unique': 0, 'cached': 0})
+    
+    if not translation_backends.is_configured():
+        return jsonify(success=False, error='Translation service not configured. Please contact administrator.'), 503
+    
+    error = charge_api_key(key, len(unique), quota_error='Quota would be exceeded')
+    if error:
+        payload, status = error
+        return jsonify(payload), status
+    
+    try:
+        results = cache_orchestrator.handle_multi_target_request(
+            unique, [target_lang], key, request=request,
+            deadline=Deadline.for_request('translate-document', request, g.get('request_started'))
+        )[target_lang]
+    except Exception as e:
+        return jsonify(success=False, error=f'Translation service error: {str(e)}'), 500
+    
+    summary = {'total': len(strings), 'unique': len(unique),
+               'cached': sum(1 for result in results if result.get('success') and result.get('cached'))}
+    failed = [result for result in results if not result.get('success')]
+    if failed:
+        # Translated strings are cached, so retrying the document only sends the failed ones upstream
+        payload, status = translation_failure_response(failed[0])
+        payload['strings'] = dict(summary, failed=len(failed))
+        return json_response(payload, status)
+    
+    translations = {text: result['translation'] for text, result in zip(unique, results)}
+    return jsonify(success=True,
+                   document=document.render({text: translations[canonical.normalize_text(text)]
+                                             for text in document.strings()}),
+                   format=document.format, strings=summary)
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Submit a large translation job; poll /jobs/<job_id> and page through /jobs/<job_id>/results"""
+    key = request.headers.get('X-API-KEY')
+    if not key:
+        return jsonify(success=False, error='API key required'), 401
+    
+    body = request.get_json(silent=True) or {}
+    texts = body.get('texts', [])
+    target_lang = canonical.normalize_target_lang(body.get('target', 'ES'))
+    
+    if not texts or not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+        return jsonify(success=False, error='No texts provided'), 400
+    if not target_lang:
+        return json_response(*unsupported_language_response(body.get('target')))
+    
+    if len(texts) > JOB_MAX_TEXTS:
+        return jsonify(success=False, error=f'Too many texts (max {JOB_MAX_TEXTS})'), 413
+    
+    if not translation_backends.is_configured():
+        return jsonify(success=False, error='Translation service not configured. Please contact administrator.'), 503
+    
+    # Nothing is charged up front; the job is charged per text it translates
+    remaining = get_remaining_quota(key)
+    if remaining is None:
+        return jsonify(success=False, error='Invalid API key'), 401
+    if remaining <= 0:
+        return jsonify(success=False, error='Quota exceeded'), 403
+    
+    job_manager.resume_jobs()
+    job_id = job_manager.create_job(key, texts, target_lang)
+    return jsonify(success=True, job_id=job_id, status=TranslationJobManager.QUEUED, total=len(texts),
+                   status_url=url_for('job_status', job_id=job_id),
+                   results_url=url_for('job_results', job_id=job_id)), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Progress of a translation job"""
+    key = request.headers.get('X-API-KEY')
+    if not key:
+        return jsonify(success=False, error='API key required'), 401
+    
+    job_manager.resume_jobs()
+    job = job_manager.get_job(job_id, key)
+    if not job:
+        return jsonify(success=False, error='Job not found'), 404
+    return jsonify(success=True, **job)
+
+@app.route('/jobs/<job_id>/results', methods=['GET'])
+def job_results(job_id):
+    """Page through a job's per-text results (?offset=0&limit=500)"""
+    key = request.headers.get('X-API-KEY')
+    if not key:
+        return jsonify(success=False, error='API key required'), 401
+    
+    job = job_manager.get_job(job_id, key)
+    if not job:
+        return jsonify(success=False, error='Job not found'), 404
+    
+    offset = max(0, request.args.get('offset', 0, type=int))
+    limit = min(max(1, request.args.get('limit', JOB_RESULTS_PAGE_SIZE, type=int)), JOB_RESULTS_MAX_PAGE_SIZE)
+    results = job_manager.get_results(job_id, offset, limit)
+    next_offset = offset + len(results) if offset + len(results) < job['total'] else None
+    return jsonify(success=True, job_id=job_id, status=job['status'], offset=offset,
+                   next_offset=next_offset, results=results)
+
 @app.route('/cache-populate', methods=['POST'])
 def populate_cache():
     """Populate priority cache for a language"""
@@ -1171,16 +4308,41 @@ def populate_cache():
         return jsonify(success=False, error='Invalid API key'), 401
     conn.close()
     
-    body = request.get_json()
-    target_lang = body.get('target_lang', 'ES')
+    cache_orchestrator.priority_cache.start_refresh_scheduler()
     
-    # Start background cache population
-    status = cache_orchestrator.priority_cache.populate_priority_cache(target_lang)
+    body = request.get_json(silent=True) or {}
+    target_langs = body.get('target_langs')
     
+    if target_langs is None:
+        target_lang = canonical.normalize_target_lang(body.get('target_lang', 'ES'))
+        if not target_lang:
+            return json_response(*unsupported_language_response(body.get('target_lang')))
+        
+        # Start background cache population
+        status = cache_orchestrator.priority_cache.populate_priority_cache(target_lang)
+        
+        return jsonify(
+            success=True, 
+            message=f'Cache population {status} for {target_lang}',
+            status=status
+        )
+    
+    # Several languages (or 'all'), warmed in parallel
+    if target_langs == 'all':
+        target_langs = SUPPORTED_TARGET_LANGUAGES
+    if not isinstance(target_langs, list) or not target_langs:
+        return jsonify(success=False, error='target_langs must be a list of languages or "all"'), 400
+    
+    unsupported = [str(lang) for lang in target_langs if not canonical.normalize_target_lang(lang)]
+    if unsupported:
+        return json_response(*unsupported_language_response(', '.join(unsupported)))
+    statuses = cache_orchestrator.priority_cache.populate_languages(
+        list(dict.fromkeys(canonical.normalize_target_lang(lang) for lang in target_langs))
+    )
     return jsonify(
-        success=True, 
-        message=f'Cache population {status} for {target_lang}',
-        status=status
+        success=True,
+        message=f'Cache population started for {len(statuses)} languages',
+        status=statuses
     )
 
 @app.route('/cache-status', methods=['GET'])
@@ -1200,7 +4362,9 @@ def cache_status():
         return jsonify(success=False, error='Invalid API key'), 401
     conn.close()
     
-    target_lang = request.args.get('lang', 'ES')
+    target_lang = canonical.normalize_target_lang(request.args.get('lang', 'ES'))
+    if not target_lang:
+        return json_response(*unsupported_language_response(request.args.get('lang')))
     
     cache_info = cache_orchestrator.priority_cache.get_cache_status(target_lang)
     return jsonify(cache_info)
@@ -1223,6 +4387,7 @@ def performance_metrics():
     conn.close()
     
     metrics = cache_orchestrator.get_performance_metrics()
+    metrics['realtime'] = translation_namespace.get_status()
     return jsonify(metrics)
 
 # ==== EXISTING ROUTES ====
@@ -1261,6 +4426,7 @@ def resend_verification():
     verification_url = f"{request.host_url.rstrip('/')}/verify-email?token={verification_token}"
     
     try:
+        ses_client = get_ses_client()
         if ses_client:
             ses_client.send_email(
                 Source=os.getenv('SES_EMAIL', 'noreply@argonautdigitalventures.com'),
@@ -1349,6 +4515,7 @@ def forgot_password():
         reset_url = f"{request.host_url.rstrip('/')}/reset-password?token={reset_token}"
         
         try:
+            ses_client = get_ses_client()
             if ses_client:
                 ses_client.send_email(
                     Source=os.getenv('SES_EMAIL', 'noreply@argonautdigitalventures.com'),
@@ -1501,7 +4668,7 @@ def stripe_webhook():
     sig_header = request.headers.get('Stripe-Signature')
     webhook_secret = os.getenv('STRIPE_WEBHOOK_SECRET')
     try:
-        event = stripe.Webhook.construct_event(payload, sig_header, webhook_secret)
+        event = get_stripe().Webhook.construct_event(payload, sig_header, webhook_secret)
     except Exception as e:
         print('Webhook signature verification failed:', e)
         return '', 400
@@ -1541,25 +4708,35 @@ def stripe_webhook():
 def demo_translate():
     """Demo translation endpoint (NO API KEY, but strict IP DeepL call limiting, only for uncached)"""
     body = request.get_json()
-    text = (body or {}).get('text', '').strip()
-    target_lang = body.get('target', 'ES')
+    text = (body or {}).get('text', '')
+    if not isinstance(text, str):
+        return json_response(*invalid_text_response())
+    text = text.strip()
+    target_lang = canonical.normalize_target_lang(body.get('target', 'ES'))
     
     if not text:
         return jsonify(success=False, error='No text provided')
+    if not target_lang:
+        return json_response(*unsupported_language_response(body.get('target')))
+    if len(text) > MAX_TEXT_LENGTH:
+        return json_response(*text_too_long_response())
     
-    # Check if DeepL API key is configured
-    if not DEEPL_API_KEY:
+    # Check if a translation backend is configured
+    if not translation_backends.is_configured():
         return jsonify(success=False, error='Translation service not configured')
     
     # Use smart cache orchestrator (no API key needed for demo)... pass request object so DeepL call limiting by IP can function
     try:
         result = cache_orchestrator.handle_translation_request(
-            text, target_lang, 'demo', request=request, endpoint_type='demo'
+            text, target_lang, 'demo', request=request, endpoint_type='demo',
+            deadline=Deadline.for_request('demo-translate', request, g.get('request_started'))
         )
         if not result.get('success'):
             error_msg = result.get('error', 'Translation failed')
             if error_msg and "DeepL API calls from your IP" in error_msg:
                 return jsonify(success=False, error=error_msg, ip_rate_limit=result.get('ip_rate_limit')), 429
+            if result.get('circuit_open') or result.get('overloaded') or result.get('degraded') or result.get('deadline_exceeded'):
+                return json_response(*translation_failure_response(result))
         return jsonify(result)
         
     except Exception as e:
@@ -1616,93 +4793,171 @@ def verify_email():
     flash('Email verified successfully! You can now log in.', 'success')
     return redirect(url_for('login'))
 
-@app.route('/resend-verification', methods=['POST'])
-def resend_verification():
-    data = request.get_json() or {}
-    email = data.get('email', '').lower().strip()
+# ==== REAL-TIME TRANSLATION (SOCKET.IO) ====
+
+# Created by init_socketio(): flask_socketio pulls in engineio's clients (and aiohttp), too slow for import time
+socketio = None
+
+class TranslationNamespace:
+    """
+    Authenticated real-time translation channel.
+    The API key is validated once per connection (auth {'apiKey': ...}, X-API-KEY header or ?api_key=).
+    Clients emit 'translate' {'id', 'text', 'target'}; the event is acknowledged immediately and the
+    result arrives as a 'translation' event carrying the same id. Each connection has its own message
+    rate limit and a cap on unanswered translations, so a fast sender is pushed back instead of queueing.
+    """
     
-    if not email:
-        return jsonify(success=False, error='Email is required')
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self._reset_state()
     
-    conn = sqlite3.connect('api_keys.db')
-    c = conn.cursor()
-    c.execute('SELECT id, full_name, email_verified FROM users WHERE email = ?', (email,))
-    row = c.fetchone()
+    def _reset_state(self):
+        self.lock = threading.Lock()
+        self.connections = {}
+        self.stats = defaultdict(int)
+        self._executor = None
+        self._executor_pid = None
     
-    if not row:
-        return jsonify(success=False, error='Email not found')
+    def reset_after_fork(self):
+        self._reset_state()
     
-    user_id, full_name, email_verified = row
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self.lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=SOCKET_WORKERS, thread_name_prefix='socket-translate')
+                self._executor_pid = os.getpid()
+            return self._executor
     
-    if email_verified == 1:
-        return jsonify(success=False, error='Email is already verified')
+    def register(self, server):
+        """Attach the event handlers to a SocketIO server"""
+        for event in ('connect', 'disconnect', 'translate'):
+            server.on(event, namespace=self.namespace)(getattr(self, f'on_{event}'))
     
-    # Generate new verification token
-    verification_token = uuid.uuid4().hex
-    verification_token_expires = datetime.now(timezone.utc) + timedelta(minutes=30)
+    def on_connect(self, auth=None):
+        from flask_socketio import ConnectionRefusedError
+        
+        key = (auth or {}).get('apiKey') or request.headers.get('X-API-KEY') or request.args.get('api_key')
+        if not key:
+            raise ConnectionRefusedError('API key required')
+        if get_remaining_quota(key) is None:
+            raise ConnectionRefusedError('Invalid API key')
+        
+        with self.lock:
+            self.connections[request.sid] = {
+                'key': key,
+                # Kept for IP-based DeepL call limiting of this connection's cache misses
+                'request': request._get_current_object(),
+                'in_flight': 0,
+                'window_start': time.time(),
+                'window_count': 0,
+                'translated': 0,
+                'rejected': 0
+            }
+            self.stats['connections'] += 1
     
-    c.execute('UPDATE users SET verification_token = ?, verification_token_expires = ? WHERE id = ?', 
-              (verification_token, verification_token_expires, user_id))
-    conn.commit()
-    conn.close()
+    def on_disconnect(self, reason=None):
+        with self.lock:
+            self.connections.pop(request.sid, None)
     
-    # Send verification email
-    verification_url = f"{request.host_url.rstrip('/')}/verify-email?token={verification_token}"
+    def on_translate(self, data):
+        """Accept a translation request; returns the acknowledgement sent to the client's callback"""
+        state = self.connections.get(request.sid)
+        if state is None:
+            return {'accepted': False, 'error': 'Not connected'}
+        
+        data = data if isinstance(data, dict) else {}
+        message_id = data.get('id')
+        text = data.get('text') or ''
+        if not isinstance(text, str):
+            return {'id': message_id, 'accepted': False, 'error': invalid_text_response()[0]['error']}
+        text = text.strip()
+        target_lang = canonical.normalize_target_lang(data.get('target', 'ES'))
+        if not text:
+            return {'id': message_id, 'accepted': False, 'error': 'No text provided'}
+        if not target_lang:
+            return {'id': message_id, 'accepted': False, 'error': f"Unsupported target language: {data.get('target')}"}
+        if len(text) > MAX_TEXT_LENGTH:
+            return {'id': message_id, 'accepted': False, 'error': text_too_long_response()[0]['error']}
+        
+        with self.lock:
+            now = time.time()
+            if now - state['window_start'] >= 1.0:
+                state['window_start'] = now
+                state['window_count'] = 0
+            if state['window_count'] >= SOCKET_RATE_LIMIT:
+                state['rejected'] += 1
+                return {'id': message_id, 'accepted': False, 'error': 'Rate limit exceeded',
+                        'retry_after': round(1.0 - (now - state['window_start']), 3)}
+            if state['in_flight'] >= SOCKET_MAX_IN_FLIGHT:
+                state['rejected'] += 1
+                return {'id': message_id, 'accepted': False, 'error': 'Too many translations in flight',
+                        'backpressure': True, 'in_flight': state['in_flight']}
+            state['window_count'] += 1
+            state['in_flight'] += 1
+        
+        error = charge_api_key(state['key'])
+        if error:
+            with self.lock:
+                state['in_flight'] -= 1
+            return {'id': message_id, 'accepted': False, 'error': error[0]['error']}
+        
+        self.executor.submit(self._translate, request.sid, state, message_id, text, target_lang)
+        return {'id': message_id, 'accepted': True, 'in_flight': state['in_flight']}
     
-    try:
-        if ses_client:
-            ses_client.send_email(
-                Source=os.getenv('SES_EMAIL', 'noreply@argonautdigitalventures.com'),
-                Destination={'ToAddresses': [email]},
-                Message={
-                    'Subject': {'Data': 'Verify Your Email - Argonaut Digital Ventures'},
-                    'Body': {
-                        'Html': {
-                            'Data': f'''
-                            <html>
-                            <head>
-                                <style>
-                                    body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                                    .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                                    .header {{ background: #dc2626; color: white; padding: 20px; text-align: center; }}
-                                    .content {{ background: #f8f9fa; padding: 30px; }}
-                                    .button {{ display: inline-block; background: #dc2626; color: white; padding: 12px 24px; text-decoration: none; border-radius: 5px; }}
-                                    .footer {{ padding: 20px; text-align: center; font-size: 12px; color: #666; }}
-                                </style>
-                            </head>
-                            <body>
-                                <div class="container">
-                                    <div class="header">
-                                        <h1>Email Verification</h1>
-                                    </div>
-                                    <div class="content">
-                                        <h2>Hi {full_name or 'there'}!</h2>
-                                        <p>Here's your new verification link to complete your registration:</p>
-                                        <p style="text-align: center; margin: 30px 0;">
-                                            <a href="{verification_url}" class="button">Verify Your Email</a>
-                                        </p>
-                                        <p>Or copy and paste this link into your browser:</p>
-                                        <p style="word-break: break-all; color: #666;">{verification_url}</p>
-                                        <p><strong>This link will expire in 30 minutes.</strong></p>
-                                    </div>
-                                    <div class="footer">
-                                        <p> 2025 Argonaut Digital Ventures. All rights reserved.</p>
-                                    </div>
-                                </div>
-                            </body>
-                            </html>
-                            '''
-                        }
-                    }
-                }
+    def _translate(self, sid: str, state: Dict[str, any], message_id, text: str, target_lang: str):
+        key = state['key']
+        try:
+            result = cache_orchestrator.handle_translation_request(
+                text, target_lang, key, request=state['request'],
+                endpoint_type='paid' if key != 'demo' else 'demo',
+                deadline=Deadline(REQUEST_DEADLINES['translate'])
             )
-            return jsonify(success=True, message='Verification email sent successfully')
-        else:
-            return jsonify(success=False, error='Email service not configured')
-            
-    except ClientError as e:
-        print(f"SES send failed: {e}")
-        return jsonify(success=False, error='Failed to send verification email')
+            if result.get('success'):
+                payload = dict(result, status=200)
+            else:
+                payload, status = translation_failure_response(result)
+                payload = dict(payload, status=status)
+        except Exception as e:
+            payload = {'success': False, 'error': f'Translation service error: {str(e)}', 'status': 500}
+        finally:
+            with self.lock:
+                state['in_flight'] -= 1
+                state['translated'] += 1
+        
+        socketio.emit('translation', dict(payload, id=message_id), to=sid, namespace=self.namespace)
+    
+    def get_status(self) -> Dict[str, any]:
+        with self.lock:
+            return {
+                'connections': len(self.connections),
+                'total_connections': self.stats['connections'],
+                'in_flight': sum(state['in_flight'] for state in self.connections.values()),
+                'rejected': sum(state['rejected'] for state in self.connections.values())
+            }
+
+translation_namespace = TranslationNamespace('/translate')
+
+def init_socketio():
+    """Create the Socket.IO server around the app once per process (from init_worker or __main__)"""
+    global socketio
+    if socketio is None:
+        from flask_socketio import SocketIO
+        
+        # Several gunicorn workers need sticky sessions at the proxy and a shared SOCKETIO_MESSAGE_QUEUE (e.g. redis://)
+        socketio = SocketIO(app, cors_allowed_origins='*', async_mode=os.getenv('SOCKETIO_ASYNC_MODE') or None,
+                            message_queue=os.getenv('SOCKETIO_MESSAGE_QUEUE') or None)
+        translation_namespace.register(socketio)
+    return socketio
+
+# ==== STARTUP TIME ====
+
+startup_time_ms = (time.perf_counter() - _import_started) * 1000
+if startup_time_ms > STARTUP_BUDGET_MS:
+    print(f"⚠️  WARNING: startup took {startup_time_ms:.0f}ms (budget {STARTUP_BUDGET_MS:.0f}ms)")
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=int(os.getenv('PORT', 8080)), debug=True)
+    ensure_schema()
+    job_manager.resume_jobs()
+    cache_orchestrator.priority_cache.start_refresh_scheduler()
+    init_socketio().run(app, host='0.0.0.0', port=int(os.getenv('PORT', 8080)), debug=True, allow_unsafe_werkzeug=True)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Schema migrations for the Enhanced TranslateAll API
+
+Run once per deploy, before workers start:
+    python migrations.py
+    flask --app main migrate-db
+
+Each migration runs exactly once per database, tracked with SQLite's
+PRAGMA user_version. This module only depends on the standard library (and
+canonical.py, which does too) so that it can run in the gunicorn master or a
+release phase without importing the app and its heavy clients.
+"""
+
+import sqlite3
+import sys
+import time
+
+import canonical
+
+DB_PATH = 'api_keys.db'
+
+
+def _migration_001_initial_schema(c):
+    """Core tables, priority/translation caches and IP rate limits"""
+    # Create users table with email verification fields
+    c.execute('''CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    full_name TEXT,
+                    email TEXT UNIQUE NOT NULL,
+                    password_hash TEXT NOT NULL,
+                    email_verified INTEGER DEFAULT 0,
+                    verification_token TEXT,
+                    verification_token_expires TIMESTAMP,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                  )''')
+
+    # Create password_resets table
+    c.execute('''CREATE TABLE IF NOT EXISTS password_resets (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    token TEXT NOT NULL,
+                    expires_at TIMESTAMP NOT NULL,
+                    used INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                  )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS api_keys (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    key TEXT UNIQUE NOT NULL,
+                    created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    uses INTEGER DEFAULT 0
+                  )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS subscriptions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    subscription_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (user_id) REFERENCES users (id)
+                  )''')
+
+    # Priority cache for critical/common messages
+    c.execute('''CREATE TABLE IF NOT EXISTS priority_cache (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        cache_key TEXT NOT NULL,
+        target_lang TEXT NOT NULL,
+        translation TEXT NOT NULL,
+        priority INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        expires_at TIMESTAMP NOT NULL,
+        uses INTEGER DEFAULT 0,
+        UNIQUE(cache_key, target_lang)
+    )''')
+
+    # Translation cache table for regular translations
+    c.execute('''CREATE TABLE IF NOT EXISTS translation_cache (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        text_hash TEXT NOT NULL,
+        source_text TEXT NOT NULL,
+        target_lang TEXT NOT NULL,
+        translation TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        expires_at TIMESTAMP NOT NULL,
+        uses INTEGER DEFAULT 0,
+        UNIQUE(text_hash, target_lang)
+    )''')
+
+    # IP rate limiting for actual DeepL API calls
+    c.execute('''CREATE TABLE IF NOT EXISTS ip_rate_limits (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ip_address TEXT NOT NULL,
+        endpoint_type TEXT NOT NULL,
+        minute_count INTEGER DEFAULT 0,
+        hour_count INTEGER DEFAULT 0,
+        day_count INTEGER DEFAULT 0,
+        minute_reset TIMESTAMP NOT NULL,
+        hour_reset TIMESTAMP NOT NULL,
+        day_reset TIMESTAMP NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(ip_address, endpoint_type)
+    )''')
+
+
+def _migration_002_translation_jobs(c):
+    """Persistent background translation jobs and their per-text items"""
+    c.execute('''CREATE TABLE IF NOT EXISTS translation_jobs (
+        id TEXT PRIMARY KEY,
+        api_key TEXT NOT NULL,
+        target_lang TEXT NOT NULL,
+        status TEXT NOT NULL,
+        total INTEGER NOT NULL,
+        succeeded INTEGER DEFAULT 0,
+        failed INTEGER DEFAULT 0,
+        charged INTEGER DEFAULT 0,
+        error TEXT,
+        worker TEXT,
+        heartbeat_at REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        completed_at TIMESTAMP
+    )''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_translation_jobs_status ON translation_jobs (status)')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS translation_job_items (
+        job_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        source_text TEXT NOT NULL,
+        translation TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        error TEXT,
+        attempts INTEGER DEFAULT 0,
+        PRIMARY KEY (job_id, idx)
+    )''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_translation_job_items_pending ON translation_job_items (job_id, status, idx)')
+
+
+def _migration_003_priority_cache_state(c):
+    """Per-language priority cache population state, shared by all workers"""
+    c.execute('''CREATE TABLE IF NOT EXISTS priority_cache_state (
+        target_lang TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        error TEXT,
+        worker TEXT,
+        started_at REAL,
+        completed_at REAL,
+        refresh_at REAL
+    )''')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_priority_cache_state_refresh ON priority_cache_state (status, refresh_at)')
+
+
+def _migration_004_cache_revalidation(c):
+    """Lease for the single background refresh of a stale translation cache entry"""
+    c.execute('ALTER TABLE translation_cache ADD COLUMN revalidate_at REAL')
+
+
+def _migration_005_hot_phrases(c):
+    """(text, language) pairs promoted into the priority cache from live traffic"""
+    c.execute('''CREATE TABLE IF NOT EXISTS hot_phrases (
+        cache_key TEXT NOT NULL,
+        target_lang TEXT NOT NULL,
+        source_text TEXT NOT NULL,
+        hits INTEGER NOT NULL,
+        last_hot_at REAL NOT NULL,
+        promoted_at REAL,
+        PRIMARY KEY (cache_key, target_lang)
+    )''')
+
+
+def _migration_006_canonical_cache_keys(c):
+    """Re-key translation_cache on canonical text/language, merging rows that collapse onto one key"""
+    c.execute('''SELECT id, text_hash, source_text, target_lang, expires_at, uses
+                 FROM translation_cache ORDER BY expires_at DESC, id DESC''')
+    merged = {}
+    for row_id, text_hash, source_text, target_lang, expires_at, uses in c.fetchall():
+        key = (canonical.text_hash(source_text),
+               canonical.normalize_target_lang(target_lang) or target_lang)
+        if key in merged:
+            # Rows come freshest first; later duplicates only contribute their usage counts
+            merged[key]['uses'] += uses or 0
+            merged[key]['drop'].append(row_id)
+        else:
+            merged[key] = {'id': row_id, 'old': (text_hash, source_text, target_lang),
+                           'text': canonical.normalize_text(source_text), 'uses': uses or 0, 'drop': []}
+
+    drop = [(row_id,) for entry in merged.values() for row_id in entry['drop']]
+    c.executemany('DELETE FROM translation_cache WHERE id=?', drop)
+    # Park the survivors on temporary keys first so re-keying never trips UNIQUE(text_hash, target_lang)
+    changed = [(key, entry) for key, entry in merged.items()
+               if entry['drop'] or entry['old'] != (key[0], entry['text'], key[1])]
+    c.executemany("UPDATE translation_cache SET text_hash='migrating:' || id WHERE id=?",
+                  [(entry['id'],) for _, entry in changed])
+    c.executemany('UPDATE translation_cache SET text_hash=?, source_text=?, target_lang=?, uses=? WHERE id=?',
+                  [(key[0], entry['text'], key[1], entry['uses'], entry['id']) for key, entry in changed])
+
+
+# Append new migrations here; never edit or reorder applied ones
+SCHEMA_MIGRATIONS = [
+    _migration_001_initial_schema,
+    _migration_002_translation_jobs,
+    _migration_003_priority_cache_state,
+    _migration_004_cache_revalidation,
+    _migration_005_hot_phrases,
+    _migration_006_canonical_cache_keys,
+]
+
+SCHEMA_VERSION = len(SCHEMA_MIGRATIONS)
+
+
+def get_schema_version(db_path: str = DB_PATH) -> int:
+    """Return the schema version recorded in the database"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def migrate_db(db_path: str = DB_PATH) -> int:
+    """Apply all pending migrations; safe to call concurrently from several processes"""
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        if conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+            return SCHEMA_VERSION
+
+        # Serialize concurrent migrators; re-read the version under the write lock
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            c = conn.cursor()
+            for number, migration in enumerate(SCHEMA_MIGRATIONS[version:], start=version + 1):
+                migration(c)
+                c.execute(f'PRAGMA user_version = {number}')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return SCHEMA_VERSION
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    path = sys.argv[1] if len(sys.argv) > 1 else DB_PATH
+    before = get_schema_version(path)
+    after = migrate_db(path)
+    print(f"✅ Schema at version {after} (was {before}) in {(time.perf_counter() - start) * 1000:.1f}ms")
@@ -0,0 +1,32 @@
+"""
+Shared fixtures for the unit tests (run with: python -m pytest tests)
+
+main.py is imported with the echo backend so nothing calls DeepL, and every
+test gets a fresh SQLite database in its own temporary directory.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('TRANSLATION_BACKENDS', 'echo')
+
+import main  # noqa: E402
+import migrations  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Path of a migrated, empty api_keys.db in the test's working directory"""
+    monkeypatch.chdir(tmp_path)
+    migrations.migrate_db()
+    monkeypatch.setattr(main, '_schema_ready', True)
+    return str(tmp_path / migrations.DB_PATH)
+
+
+@pytest.fixture
+def cacheable_echo(monkeypatch):
+    """Let the echo backend's output into the caches, for tests of the caching itself"""
+    monkeypatch.setattr(main.EchoBackend, 'test_only', False)
@@ -0,0 +1,75 @@
+import pytest
+
+import main
+
+Scheduler = main.UpstreamScheduler
+NOW = 1700000000.0
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    monkeypatch.setattr(main.time, 'time', lambda: NOW)
+    return main.AdmissionController(max_in_flight=20, queue_delay_target=1.0)
+
+
+def shed(controller):
+    """Class names whose cache misses are shed at the controller's current load"""
+    names = []
+    for priority, name in Scheduler.CLASS_NAMES.items():
+        try:
+            controller.admit(priority)
+        except main.UpstreamOverloadedError:
+            names.append(name)
+    return names
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('t=1700000000.5', 1700000000.5),
+    ('1700000000', 1700000000.0),
+    ('t=1700000000500', 1700000000.5),       # milliseconds
+    ('t=1700000000500000', 1700000000.5),    # microseconds
+    (' t=1700000000.5 ', 1700000000.5),
+    ('t=soon', None),
+    ('', None),
+    (None, None),
+])
+def test_parse_request_start(value, expected):
+    assert main.AdmissionController.parse_request_start(value) == expected
+
+
+def test_in_flight_load_sheds_per_class(controller):
+    for in_flight, expected in [(12, []),
+                                (13, ['demo', 'background']),
+                                (17, ['demo', 'background']),
+                                (18, ['paid_batch', 'demo', 'background']),
+                                (40, ['paid_batch', 'demo', 'background'])]:
+        controller.in_flight = in_flight
+        assert shed(controller) == expected, in_flight
+    assert controller.stats['paid_interactive']['admitted'] == 5
+    assert controller.stats['demo']['shed'] == 4
+
+
+def test_request_start_header_measures_queue_delay(controller):
+    controller.request_started({'X-Request-Start': f't={(NOW - 0.7) * 1e6:.0f}'}, NOW)
+    assert controller.queue_delay() == pytest.approx(0.7)
+    assert shed(controller) == ['demo', 'background']
+
+    controller.request_started({'X-Request-Start': f't={NOW - 0.9}'}, NOW)
+    controller.request_started({'X-Request-Start': f't={NOW - 0.9}'}, NOW)
+    assert controller.queue_delay() == pytest.approx(0.9)
+    assert shed(controller) == ['paid_batch', 'demo', 'background']
+
+
+def test_old_queue_delays_age_out(controller):
+    controller.request_started({'X-Request-Start': f't={NOW - 15}'}, NOW - 11)
+    controller.request_started({}, NOW)
+    assert controller.queue_delay() == 0.0
+    assert controller.in_flight == 2
+
+
+def test_request_finished_never_goes_negative(controller):
+    controller.request_started({}, NOW)
+    controller.request_finished()
+    controller.request_finished()
+    assert controller.in_flight == 0
+    assert shed(controller) == []
@@ -0,0 +1,63 @@
+import sqlite3
+
+import pytest
+
+import main
+
+
+class FakeDeepL(main.TranslationBackend):
+    name = 'fake'
+    default_latency = 0.5
+
+    def translate_batch(self, texts, target_lang, deadline=None, source_lang=None):
+        return [f'<{target_lang}> {text}' for text in texts]
+
+
+@pytest.fixture
+def chain(monkeypatch):
+    monkeypatch.setitem(main.TRANSLATION_BACKEND_TYPES, 'fake', FakeDeepL)
+    chain = main.TranslationBackendChain(['echo', 'fake'])
+    monkeypatch.setattr(main, 'translation_backends', chain)
+    return chain
+
+
+def cached_translations():
+    conn = sqlite3.connect('api_keys.db')
+    rows = [row[0] for row in conn.execute('SELECT translation FROM translation_cache')]
+    conn.close()
+    return rows
+
+
+@pytest.mark.parametrize('order', ['latency', 'cost', 'config'])
+def test_test_only_backends_come_last_in_every_order(chain, order):
+    chain.order = order
+    assert [b.name for b in chain.ordered_backends()] == ['fake', 'echo']
+
+
+def test_test_only_backend_is_last_resort(chain, monkeypatch):
+    def down(*args, **kwargs):
+        raise main.DeepLError(503, 'Service unavailable')
+    monkeypatch.setattr(chain.backends[1], 'translate_batch', down)
+    assert chain.translate_batch(['Hi'], 'DE') == (['[DE] Hi'], 'echo')
+
+
+def test_echo_output_is_never_cached(db):
+    batcher = main.cache_orchestrator.batch_translator
+    result = batcher.translate_single('Hello there', 'DE')
+    assert result['success'] and result['backend'] == 'echo'
+    assert cached_translations() == []
+
+
+def test_real_backend_output_is_cached(db, chain):
+    result = main.cache_orchestrator.batch_translator.translate_single('Hello there', 'DE')
+    assert result['backend'] == 'fake'
+    assert cached_translations() == ['<DE> Hello there']
+
+
+def test_expired_open_circuit_counts_as_available(monkeypatch):
+    backend = FakeDeepL()
+    backend.breaker = main.UpstreamCircuitBreaker('test', failure_threshold=1, open_seconds=30)
+    backend.breaker.record_failure(RuntimeError('down'))
+    assert not backend.is_available()
+    backend.breaker.open_until = 0.0
+    assert backend.is_available()
@@ -0,0 +1,40 @@
+import sqlite3
+
+import canonical
+import main
+
+ENGLISH = 'Thank you for your purchase, we will send you a confirmation shortly.'
+
+
+def cache_rows():
+    conn = sqlite3.connect('api_keys.db')
+    rows = conn.execute('SELECT text_hash, target_lang FROM translation_cache').fetchall()
+    conn.close()
+    return rows
+
+
+def test_only_an_explicit_source_scopes_the_key():
+    detected = canonical.DetectedLanguage('EN')
+    assert canonical.text_hash(ENGLISH, detected) == canonical.text_hash(ENGLISH)
+    assert canonical.text_hash(ENGLISH, 'EN') != canonical.text_hash(ENGLISH)
+
+
+def test_detected_source_is_sent_upstream_but_not_cached_under(db, cacheable_echo, monkeypatch):
+    sent = []
+    backend = main.translation_backends.backends[0]
+    translate_batch = backend.translate_batch
+
+    def record(texts, target_lang, deadline=None, source_lang=None):
+        sent.append(source_lang)
+        return translate_batch(texts, target_lang, deadline, source_lang)
+    monkeypatch.setattr(backend, 'translate_batch', record)
+
+    result = main.cache_orchestrator.handle_translation_request(ENGLISH, 'DE', 'demo')
+    assert result['success'] and result['source_lang'] == 'EN'
+    assert sent == ['EN']
+    assert cache_rows() == [(canonical.text_hash(ENGLISH), 'DE')]
+
+    # Priority-cache warming looks entries up without a source; it must find this one
+    key = main.HotPhraseTracker.key_for(ENGLISH)
+    assert main.cache_orchestrator.priority_cache.warm_hot_phrases('DE', {key: ENGLISH})
+    assert sent == ['EN']
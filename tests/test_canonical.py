@@ -0,0 +1,14 @@
+import canonical
+
+
+def test_text_hash_is_canonical():
+    assert canonical.text_hash('Hello   world ') == canonical.text_hash('Hello world')
+    assert canonical.text_hash('Hello world') != canonical.text_hash('hello world')
+
+
+def test_normalize_target_lang_aliases():
+    assert canonical.normalize_target_lang('en') == 'EN-US'
+    assert canonical.normalize_target_lang('es_ES') == 'ES'
+    assert canonical.normalize_target_lang('pt') == 'PT-PT'
+    assert canonical.normalize_target_lang('zh-TW') is None
+    assert canonical.normalize_source_lang('en-GB') == 'EN'
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+import main
+
+
+TEXT = '\n\n'.join([
+    'The first paragraph is here. It has two sentences.',
+    'FAIL this paragraph cannot be translated at all.',
+    'The first paragraph is here. It has two sentences.',
+    'FAIL this paragraph cannot be translated at all.',
+])
+
+
+@pytest.mark.parametrize('max_chars', [10, 40, 60, 1000])
+def test_split_chunks_round_trips_within_the_limit(max_chars):
+    text = '  ' + TEXT + '\nA sentence without any punctuation that runs on and on for a while\n'
+    prefix, chunks = main.split_chunks(text, max_chars)
+    assert main.join_segments(prefix, chunks, {c: c for c, _ in chunks}) == text
+    assert all(0 < len(chunk) <= max_chars for chunk, _ in chunks)
+
+
+def test_split_chunks_closes_at_paragraph_breaks():
+    _, chunks = main.split_chunks(TEXT, 60)
+    assert [c for c, _ in chunks] == TEXT.split('\n\n')
+
+
+@pytest.fixture
+def failing_upstream(db, monkeypatch):
+    """Echo backend that fails with 503 on texts containing FAIL; records attempts and backoff sleeps"""
+    calls, sleeps = [], []
+    backend = main.translation_backends.backends[0]
+    translate_batch = backend.translate_batch
+
+    def flaky(texts, target_lang, deadline=None, source_lang=None):
+        calls.append(texts[0])
+        if 'FAIL' in texts[0]:
+            raise main.DeepLError(503, 'Service unavailable')
+        return translate_batch(texts, target_lang, deadline, source_lang)
+
+    async def flaky_async(texts, target_lang, deadline=None, source_lang=None):
+        return flaky(texts, target_lang, deadline, source_lang)
+
+    async def no_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(backend, 'translate_batch', flaky)
+    monkeypatch.setattr(backend, 'translate_batch_async', flaky_async)
+    monkeypatch.setattr(main, 'CHUNK_MAX_CHARS', 60)
+    monkeypatch.setattr(main.upstream_retry_policy, 'backoff', lambda attempt, retry_after=None: 0.25)
+    monkeypatch.setattr(main.time, 'sleep', sleeps.append)
+    monkeypatch.setattr(main.asyncio, 'sleep', no_sleep)
+    return calls, sleeps
+
+
+def check_failed_result(result, calls, sleeps):
+    assert not result['success']
+    assert [failed['index'] for failed in result['chunks']['failed']] == [1, 3]
+    assert result['error'].startswith('2 of 4 chunks failed')
+    # The failing chunk was tried CHUNK_MAX_ATTEMPTS times, with a backoff pause between attempts
+    assert sum('FAIL' in text for text in calls) == main.CHUNK_MAX_ATTEMPTS
+    assert sleeps.count(0.25) == main.CHUNK_MAX_ATTEMPTS - 1
+
+
+def test_failed_chunks_are_retried_with_backoff_and_reported_by_position(failing_upstream):
+    calls, sleeps = failing_upstream
+    result = main.cache_orchestrator.batch_translator.translate_chunked(TEXT, 'DE')
+    check_failed_result(result, calls, sleeps)
+
+
+def test_async_failed_chunks_are_retried_with_backoff_and_reported_by_position(failing_upstream):
+    calls, sleeps = failing_upstream
+    result = asyncio.run(main.cache_orchestrator.batch_translator.translate_chunked_async(TEXT, 'DE'))
+    check_failed_result(result, calls, sleeps)
+
+
+def test_chunk_is_not_retried_past_the_deadline(failing_upstream, monkeypatch):
+    calls, sleeps = failing_upstream
+    monkeypatch.setattr(main.upstream_retry_policy, 'backoff', lambda attempt, retry_after=None: 3600.0)
+    result = main.cache_orchestrator.batch_translator.translate_chunked(TEXT, 'DE')
+    assert not result['success']
+    assert sum('FAIL' in text for text in calls) == 1
+    assert 3600.0 not in sleeps
+
+
+def test_chunked_translation_stitches_in_order(db, monkeypatch):
+    monkeypatch.setattr(main, 'CHUNK_MAX_CHARS', 60)
+    text = TEXT.replace('FAIL', 'Now')
+    result = main.cache_orchestrator.batch_translator.translate_chunked(text, 'DE')
+    assert result['success'] and result['chunks'] == {'total': 2, 'cached': 0}
+    assert result['translation'] == '\n\n'.join('[DE] ' + p for p in text.split('\n\n'))
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = main.UpstreamCircuitBreaker('test', failure_threshold=2, open_seconds=30)
+    monkeypatch.setattr(main, 'deepl_breaker', breaker)
+    monkeypatch.setattr(main.time, 'sleep', lambda seconds: None)
+    return breaker
+
+
+def open_and_expire(breaker):
+    breaker.record_failure(RuntimeError('down'), force_open=True)
+    breaker.open_until = 0.0
+
+
+def test_opens_after_threshold_and_fails_fast(breaker):
+    breaker.record_failure(RuntimeError('1'))
+    assert breaker.state == breaker.CLOSED
+    breaker.record_failure(RuntimeError('2'))
+    assert breaker.state == breaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_after() >= 1.0
+
+
+def test_half_open_allows_a_single_probe(breaker):
+    open_and_expire(breaker)
+    assert breaker.allow_request()
+    assert breaker.state == breaker.HALF_OPEN
+    assert not breaker.allow_request()
+
+
+def test_successful_probe_closes(breaker):
+    open_and_expire(breaker)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED
+    assert breaker.consecutive_failures == 0
+
+
+def test_failed_probe_reopens(breaker):
+    open_and_expire(breaker)
+    assert breaker.allow_request()
+    breaker.record_failure(RuntimeError('still down'))
+    assert breaker.state == breaker.OPEN
+    assert not breaker.probe_in_flight
+
+
+def test_stuck_probe_is_reclaimed_after_timeout(breaker, monkeypatch):
+    open_and_expire(breaker)
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.probe_started -= main.CIRCUIT_PROBE_TIMEOUT
+    assert breaker.allow_request()
+    assert breaker.stats['probes_reclaimed'] == 1
+
+
+def test_unclassified_probe_error_reopens(breaker, monkeypatch):
+    open_and_expire(breaker)
+    client = main.DeepLClient(api_key='test')
+
+    def malformed(*args, **kwargs):
+        raise ValueError('malformed 200 body')
+    monkeypatch.setattr(client, '_post', malformed)
+
+    with pytest.raises(ValueError):
+        client.translate(['Hello'], 'DE')
+    assert breaker.state == breaker.OPEN
+    assert not breaker.probe_in_flight
+
+
+def test_cancelled_async_probe_releases_the_probe(breaker, monkeypatch):
+    open_and_expire(breaker)
+    client = main.AsyncDeepLClient(api_key='test')
+
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(60)
+    monkeypatch.setattr(client, '_post', hang)
+
+    async def cancel_probe():
+        task = asyncio.ensure_future(client.translate(['Hello'], 'DE'))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_probe())
+    assert breaker.state == breaker.HALF_OPEN
+    assert not breaker.probe_in_flight
+    assert breaker.allow_request()
+
+
+def test_bad_request_does_not_count_against_upstream(breaker, monkeypatch):
+    client = main.DeepLClient(api_key='test')
+
+    def bad_request(*args, **kwargs):
+        raise main.DeepLError(400, 'Value for target_lang not supported')
+    monkeypatch.setattr(client, '_post', bad_request)
+
+    for _ in range(3):
+        with pytest.raises(main.DeepLError):
+            client.translate(['Hello'], 'XX')
+    assert breaker.state == breaker.CLOSED
+
+
+def test_retryable_errors_are_retried_then_open(breaker, monkeypatch):
+    client = main.DeepLClient(api_key='test')
+    calls = []
+
+    def unavailable(*args, **kwargs):
+        calls.append(1)
+        raise main.DeepLError(503, 'Service unavailable')
+    monkeypatch.setattr(client, '_post', unavailable)
+
+    with pytest.raises(main.DeepLError):
+        client.translate(['Hello'], 'DE')
+    assert len(calls) == 2
+    assert breaker.state == breaker.OPEN
@@ -0,0 +1,52 @@
+import pytest
+
+import translateall_client
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.headers = {}
+        self.text = ''
+        self._payload = payload or {'success': False, 'error': f'HTTP {status_code}'}
+
+    def json(self):
+        return self._payload
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(translateall_client.time, 'sleep', lambda seconds: None)
+    with translateall_client.TranslateAllClient('key', max_retries=3) as client:
+        client.sent = []
+        yield client
+
+
+def respond(client, *statuses):
+    responses = iter(statuses)
+
+    def request(method, url, **kwargs):
+        client.sent.append(method)
+        status = next(responses)
+        return FakeResponse(status, {'success': True, 'results': []} if status == 200 else None)
+    client.session.request = request
+
+
+@pytest.mark.parametrize('status', [500, 502, 504])
+def test_post_is_not_resent_after_the_server_may_have_processed_it(client, status):
+    respond(client, status, 200)
+    assert client._request('POST', '/translate-batch', json={})[0] == status
+    assert client.sent == ['POST']
+
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_post_is_retried_when_turned_away(client, status):
+    respond(client, status, 200)
+    assert client._request('POST', '/translate-batch', json={})[0] == 200
+    assert client.sent == ['POST', 'POST']
+
+
+def test_get_is_retried_on_server_errors(client):
+    respond(client, 500, 502, 200)
+    assert client._request('GET', '/performance-metrics')[0] == 200
+    assert client.sent == ['GET', 'GET', 'GET']
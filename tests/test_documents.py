@@ -0,0 +1,90 @@
+import pytest
+
+import documents
+
+
+def html(source):
+    return documents.parse_document(source)
+
+
+def test_node_spans_map_back_to_the_source():
+    source = '<div>\n  <h1 class="title">Welcome home</h1>\n<p>First line\nsecond line</p>\n</div>'
+    doc = html(source)
+    spans = [source[start:end] for start, end, kind, _ in doc.nodes]
+    assert spans == ['Welcome home', 'First line\nsecond line']
+    assert doc.strings() == ['Welcome home', 'First line second line']
+
+
+def test_trailing_text_runs_to_the_end_of_the_source():
+    source = '<br>\nGoodbye, see you soon'
+    doc = html(source)
+    assert [source[start:end] for start, end, _, _ in doc.nodes] == ['\nGoodbye, see you soon']
+
+
+def test_render_keeps_everything_else_byte_for_byte():
+    source = ('<!DOCTYPE html>\n<!-- header -->\n<p CLASS=intro>Hello  <br/>world</p>'
+              '<script>var s = "Hello";</script><img src=logo.png alt=Logo>')
+    doc = html(source)
+    assert doc.render({}) == source
+    assert doc.render({'Hello': 'Hallo', 'world': 'Welt', 'Logo': 'Logo'}) == (
+        '<!DOCTYPE html>\n<!-- header -->\n<p CLASS=intro>Hallo  <br/>Welt</p>'
+        '<script>var s = "Hello";</script><img src="logo.png" alt="Logo">')
+
+
+def test_surrounding_whitespace_is_kept():
+    doc = html('<p>\n    Hello   there\n</p>')
+    assert doc.strings() == ['Hello there']
+    assert doc.render({'Hello there': 'Hallo'}) == '<p>\n    Hallo\n</p>'
+
+
+def test_entities_are_decoded_then_escaped_again():
+    doc = html('<p>Fish &amp; chips &lt;3</p><img alt="Tom &quot;the cat&quot;">')
+    assert doc.strings() == ['Fish & chips <3', 'Tom "the cat"']
+    assert doc.render({'Fish & chips <3': 'Fisch & Pommes <3', 'Tom "the cat"': 'Tom "der Kater" & Co'}) == (
+        '<p>Fisch &amp; Pommes &lt;3</p><img alt="Tom &quot;der Kater&quot; &amp; Co">')
+
+
+def test_unclosed_tags_are_tolerated():
+    source = '<ul><li>One<li>Two</ul><p>Three <code>x = one</p> four'
+    doc = html(source)
+    assert doc.strings() == ['One', 'Two', 'Three', 'four']
+    assert doc.render({'One': '1', 'Two': '2', 'Three': '3', 'four': '4'}) == (
+        '<ul><li>1<li>2</ul><p>3 <code>x = one</p> 4')
+
+
+@pytest.mark.parametrize('marker', ['translate="no"', 'translate=NO', 'class="brand notranslate"'])
+def test_opted_out_elements_are_skipped(marker):
+    doc = html(f'<p {marker}>Acme <b>Widget</b> <img alt="Acme logo"></p><p>Buy now</p>')
+    assert doc.strings() == ['Buy now']
+
+
+def test_skip_tags_and_code_like_strings():
+    doc = html('<pre>Keep this</pre><style>p { color: red }</style><p>icon_home</p>'
+               '<p>https://example.com/a</p><p>42</p><p>Real text</p>')
+    assert doc.strings() == ['Real text']
+
+
+def test_translated_attributes_rebuild_the_tag():
+    source = '<img src=a.png alt="A cat" data-id=\'7\' hidden/><input placeholder="Search" type=text>'
+    doc = html(source)
+    assert doc.strings() == ['A cat', 'Search']
+    assert doc.render({'A cat': 'Eine Katze'}) == (
+        '<img src="a.png" alt="Eine Katze" data-id="7" hidden /><input placeholder="Search" type=text>')
+
+
+def test_inline_markup_splits_a_sentence():
+    # Known limitation (see README): inline elements end a text node
+    doc = html('<p>Click <b>here</b> now</p>')
+    assert doc.strings() == ['Click', 'here', 'now']
+
+
+def test_json_documents_translate_values_not_keys():
+    doc = documents.parse_document('{"title": "Hello", "@title": {"description": "Greeting"}, "url": "a/b"}', 'json')
+    assert doc.strings() == ['Hello']
+    assert doc.render({'Hello': 'Hallo'}) == '{"title": "Hallo", "@title": {"description": "Greeting"}, "url": "a/b"}'
+
+
+@pytest.mark.parametrize('document, fmt', [(['a'], 'html'), ('{', 'json'), (3, None), ('<p>x</p>', 'xml')])
+def test_parse_document_rejects_bad_input(document, fmt):
+    with pytest.raises(ValueError):
+        documents.parse_document(document, fmt)
@@ -0,0 +1,57 @@
+import random
+
+import main
+
+
+def check_summary(sketch):
+    """The count buckets mirror the counters, and min_count is the smallest counter"""
+    assert {item: count for count, bucket in sketch.buckets.items() for item in bucket} == \
+        {item: count for item, (count, _) in sketch.counts.items()}
+    assert sketch.min_count == min((count for count, _ in sketch.counts.values()), default=0)
+
+
+def test_sketch_counts_exactly_until_full():
+    sketch = main.SpaceSavingSketch(3)
+    for item in 'aabbbc':
+        sketch.add(item)
+    assert sketch.heavy_hitters(1) == {'a': 2, 'b': 3, 'c': 1}
+    check_summary(sketch)
+
+
+def test_eviction_replaces_the_smallest_counter_and_inherits_its_count():
+    sketch = main.SpaceSavingSketch(2)
+    for item in 'aaab':
+        sketch.add(item)
+    sketch.add('c')
+    assert 'b' not in sketch.counts
+    assert sketch.counts['c'] == [2, 1]
+    assert sketch.heavy_hitters(2) == {'a': 3}
+    check_summary(sketch)
+
+
+def test_heavy_hitters_survive_a_long_skewed_stream():
+    rng = random.Random(7)
+    sketch = main.SpaceSavingSketch(50)
+    stream = ['hot'] * 2000 + ['warm'] * 800 + [f'cold-{rng.randrange(5000)}' for _ in range(7000)]
+    rng.shuffle(stream)
+    for item in stream:
+        sketch.add(item)
+        if rng.random() < 0.01:
+            check_summary(sketch)
+    check_summary(sketch)
+    # Space-Saving never underestimates, and the counters add up to the stream length
+    assert sketch.counts['hot'][0] >= 2000 and sketch.counts['warm'][0] >= 800
+    assert sum(count for count, _ in sketch.counts.values()) == len(stream)
+    assert set(sketch.heavy_hitters(500)) == {'hot', 'warm'}
+
+
+def test_decay_halves_and_drops_cold_items():
+    sketch = main.SpaceSavingSketch(3)
+    for item in 'aaaab':
+        sketch.add(item)
+    sketch.decay()
+    assert sketch.counts == {'a': [2, 0]}
+    check_summary(sketch)
+    sketch.add('b')
+    assert sketch.min_count == 1
+    check_summary(sketch)
@@ -0,0 +1,100 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def jobs(db, monkeypatch):
+    """A job manager that records submissions instead of running them"""
+    manager = main.TranslationJobManager(workers=1)
+    submitted = []
+    monkeypatch.setattr(manager, 'run_job', submitted.append)
+    monkeypatch.setattr(manager, '_executor', type('Pool', (), {'submit': lambda self, fn, *args: fn(*args)})())
+    monkeypatch.setattr(manager, '_executor_pid', main.os.getpid())
+    manager.submitted = submitted
+    return manager
+
+
+def insert_job(job_id, status, heartbeat_at=None, texts=('Hello',)):
+    conn = sqlite3.connect('api_keys.db')
+    conn.execute('''INSERT INTO translation_jobs (id, api_key, target_lang, status, total, heartbeat_at, worker)
+                    VALUES (?, 'key', 'DE', ?, ?, ?, '1')''', (job_id, status, len(texts), heartbeat_at))
+    conn.executemany('INSERT INTO translation_job_items (job_id, idx, source_text) VALUES (?, ?, ?)',
+                     [(job_id, i, text) for i, text in enumerate(texts)])
+    conn.commit()
+    conn.close()
+
+
+def job_row(job_id):
+    conn = sqlite3.connect('api_keys.db')
+    row = conn.execute('SELECT status, succeeded, charged FROM translation_jobs WHERE id=?', (job_id,)).fetchone()
+    conn.close()
+    return row
+
+
+def test_recover_picks_up_queued_and_stale_jobs_only(jobs):
+    now = time.time()
+    insert_job('queued', 'queued')
+    insert_job('fresh', 'running', heartbeat_at=now)
+    insert_job('stale', 'running', heartbeat_at=now - main.JOB_STALE_SECONDS - 1)
+    insert_job('done', 'completed', heartbeat_at=now - 3600)
+
+    assert sorted(jobs.recover_jobs()) == ['queued', 'stale']
+
+
+def test_job_running_at_restart_is_recovered_once_its_heartbeat_goes_stale(jobs, monkeypatch):
+    now = time.time()
+    insert_job('interrupted', 'running', heartbeat_at=now)
+    assert jobs.recover_jobs() == []
+
+    monkeypatch.setattr(main.time, 'time', lambda: now + main.JOB_STALE_SECONDS + 1)
+    assert jobs.recover_jobs() == ['interrupted']
+
+
+def test_claim_is_exclusive_until_the_heartbeat_goes_stale(jobs, monkeypatch):
+    insert_job('job', 'queued')
+    assert jobs._claim('job') == ('key', 'DE')
+    assert jobs._claim('job') is None
+
+    now = time.time()
+    monkeypatch.setattr(main.time, 'time', lambda: now + main.JOB_STALE_SECONDS + 1)
+    assert jobs._claim('job') == ('key', 'DE')
+
+
+def test_recovered_jobs_are_submitted_once(jobs):
+    insert_job('queued', 'queued')
+    assert jobs.recover_jobs() == ['queued']
+    assert jobs.recover_jobs() == []
+    assert jobs.submitted == ['queued']
+
+
+def test_concurrent_submits_queue_a_job_once(jobs):
+    barrier = threading.Barrier(8)
+
+    def submit():
+        barrier.wait()
+        jobs._submit('job')
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert jobs.submitted == ['job']
+
+
+def test_run_translates_charges_and_completes(jobs):
+    conn = sqlite3.connect('api_keys.db')
+    conn.execute("INSERT INTO api_keys (key, uses) VALUES ('key', 0)")
+    conn.commit()
+    conn.close()
+    insert_job('job', 'queued', texts=('Good morning', 'Good night', 'Good morning'))
+
+    main.TranslationJobManager.run_job(jobs, 'job')
+
+    assert job_row('job') == ('completed', 3, 3)
+    assert [r['translation'] for r in jobs.get_results('job', 0, 10)] == \
+        ['[DE] Good morning', '[DE] Good night', '[DE] Good morning']
@@ -0,0 +1,52 @@
+import hashlib
+import sqlite3
+
+import canonical
+import migrations
+
+
+def db_at_version(path, version):
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    for number, migration in enumerate(migrations.SCHEMA_MIGRATIONS[:version], start=1):
+        migration(c)
+        c.execute(f'PRAGMA user_version = {number}')
+    conn.commit()
+    return conn
+
+
+def test_fresh_database_reaches_the_current_version(tmp_path):
+    path = str(tmp_path / 'fresh.db')
+    assert migrations.migrate_db(path) == migrations.SCHEMA_VERSION
+    assert migrations.get_schema_version(path) == migrations.SCHEMA_VERSION
+    assert migrations.migrate_db(path) == migrations.SCHEMA_VERSION
+
+
+def test_canonical_keys_migration_merges_duplicate_cache_rows(tmp_path):
+    path = str(tmp_path / 'old.db')
+    conn = db_at_version(path, 5)
+    rows = [
+        # (source_text, target_lang, translation, expires_at, uses): pre-canonical keys were raw md5s
+        ('Hello  world ', 'es', 'Hola mundo (old)', '2030-01-01 00:00:00', 3),
+        ('Hello world', 'ES', 'Hola mundo', '2030-06-01 00:00:00', 5),
+        ('Hello world', 'es-ES', 'Hola mundo (older)', '2029-01-01 00:00:00', 1),
+        ('Goodbye', 'DE', 'Auf Wiedersehen', '2030-01-01 00:00:00', 2),
+        ('Goodbye', 'en', 'Goodbye', '2030-01-01 00:00:00', 4),
+    ]
+    conn.executemany('''INSERT INTO translation_cache (text_hash, source_text, target_lang, translation, expires_at, uses)
+                        VALUES (?, ?, ?, ?, ?, ?)''',
+                     [(hashlib.md5(row[0].encode()).hexdigest(), *row) for row in rows])
+    conn.commit()
+    conn.close()
+
+    assert migrations.migrate_db(path) == migrations.SCHEMA_VERSION
+
+    conn = sqlite3.connect(path)
+    result = sorted(conn.execute('SELECT text_hash, source_text, target_lang, translation, uses FROM translation_cache'))
+    conn.close()
+    assert result == sorted([
+        # The freshest row survives and inherits the usage counts of the rows merged into it
+        (canonical.text_hash('Hello world'), 'Hello world', 'ES', 'Hola mundo', 9),
+        (canonical.text_hash('Goodbye'), 'Goodbye', 'DE', 'Auf Wiedersehen', 2),
+        (canonical.text_hash('Goodbye'), 'Goodbye', 'EN-US', 'Goodbye', 4),
+    ])
@@ -0,0 +1,84 @@
+import sqlite3
+
+import pytest
+
+import main
+
+TEXTS = ['Free shipping on orders over fifty euros.', 'Returns are accepted within thirty days.']
+
+
+def set_uses(uses):
+    conn = sqlite3.connect('api_keys.db')
+    conn.execute("INSERT OR REPLACE INTO api_keys (key, uses) VALUES ('key', ?)", (uses,))
+    conn.commit()
+    conn.close()
+
+
+def key_uses():
+    conn = sqlite3.connect('api_keys.db')
+    uses = conn.execute("SELECT uses FROM api_keys WHERE key='key'").fetchone()[0]
+    conn.close()
+    return uses
+
+
+@pytest.fixture
+def client(db):
+    set_uses(0)
+    return main.app.test_client()
+
+
+@pytest.fixture
+def upstream_calls(monkeypatch):
+    calls = []
+    backend = main.translation_backends.backends[0]
+    translate_batch = backend.translate_batch
+
+    def record(texts, target_lang, deadline=None, source_lang=None):
+        calls.append((target_lang, len(texts)))
+        return translate_batch(texts, target_lang, deadline, source_lang)
+    monkeypatch.setattr(backend, 'translate_batch', record)
+    return calls
+
+
+def post(client, body):
+    return client.post('/translate-multi', json=body, headers={'X-API-KEY': 'key'})
+
+
+def test_charged_once_for_every_text_and_language(client, upstream_calls):
+    # 'de' and 'DE' are the same language: three targets, not four
+    response = post(client, {'texts': TEXTS, 'targets': ['de', 'DE', 'FR', 'es']})
+    assert response.status_code == 200
+    assert key_uses() == len(TEXTS) * 3
+
+    payload = response.get_json()
+    assert payload['translations'][1] == {lang: f'[{lang}] {TEXTS[1]}' for lang in ('DE', 'FR', 'ES')}
+    # One multi-text upstream call per language
+    assert sorted(upstream_calls) == [('DE', 2), ('ES', 2), ('FR', 2)]
+
+
+def test_single_text_shape(client, upstream_calls):
+    payload = post(client, {'text': TEXTS[0], 'targets': ['DE', 'IT']}).get_json()
+    assert payload['text'] == TEXTS[0]
+    assert payload['translations'] == {'DE': f'[DE] {TEXTS[0]}', 'IT': f'[IT] {TEXTS[0]}'}
+    assert set(payload['results']) == {'DE', 'IT'}
+    assert key_uses() == 2
+
+
+def test_whole_request_refused_when_it_would_exceed_the_quota(client, upstream_calls):
+    set_uses(main.API_KEY_QUOTA - 5)
+    response = post(client, {'texts': TEXTS, 'targets': ['DE', 'FR', 'ES']})
+    assert response.status_code == 403
+    assert key_uses() == main.API_KEY_QUOTA - 5
+    assert upstream_calls == []
+
+
+@pytest.mark.parametrize('body', [
+    {'texts': TEXTS, 'targets': ['DE', 'xx']},
+    {'texts': TEXTS, 'targets': []},
+    {'texts': [TEXTS[0], 7], 'targets': ['DE']},
+    {'texts': TEXTS * 26, 'targets': ['DE']},
+])
+def test_invalid_requests_are_not_charged(client, upstream_calls, body):
+    assert post(client, body).status_code == 400
+    assert key_uses() == 0
+    assert upstream_calls == []
@@ -0,0 +1,59 @@
+import sqlite3
+import time
+
+import pytest
+
+import main
+
+
+@pytest.fixture
+def manager(db, cacheable_echo):
+    return main.PriorityCacheManager()
+
+
+def refresh_at(lang):
+    conn = sqlite3.connect('api_keys.db')
+    row = conn.execute('SELECT refresh_at FROM priority_cache_state WHERE target_lang=?', (lang,)).fetchone()
+    conn.close()
+    return row[0]
+
+
+def test_full_population_completes(manager):
+    assert manager._claim('DE')
+    manager._populate('DE')
+
+    status = manager.get_cache_status('DE')
+    assert status['populate_status'] == 'completed' and status['cache_ready']
+    assert status['priority_1'] == len(manager.get_critical_messages())
+    assert refresh_at('DE') > time.time() + 3600
+
+
+def test_failed_tier_leaves_population_partial_and_retried_soon(manager, monkeypatch):
+    translate_upstream = manager._translate_upstream
+
+    def common_fails(texts, target_lang):
+        if len(texts) == len(manager.get_common_responses()):
+            return None
+        return translate_upstream(texts, target_lang)
+    monkeypatch.setattr(manager, '_translate_upstream', common_fails)
+
+    assert manager._claim('DE')
+    manager._populate('DE')
+
+    status = manager.get_cache_status('DE')
+    assert status['populate_status'] == 'partial: priority 2 not translated'
+    assert status['priority_1'] and not status['priority_2']
+    assert not status['cache_ready']
+    assert refresh_at('DE') <= time.time() + main.PRIORITY_REFRESH_RETRY
+
+    # A partial language can be claimed again right away, and is picked up once its retry is due
+    monkeypatch.setattr(manager, 'populate_priority_cache', lambda lang: 'started')
+    monkeypatch.setattr(main.time, 'time', lambda: refresh_at('DE') + 1)
+    assert manager.refresh_due() == ['DE']
+
+
+def test_no_translations_fails(manager, monkeypatch):
+    monkeypatch.setattr(manager, '_translate_upstream', lambda texts, target_lang: None)
+    assert manager._claim('DE')
+    manager._populate('DE')
+    assert manager.get_populate_status('DE') == 'failed: no translations'
@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+import main
+
+NOW = 1700000000.0
+HOUR = 3600
+
+
+@pytest.fixture
+def manager(db, monkeypatch):
+    monkeypatch.setattr(main.time, 'time', lambda: NOW)
+    manager = main.PriorityCacheManager()
+    manager.populated = []
+    monkeypatch.setattr(manager.executor, 'submit', lambda fn, lang: manager.populated.append(lang))
+    return manager
+
+
+def add_state(lang, status, refresh_at=None, started_at=None):
+    conn = sqlite3.connect('api_keys.db')
+    conn.execute('INSERT INTO priority_cache_state (target_lang, status, started_at, refresh_at) VALUES (?, ?, ?, ?)',
+                 (lang, status, started_at, refresh_at))
+    conn.commit()
+    conn.close()
+
+
+@pytest.mark.parametrize('jitter', [0.0, main.PRIORITY_REFRESH_JITTER])
+def test_refresh_lands_before_expiry_within_the_jitter(manager, monkeypatch, jitter):
+    monkeypatch.setattr(main.random, 'uniform', lambda low, high: high if jitter else low)
+    expected = NOW + (main.CACHE_EXPIRY_HOURS - main.PRIORITY_REFRESH_LEAD_HOURS) * HOUR - jitter
+    assert manager._next_refresh() == expected
+
+
+def test_languages_are_spread_apart(manager):
+    latest = NOW + (main.CACHE_EXPIRY_HOURS - main.PRIORITY_REFRESH_LEAD_HOURS) * HOUR
+    refreshes = {manager._next_refresh() for _ in range(20)}
+    assert len(refreshes) > 1
+    assert all(latest - main.PRIORITY_REFRESH_JITTER <= t <= latest for t in refreshes)
+
+
+def test_lead_is_capped_at_half_the_expiry(manager, monkeypatch):
+    monkeypatch.setattr(main, 'PRIORITY_REFRESH_LEAD_HOURS', main.CACHE_EXPIRY_HOURS * 2)
+    monkeypatch.setattr(main.random, 'uniform', lambda low, high: low)
+    assert manager._next_refresh() == NOW + main.CACHE_EXPIRY_HOURS / 2 * HOUR
+
+
+def test_refresh_due_picks_up_due_and_abandoned_languages(manager):
+    add_state('DE', 'completed', refresh_at=NOW - 1)
+    add_state('FR', 'completed', refresh_at=NOW + HOUR)
+    add_state('ES', 'failed', refresh_at=NOW)
+    add_state('IT', 'started', started_at=NOW - main.PRIORITY_POPULATE_STALE_SECONDS - 1)
+    add_state('NL', 'started', started_at=NOW - 10)
+
+    assert sorted(manager.refresh_due()) == ['DE', 'ES', 'IT']
+    assert sorted(manager.populated) == ['DE', 'ES', 'IT']
+
+    # Claimed by this pass, so the next check leaves them to the running populations
+    assert manager.refresh_due() == []
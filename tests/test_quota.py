@@ -0,0 +1,111 @@
+import types
+
+import pytest
+
+import main
+
+Scheduler = main.UpstreamScheduler
+Tracker = main.UpstreamQuotaTracker
+
+
+class FakeBackend:
+    def __init__(self, name, used=0, limit=500000, configured=True):
+        self.name = name
+        self.configured = configured
+        self.reported = {'character_count': used, 'character_limit': limit}
+
+    def is_configured(self):
+        return self.configured
+
+    def usage(self):
+        return self.reported
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100000.0]
+    monkeypatch.setattr(main.time, 'time', lambda: now[0])
+    return now
+
+
+def make_tracker(*backends):
+    tracker = Tracker(types.SimpleNamespace(backends=list(backends)), poll_seconds=3600)
+    tracker.poll()   # synchronous first poll; check() won't start another within the hour
+    return tracker
+
+
+def refused(tracker):
+    """Class names whose cache misses the tracker refuses right now"""
+    names = []
+    for priority, name in Scheduler.CLASS_NAMES.items():
+        try:
+            tracker.check(priority)
+        except main.QuotaExhaustedError:
+            names.append(name)
+    return names
+
+
+def test_normal_mode_refuses_nothing(clock):
+    tracker = make_tracker(FakeBackend('deepl', used=1000))
+    assert tracker.mode() == Tracker.NORMAL
+    assert refused(tracker) == []
+
+
+def test_conserving_refuses_demo_and_warming(clock):
+    tracker = make_tracker(FakeBackend('deepl', used=460000))
+    assert tracker.mode() == Tracker.CONSERVING
+    assert refused(tracker) == ['demo', 'background']
+
+
+def test_degraded_refuses_every_class(clock):
+    tracker = make_tracker(FakeBackend('deepl', used=500000 - main.QUOTA_RESERVE_CHARS))
+    assert tracker.mode() == Tracker.DEGRADED
+    assert refused(tracker) == ['paid_interactive', 'paid_batch', 'demo', 'background']
+
+
+def test_locally_counted_characters_move_through_the_modes(clock):
+    tracker = make_tracker(FakeBackend('deepl', used=0))
+    assert tracker.mode() == Tracker.NORMAL
+    tracker.record('deepl', 450000)
+    assert tracker.mode() == Tracker.CONSERVING
+    tracker.record('deepl', 50000 - main.QUOTA_RESERVE_CHARS)
+    assert tracker.mode() == Tracker.DEGRADED
+
+
+def test_exhaustion_is_cleared_by_the_next_poll(clock):
+    tracker = make_tracker(FakeBackend('deepl', used=1000))
+    tracker.mark_exhausted('deepl')
+    assert tracker.mode() == Tracker.DEGRADED
+    tracker.poll()
+    assert tracker.mode() == Tracker.NORMAL
+
+
+def test_forecast_exhaustion_conserves(clock):
+    tracker = make_tracker(FakeBackend('deepl', used=0))
+    clock[0] += main.QUOTA_FORECAST_MIN_SPAN - 1
+    tracker.record('deepl', 100000)
+    assert tracker.forecast_seconds('deepl') is None   # too little history to forecast from
+    assert tracker.mode() == Tracker.NORMAL
+
+    clock[0] += 1
+    tracker.record('deepl', 1)
+    # ~333 characters a second with 400k left: out within the conserve horizon
+    assert tracker.forecast_seconds('deepl') < main.QUOTA_CONSERVE_HORIZON
+    assert tracker.mode() == Tracker.CONSERVING
+
+
+def test_every_backend_must_run_low(clock):
+    tracker = make_tracker(FakeBackend('deepl', used=500000), FakeBackend('other', used=1000))
+    assert tracker.is_exhausted('deepl')
+    assert tracker.mode() == Tracker.NORMAL
+
+    tracker.mark_exhausted('other')
+    assert tracker.mode() == Tracker.DEGRADED
+
+
+def test_unconfigured_and_unmetered_backends(clock):
+    tracker = make_tracker(FakeBackend('deepl', used=500000, configured=False),
+                           FakeBackend('unmetered', limit=None))
+    assert 'deepl' not in tracker.usage
+    assert tracker.remaining('unmetered') is None
+    assert tracker.mode() == Tracker.NORMAL
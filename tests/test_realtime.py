@@ -0,0 +1,56 @@
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pytest
+
+import main
+
+ROOT = main.os.path.dirname(main.os.path.abspath(main.__file__))
+
+
+def test_import_does_not_load_socketio_or_aiohttp():
+    code = "import sys, main; print(sorted({'flask_socketio', 'engineio', 'aiohttp'} & set(sys.modules)))"
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip().splitlines()[-1] == '[]'
+
+
+@pytest.fixture
+def socket(db):
+    conn = sqlite3.connect('api_keys.db')
+    conn.execute("INSERT INTO api_keys (key, uses) VALUES ('key', 0)")
+    conn.commit()
+    conn.close()
+    client = main.init_socketio().test_client(main.app, namespace='/translate', auth={'apiKey': 'key'})
+    assert client.is_connected('/translate')
+    yield client
+    client.disconnect('/translate')
+
+
+def test_init_socketio_is_idempotent():
+    assert main.init_socketio() is main.init_socketio()
+
+
+def test_connect_requires_a_valid_key(db):
+    client = main.init_socketio().test_client(main.app, namespace='/translate', auth={'apiKey': 'nope'})
+    assert not client.is_connected('/translate')
+
+
+def test_translate_is_acknowledged_then_delivered(socket):
+    ack = socket.emit('translate', {'id': 7, 'text': 'Hello', 'target': 'DE'}, namespace='/translate', callback=True)
+    assert ack['accepted'] and ack['id'] == 7
+    received = []
+    deadline = time.time() + 5
+    while not received and time.time() < deadline:
+        time.sleep(0.01)
+        received = socket.get_received('/translate')
+    [event] = received
+    assert event['name'] == 'translation'
+    assert event['args'][0]['id'] == 7 and event['args'][0]['translation'] == '[DE] Hello'
+
+
+@pytest.mark.parametrize('text', [42, ['Hello'], {'text': 'Hello'}])
+def test_non_string_text_is_refused_in_the_ack(socket, text):
+    ack = socket.emit('translate', {'id': 8, 'text': text, 'target': 'DE'}, namespace='/translate', callback=True)
+    assert ack == {'id': 8, 'accepted': False, 'error': "'text' must be a string"}
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+import main
+
+Scheduler = main.UpstreamScheduler
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(main.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def scheduler(clock):
+    """One slot per (fake) second; demo work is shed beyond one second of queueing"""
+    return Scheduler(rate_limit=1, latency_target=1)
+
+
+def drain(scheduler, clock, priority):
+    """Grant a class's queued tickets in turn, advancing the clock one slot each; returns the flows"""
+    granted = []
+    while scheduler.queues[priority]:
+        ticket = scheduler.queues[priority][0]
+        wait_for = scheduler._poll(priority, ticket)
+        if wait_for:
+            clock.now += wait_for
+            continue
+        granted.append(ticket[2])
+    return granted
+
+
+def test_free_slot_is_granted_immediately(scheduler):
+    scheduler.acquire(Scheduler.PAID_INTERACTIVE, 'key')
+    assert scheduler.stats[Scheduler.PAID_INTERACTIVE]['granted'] == 1
+    assert not scheduler.queues[Scheduler.PAID_INTERACTIVE]
+
+
+def test_higher_class_goes_first(scheduler, clock):
+    background = scheduler._enqueue(Scheduler.BACKGROUND, 'warming', 1.0)
+    demo = scheduler._enqueue(Scheduler.DEMO, 'ip', 1.0)
+    paid = scheduler._enqueue(Scheduler.PAID_INTERACTIVE, 'key', 1.0)
+
+    # Queued first, but lower classes wait for every ticket ahead of them
+    assert scheduler._poll(Scheduler.BACKGROUND, background) == scheduler.interval
+    assert scheduler._poll(Scheduler.DEMO, demo) == scheduler.interval
+    assert scheduler._poll(Scheduler.PAID_INTERACTIVE, paid) == 0
+
+    # The next slot is a second away even for the head of the queue
+    assert scheduler._poll(Scheduler.DEMO, demo) == pytest.approx(1.0)
+    clock.now += 1
+    assert scheduler._poll(Scheduler.BACKGROUND, background) == scheduler.interval
+    assert scheduler._poll(Scheduler.DEMO, demo) == 0
+    clock.now += 1
+    assert scheduler._poll(Scheduler.BACKGROUND, background) == 0
+
+
+def test_flows_share_a_class_fairly(scheduler, clock):
+    for _ in range(3):
+        scheduler._enqueue(Scheduler.PAID_BATCH, 'busy', 1.0)
+    scheduler._enqueue(Scheduler.PAID_BATCH, 'quiet', 1.0)
+
+    assert drain(scheduler, clock, Scheduler.PAID_BATCH) == ['busy', 'quiet', 'busy', 'busy']
+    # Finish tags are forgotten once the class goes idle
+    assert not scheduler.flow_finish
+
+
+def test_weight_buys_a_larger_share(scheduler, clock):
+    for _ in range(4):
+        scheduler._enqueue(Scheduler.PAID_BATCH, 'heavy', 2.0)
+    for _ in range(2):
+        scheduler._enqueue(Scheduler.PAID_BATCH, 'light', 1.0)
+
+    assert drain(scheduler, clock, Scheduler.PAID_BATCH) == ['heavy', 'heavy', 'light', 'heavy', 'heavy', 'light']
+
+
+def test_demo_is_shed_above_the_latency_target(scheduler):
+    scheduler._enqueue(Scheduler.DEMO, 'ip-1', 1.0)
+    scheduler._enqueue(Scheduler.DEMO, 'ip-2', 1.0)   # expects exactly the one-second target
+    with pytest.raises(main.UpstreamOverloadedError):
+        scheduler._enqueue(Scheduler.DEMO, 'ip-3', 1.0)
+    assert scheduler.stats[Scheduler.DEMO]['shed'] == 1
+    assert len(scheduler.queues[Scheduler.DEMO]) == 2
+
+
+def test_paid_work_ahead_counts_towards_demo_wait(scheduler):
+    for _ in range(2):
+        scheduler._enqueue(Scheduler.PAID_INTERACTIVE, 'key', 1.0)
+    assert scheduler.expected_wait(Scheduler.DEMO) == pytest.approx(2.0)
+    with pytest.raises(main.UpstreamOverloadedError):
+        scheduler._enqueue(Scheduler.DEMO, 'ip', 1.0)
+
+
+def test_only_demo_is_shed(scheduler):
+    for _ in range(5):
+        scheduler._enqueue(Scheduler.PAID_INTERACTIVE, 'key', 1.0)
+        scheduler._enqueue(Scheduler.PAID_BATCH, 'key', 1.0)
+        scheduler._enqueue(Scheduler.BACKGROUND, 'warming', 1.0)
+    assert all(not scheduler.stats[cls]['shed'] for cls in Scheduler.CLASS_NAMES)
+
+
+def test_expired_deadline_cancels_the_queued_ticket(scheduler, clock):
+    scheduler._enqueue(Scheduler.PAID_INTERACTIVE, 'key', 1.0)
+    deadline = main.Deadline(1, started=clock.now - 2)
+
+    with pytest.raises(main.DeadlineExceededError):
+        scheduler.acquire(Scheduler.DEMO, 'ip', deadline=deadline)
+    assert not scheduler.queues[Scheduler.DEMO]
+    assert scheduler.stats[Scheduler.DEMO]['abandoned'] == 1
+    assert len(scheduler.queues[Scheduler.PAID_INTERACTIVE]) == 1
+
+
+def test_expired_deadline_cancels_the_async_ticket(scheduler, clock):
+    scheduler._enqueue(Scheduler.PAID_INTERACTIVE, 'key', 1.0)
+    deadline = main.Deadline(1, started=clock.now - 2)
+
+    with pytest.raises(main.DeadlineExceededError):
+        asyncio.run(scheduler.acquire_async(Scheduler.PAID_BATCH, 'key', deadline=deadline))
+    assert not scheduler.queues[Scheduler.PAID_BATCH]
+    assert scheduler.stats[Scheduler.PAID_BATCH]['abandoned'] == 1
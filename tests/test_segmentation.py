@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+import main
+
+
+TEXTS = [
+    'Hello world. How are you? I am fine!',
+    '  Leading space.\n\nNew paragraph.  Two  spaces.\r\nWindows line.  ',
+    'Dr. Smith met Mr. J. Doe at 5 p.m. on Jan. 3. They talked.',
+    'Der Preis beträgt ca. 5 Euro, z.B. heute. Morgen nicht.',
+    '今日は晴れです。明日は雨です。',
+    '"Quoted." (Parenthesised.) Next one… and more. Done',
+    'no punctuation at all',
+    '',
+]
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_split_segments_round_trips(text):
+    prefix, segments = main.split_segments(text)
+    assert main.join_segments(prefix, segments, {s: s for s, _ in segments}) == text
+    assert all(segment and segment == segment.strip() for segment, _ in segments)
+
+
+def test_split_segments_respects_abbreviations_and_lowercase():
+    _, segments = main.split_segments('Dr. Smith arrived. Prof. Jones too. See fig. A for details.', 'EN')
+    assert [s for s, _ in segments] == ['Dr. Smith arrived.', 'Prof. Jones too.', 'See fig. A for details.']
+    _, segments = main.split_segments('It costs 5 dollars. then it continues.')
+    assert len(segments) == 1
+
+
+def test_split_segments_cuts_cjk_and_line_breaks():
+    _, segments = main.split_segments('一行目。二行目！\nThird line')
+    assert [s for s, _ in segments] == ['一行目。', '二行目！', 'Third line']
+
+
+@pytest.fixture
+def upstream_calls(db, monkeypatch):
+    calls = []
+    backend = main.translation_backends.backends[0]
+    translate_batch = backend.translate_batch
+
+    def record(texts, target_lang, deadline=None, source_lang=None):
+        calls.append(len(texts))
+        return translate_batch(texts, target_lang, deadline, source_lang)
+
+    async def record_async(texts, target_lang, deadline=None, source_lang=None):
+        return record(texts, target_lang, deadline, source_lang)
+
+    monkeypatch.setattr(backend, 'translate_batch', record)
+    monkeypatch.setattr(backend, 'translate_batch_async', record_async)
+    return calls
+
+
+def long_text(sentences, tag):
+    return ' '.join(f'Sentence number {i} about {tag}.' for i in range(sentences))
+
+
+def test_segmented_misses_go_upstream_in_bounded_groups(upstream_calls):
+    text = long_text(120, 'apples')
+    result = main.cache_orchestrator.batch_translator.translate_segmented(text, 'DE')
+
+    assert result['success'] and result['segments'] == {'total': 120, 'cached': 0}
+    assert upstream_calls == [50, 50, 20]
+    assert result['translation'].count('Sentence number') == 120
+
+
+def test_async_segmented_misses_go_upstream_in_bounded_groups(upstream_calls):
+    text = long_text(60, 'pears')
+    result = asyncio.run(main.cache_orchestrator.batch_translator.translate_segmented_async(text, 'FR'))
+
+    assert result['success'] and result['segments'] == {'total': 60, 'cached': 0}
+    assert upstream_calls == [50, 10]
@@ -0,0 +1,82 @@
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import main
+
+TEXT = 'Your subscription renews automatically every month.'
+
+
+@pytest.fixture
+def batcher(db, cacheable_echo, monkeypatch):
+    batcher = main.cache_orchestrator.batch_translator
+    batcher.refreshes = []
+    monkeypatch.setattr(batcher.executor, 'submit', lambda fn, *args: batcher.refreshes.append(args))
+    batcher._cache_translations([(TEXT, 'DE', 'Ihr Abo verlängert sich monatlich.')])
+    return batcher
+
+
+def expire(hours_ago):
+    conn = sqlite3.connect('api_keys.db')
+    conn.execute('UPDATE translation_cache SET expires_at=?',
+                 (datetime.now(timezone.utc) - timedelta(hours=hours_ago),))
+    conn.commit()
+    conn.close()
+
+
+def revalidate_at():
+    conn = sqlite3.connect('api_keys.db')
+    value = conn.execute('SELECT revalidate_at FROM translation_cache').fetchone()[0]
+    conn.close()
+    return value
+
+
+def test_fresh_hit_starts_no_refresh(batcher):
+    result = batcher.translate_single(TEXT, 'DE')
+    assert result['cached'] and result['fresh']
+    assert batcher.refreshes == []
+
+
+def test_stale_hit_is_served_and_refreshed_once(batcher):
+    expire(hours_ago=1)
+    for _ in range(3):
+        result = batcher.translate_single(TEXT, 'DE')
+        assert result['success'] and result['cached'] and not result['fresh']
+        assert result['translation'] == 'Ihr Abo verlängert sich monatlich.'
+    assert batcher.refreshes == [([TEXT], 'DE', None)]
+    assert revalidate_at() is not None
+
+
+def test_bulk_lookup_shares_the_lease(batcher):
+    expire(hours_ago=1)
+    batcher.translate_single(TEXT, 'DE')
+    cached = batcher._get_cached_translations([TEXT, 'Unknown text'], ['DE'])
+    assert cached == {(TEXT, 'DE'): ('Ihr Abo verlängert sich monatlich.', True)}
+    assert len(batcher.refreshes) == 1
+
+
+def test_lapsed_lease_is_taken_again(batcher, monkeypatch):
+    expire(hours_ago=1)
+    batcher.translate_single(TEXT, 'DE')
+    later = time.time() + main.CACHE_REVALIDATE_LEASE + 1
+    monkeypatch.setattr(main.time, 'time', lambda: later)
+    batcher.translate_single(TEXT, 'DE')
+    assert len(batcher.refreshes) == 2
+
+
+def test_refresh_renews_the_entry_and_releases_the_lease(batcher):
+    expire(hours_ago=1)
+    batcher.translate_single(TEXT, 'DE')
+    batcher._refresh(*batcher.refreshes[0])
+    assert revalidate_at() is None
+
+    result = batcher.translate_single(TEXT, 'DE')
+    assert result['fresh'] and result['translation'] == f'[DE] {TEXT}'
+
+
+def test_entries_past_the_grace_period_are_misses(batcher):
+    expire(hours_ago=main.CACHE_STALE_GRACE_HOURS + 1)
+    assert batcher._get_cached_translation(TEXT, 'DE') is None
+    assert batcher.refreshes == []
@@ -0,0 +1,56 @@
+import json
+import sqlite3
+
+import pytest
+
+import main
+
+TEXTS = ['The parcel left our warehouse this morning.',
+         'Your order has been confirmed.',
+         'Please check the tracking page for updates.',
+         'Your order has been confirmed.']
+
+
+@pytest.fixture
+def client(db, cacheable_echo):
+    conn = sqlite3.connect('api_keys.db')
+    conn.execute("INSERT INTO api_keys (key, uses) VALUES ('key', 0)")
+    conn.commit()
+    conn.close()
+    return main.app.test_client()
+
+
+def stream(client, texts, query_string=None, accept=None):
+    headers = {'X-API-KEY': 'key', **({'Accept': accept} if accept else {})}
+    response = client.post('/translate-batch', json={'texts': texts, 'target': 'DE'},
+                           headers=headers, query_string=query_string)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_cache_hits_stream_first_with_their_index(client):
+    main.cache_orchestrator.batch_translator.translate_batch([TEXTS[1]], 'DE', endpoint_type='paid')
+
+    lines = stream(client, TEXTS, query_string={'stream': '1'})
+    assert [line['index'] for line in lines[:2]] == [1, 3]
+    assert all(line['cached'] for line in lines[:2])
+    assert sorted(line['index'] for line in lines[2:]) == [0, 2]
+    assert not any(line.get('cached') for line in lines[2:])
+    for line in lines:
+        assert line['success'] and line['translation'] == f"[DE] {TEXTS[line['index']]}"
+
+
+def test_accept_header_also_streams(client):
+    lines = stream(client, TEXTS[:1], accept='application/x-ndjson')
+    assert [line['index'] for line in lines] == [0]
+
+
+def test_failure_mid_stream_ends_with_an_error_line():
+    def results():
+        yield 0, {'success': True, 'translation': 'Hallo'}
+        raise RuntimeError('worker pool shut down')
+
+    lines = [json.loads(line) for line in main.ndjson_lines(results())]
+    assert lines == [{'success': True, 'translation': 'Hallo', 'index': 0},
+                     {'success': False, 'error': 'worker pool shut down'}]
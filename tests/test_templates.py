@@ -0,0 +1,103 @@
+import sqlite3
+
+import pytest
+
+import main
+
+
+@pytest.mark.parametrize('text, template, values', [
+    ('Order #1234 shipped to bob@example.com', 'Order #{{NUM_1}} shipped to {{EMAIL_1}}',
+     {'{{NUM_1}}': '1234', '{{EMAIL_1}}': 'bob@example.com'}),
+    ('See https://example.com/a?b=1. Ticket #42 and 7', 'See {{URL_1}}. Ticket #{{NUM_1}} and {{NUM_2}}',
+     {'{{URL_1}}': 'https://example.com/a?b=1', '{{NUM_1}}': '42', '{{NUM_2}}': '7'}),
+])
+def test_mask_placeholders(text, template, values):
+    assert main.mask_placeholders(text) == (template, values)
+
+
+@pytest.mark.parametrize('text', [
+    'You have 5 files',         # number next to a word: plural forms may depend on it
+    'Pay 3.50 now',             # decimals are formatted per locale upstream
+    'Version 2.1 on 12/05',
+    'Already {{NUM_1}} masked',
+    'No variables here',
+])
+def test_mask_leaves_unmaskable_texts_alone(text):
+    assert main.mask_placeholders(text) == (text, None)
+
+
+def test_fill_round_trips_a_reordered_translation():
+    template, values = main.mask_placeholders('Order #1234 for bob@example.com')
+    translated = 'Für {{EMAIL_1}}: Bestellung #{{NUM_1}}'
+    assert main.fill_placeholders(translated, values) == 'Für bob@example.com: Bestellung #1234'
+    assert main.fill_placeholders(template, values) == 'Order #1234 for bob@example.com'
+
+
+@pytest.mark.parametrize('translated', [
+    'Bestellung {{NUM_1}}',                          # a placeholder was dropped
+    'Bestellung {{NUM_1}} {{NUM_1}} {{EMAIL_1}}',    # or duplicated
+    'Bestellung {{ NUM_1 }} für {{EMAIL_1}}',        # or mangled
+])
+def test_fill_rejects_damaged_templates(translated):
+    _, values = main.mask_placeholders('Order #1234 for bob@example.com')
+    assert main.fill_placeholders(translated, values) is None
+
+
+def test_texts_differing_only_in_variables_share_a_cached_template(db, cacheable_echo):
+    orchestrator = main.cache_orchestrator
+    first = orchestrator.handle_translation_request('Order #1234 for bob@example.com', 'DE', 'demo')
+    second = orchestrator.handle_translation_request('Order #5678 for amy@example.org', 'DE', 'demo')
+    assert first['success'] and not first['cached']
+    assert second['cached'] and second['translation'] == '[DE] Order #5678 for amy@example.org'
+
+
+@pytest.fixture
+def damaging_upstream(db, cacheable_echo, monkeypatch):
+    """Echo backend that mangles placeholders; records upstream texts and IP-limit checks"""
+    sent, ip_checks = [], []
+    backend = main.translation_backends.backends[0]
+    translate_batch = backend.translate_batch
+
+    def damage(texts, target_lang, deadline=None, source_lang=None):
+        sent.extend(texts)
+        return [t.replace('{{', '{ {') for t in translate_batch(texts, target_lang, deadline, source_lang)]
+
+    def check_ip(request, endpoint_type, increment=False):
+        ip_checks.append(endpoint_type)
+        return True, {}, {}
+
+    monkeypatch.setattr(backend, 'translate_batch', damage)
+    monkeypatch.setattr(main.ip_rate_limiter, 'check_and_update_rate_limit', check_ip)
+    return sent, ip_checks
+
+
+REQUEST = type('Request', (), {'headers': {}, 'remote_addr': '10.0.0.1'})()
+
+
+def cached_texts():
+    conn = sqlite3.connect('api_keys.db')
+    rows = sorted(row[0] for row in conn.execute('SELECT source_text FROM translation_cache'))
+    conn.close()
+    return rows
+
+
+def test_damaged_template_is_not_cached_and_the_retry_is_not_counted_twice(damaging_upstream):
+    sent, ip_checks = damaging_upstream
+    batcher = main.cache_orchestrator.batch_translator
+    result = batcher.translate_single('Order #1234 for bob@example.com', 'DE', request=REQUEST)
+
+    assert result['success'] and result['translation'] == '[DE] Order #1234 for bob@example.com'
+    assert sent == ['Order #{{NUM_1}} for {{EMAIL_1}}', 'Order #1234 for bob@example.com']
+    assert cached_texts() == ['Order #1234 for bob@example.com']
+    assert ip_checks == ['demo']
+
+
+def test_batch_members_of_a_damaged_template_are_retried_literally_once_counted(damaging_upstream):
+    sent, ip_checks = damaging_upstream
+    texts = ['Order #1 for a@example.com', 'Order #2 for b@example.com']
+    results = main.cache_orchestrator.batch_translator.translate_batch(texts, 'DE', request=REQUEST)
+
+    assert [r['translation'] for r in results] == ['[DE] ' + text for text in texts]
+    assert sorted(sent) == sorted(['Order #{{NUM_1}} for {{EMAIL_1}}'] + texts)
+    assert cached_texts() == sorted(texts)
+    assert ip_checks == ['demo']
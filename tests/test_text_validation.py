@@ -0,0 +1,60 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+import main
+
+asgi = pytest.importorskip('asgi')
+
+
+@pytest.fixture
+def client(db):
+    return main.app.test_client()
+
+
+@pytest.mark.parametrize('text', [123, ['Hello'], {'text': 'Hello'}, None])
+def test_flask_routes_reject_non_string_text(client, text):
+    for path, headers in (('/translate', {'X-API-KEY': 'key'}), ('/demo-translate', {})):
+        response = client.post(path, json={'text': text, 'target': 'DE'}, headers=headers)
+        assert response.status_code == 400
+        assert response.get_json() == {'success': False, 'error': "'text' must be a string"}
+
+
+@pytest.mark.parametrize('text', [123, ['Hello'], None])
+def test_asgi_routes_give_the_same_response(text):
+    for route in (asgi.translate, asgi.demo_translate):
+        headers = {'X-API-KEY': 'key'}
+        request = type('Request', (), {'headers': headers})()
+        assert asyncio.run(route(request, {'text': text, 'target': 'DE'})) == main.invalid_text_response()
+
+
+def key_uses():
+    conn = sqlite3.connect('api_keys.db')
+    uses = conn.execute("SELECT uses FROM api_keys WHERE key='key'").fetchone()[0]
+    conn.close()
+    return uses
+
+
+@pytest.fixture
+def api_key(db):
+    conn = sqlite3.connect('api_keys.db')
+    conn.execute("INSERT INTO api_keys (key, uses) VALUES ('key', 0)")
+    conn.commit()
+    conn.close()
+    return 'key'
+
+
+@pytest.mark.parametrize('path', ['/translate-batch', '/translate-batch?stream=1'])
+def test_batch_rejects_non_string_texts_before_charging(client, api_key, path):
+    response = client.post(path, json={'texts': [1, 'Hello'], 'target': 'DE'}, headers={'X-API-KEY': api_key})
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'error': "'text' must be a string"}
+    assert key_uses() == 0
+
+
+def test_asgi_batch_rejects_non_string_texts(api_key):
+    request = type('Request', (), {'headers': {'X-API-KEY': api_key}})()
+    body = {'texts': ['Hello', ['nested']], 'target': 'DE'}
+    assert asyncio.run(asgi.translate_batch(request, body)) == main.invalid_text_response()
+    assert key_uses() == 0
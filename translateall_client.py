@@ -0,0 +1,592 @@
+#!/usr/bin/env python3
+"""
+TranslateAll API Python Client
+Production client for the TranslateAll API, grown out of the demo script:
+- Pooled HTTP session with connection reuse
+- Client-side auto-batching of translate() calls into /translate-batch
+- Bounded local result cache
+- Concurrency limits
+- Backoff that honors 429, Retry-After and ip_rate_limit.reset_times
+- Asyncio variant (AsyncTranslateAllClient, requires aiohttp)
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_BASE_URL = "http://localhost:8080"
+
+# Server-side limit for /translate-batch
+MAX_BATCH_SIZE = 50
+
+# Status codes that are safe to retry with backoff
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# POSTs are charged once the server has processed them; only retry those it turned away unprocessed
+RETRYABLE_POST_STATUS_CODES = (429, 503)
+
+
+class TranslateAllError(Exception):
+    """Raised when the API returns an error that cannot be retried"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, payload: Optional[Dict] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.payload = payload or {}
+
+
+class RateLimitedError(TranslateAllError):
+    """Raised when the API keeps rate limiting us beyond the retry budget"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None, payload: Optional[Dict] = None):
+        super().__init__(message, status_code=429, payload=payload)
+        self.retry_after = retry_after
+
+
+class ResultCache:
+    """Thread-safe bounded LRU cache for translation results with optional TTL"""
+
+    def __init__(self, max_size: int = 10000, ttl: Optional[float] = 3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str, target_lang: str) -> Optional[Dict]:
+        key = (target_lang, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, result = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, text: str, target_lang: str, result: Dict):
+        if self.max_size <= 0:
+            return
+        key = (target_lang, text)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _ClientBase:
+    """Configuration and retry/backoff policy shared by the sync and async clients"""
+
+    def __init__(self, api_key: str, base_url: str = API_BASE_URL,
+                 max_batch_size: int = MAX_BATCH_SIZE, batch_linger: float = 0.02,
+                 cache_size: int = 10000, cache_ttl: Optional[float] = 3600,
+                 max_concurrency: int = 8, max_retries: int = 5,
+                 backoff_base: float = 0.5, backoff_max: float = 60.0,
+                 timeout: float = 30.0):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.max_batch_size = max(1, min(max_batch_size, MAX_BATCH_SIZE))
+        self.batch_linger = batch_linger
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.cache = ResultCache(cache_size, cache_ttl)
+        self.headers = {
+            'X-API-KEY': api_key,
+            'Content-Type': 'application/json'
+        }
+
+    @staticmethod
+    def _is_retryable(method: str, status_code: int) -> bool:
+        if method.upper() == 'POST':
+            return status_code in RETRYABLE_POST_STATUS_CODES
+        return status_code in RETRYABLE_STATUS_CODES
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _server_retry_delay(self, headers, payload: Optional[Dict]) -> Optional[float]:
+        """Delay requested by the server via Retry-After or ip_rate_limit.reset_times"""
+        retry_after = headers.get('Retry-After') if headers else None
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+
+        ip_rate_limit = (payload or {}).get('ip_rate_limit') or {}
+        reset_times = ip_rate_limit.get('reset_times') or {}
+        remaining = ip_rate_limit.get('remaining') or {}
+        # Wait for the window that is actually exhausted, not the shortest one
+        exhausted = [window for window, left in remaining.items() if left == 0] or list(reset_times)
+
+        now = datetime.now(timezone.utc)
+        delays = []
+        for window in exhausted:
+            reset_at = reset_times.get(window)
+            if not reset_at:
+                continue
+            try:
+                reset_dt = datetime.fromisoformat(reset_at.replace('Z', '+00:00'))
+            except ValueError:
+                continue
+            if reset_dt.tzinfo is None:
+                reset_dt = reset_dt.replace(tzinfo=timezone.utc)
+            delays.append(max(0.0, (reset_dt - now).total_seconds()))
+
+        return max(delays) if delays else None
+
+    def _retry_delay(self, attempt: int, status_code: int, headers, payload: Optional[Dict]) -> Optional[float]:
+        """
+        Decide how long to wait before retrying, or None if we should give up
+        """
+        if attempt >= self.max_retries:
+            return None
+
+        server_delay = self._server_retry_delay(headers, payload) if status_code in (429, 503) else None
+        if server_delay is not None:
+            if server_delay > self.backoff_max:
+                # e.g. the hourly or daily IP window is exhausted; don't hold the caller hostage
+                return None
+            # Small jitter so coalesced clients don't all retry on the same tick
+            return server_delay + random.uniform(0, self.backoff_base)
+
+        return self._backoff_delay(attempt)
+
+    @staticmethod
+    def _parse_json(resp) -> Dict:
+        try:
+            return resp.json()
+        except ValueError:
+            return {'success': False, 'error': resp.text}
+
+    def _raise_for_response(self, status_code: int, payload: Dict, retry_delay: Optional[float] = None):
+        error = payload.get('error', f'HTTP {status_code}')
+        if status_code == 429:
+            raise RateLimitedError(error, retry_after=retry_delay, payload=payload)
+        raise TranslateAllError(error, status_code=status_code, payload=payload)
+
+    @staticmethod
+    def _is_ip_limited(result: Dict) -> bool:
+        return not result.get('success') and bool(result.get('ip_rate_limit'))
+
+    def _remember(self, text: str, target_lang: str, result: Dict):
+        if result.get('success'):
+            self.cache.put(text, target_lang, result)
+
+
+class TranslateAllClient(_ClientBase):
+    """
+    Thread-safe client for the TranslateAll API.
+
+    Individual translate() calls made from any number of threads are coalesced
+    into /translate-batch requests of up to max_batch_size texts, sent over a
+    pooled session with at most max_concurrency requests in flight.
+    """
+
+    def __init__(self, api_key: str, base_url: str = API_BASE_URL, **kwargs):
+        super().__init__(api_key, base_url, **kwargs)
+
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=self.max_concurrency, pool_maxsize=self.max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                            thread_name_prefix='translateall')
+
+        # target_lang -> OrderedDict(text -> [Future, ...])
+        self._pending = {}
+        self._pending_since = {}
+        self._pending_lock = threading.Condition()
+        self._closed = False
+        self._flusher = threading.Thread(target=self._flush_loop, name='translateall-batcher', daemon=True)
+        self._flusher.start()
+
+    # ---- HTTP ----
+
+    def _request(self, method: str, path: str, **kwargs) -> Tuple[int, Dict]:
+        """Send a request with concurrency limiting and retry/backoff"""
+        attempt = 0
+        while True:
+            try:
+                with self._semaphore:
+                    resp = self.session.request(method, f"{self.base_url}{path}",
+                                                timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise TranslateAllError(f'Connection error: {e}') from e
+                time.sleep(self._backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            payload = self._parse_json(resp)
+            if not self._is_retryable(method, resp.status_code):
+                return resp.status_code, payload
+
+            delay = self._retry_delay(attempt, resp.status_code, resp.headers, payload)
+            if delay is None:
+                self._raise_for_response(resp.status_code, payload,
+                                         self._server_retry_delay(resp.headers, payload))
+            time.sleep(delay)
+            attempt += 1
+
+    def _post_batch(self, texts: List[str], target_lang: str) -> List[Dict]:
+        """POST one /translate-batch request, retrying texts that hit the IP limit"""
+        results = [None] * len(texts)
+        todo = list(range(len(texts)))
+        attempt = 0
+
+        while todo:
+            status, payload = self._request('POST', '/translate-batch',
+                                            json={'texts': [texts[i] for i in todo], 'target': target_lang})
+            if status != 200 or not payload.get('success'):
+                self._raise_for_response(status, payload)
+
+            retry = []
+            retry_payload = None
+            for i, result in zip(todo, payload.get('results', [])):
+                results[i] = result
+                if self._is_ip_limited(result):
+                    retry.append(i)
+                    retry_payload = result
+
+            if not retry:
+                break
+            delay = self._retry_delay(attempt, 429, None, retry_payload)
+            if delay is None:
+                break
+            time.sleep(delay)
+            todo = retry
+            attempt += 1
+
+        return results
+
+    # ---- Auto-batching ----
+
+    def _flush_loop(self):
+        while True:
+            with self._pending_lock:
+                while not self._pending and not self._closed:
+                    self._pending_lock.wait()
+                if self._closed and not self._pending:
+                    return
+
+                now = time.monotonic()
+                ready = [lang for lang, since in self._pending_since.items()
+                         if self._closed or now - since >= self.batch_linger
+                         or len(self._pending[lang]) >= self.max_batch_size]
+                if not ready:
+                    wait = min(self.batch_linger - (now - since) for since in self._pending_since.values())
+                    self._pending_lock.wait(max(wait, 0.001))
+                    continue
+
+                batches = []
+                for lang in ready:
+                    items = self._pending.pop(lang)
+                    del self._pending_since[lang]
+                    batches.append((lang, items))
+
+            for lang, items in batches:
+                texts = list(items)
+                for i in range(0, len(texts), self.max_batch_size):
+                    chunk = texts[i:i + self.max_batch_size]
+                    self._executor.submit(self._dispatch, lang, [(t, items[t]) for t in chunk])
+
+    def _dispatch(self, target_lang: str, items: List[Tuple[str, List[Future]]]):
+        try:
+            results = self._post_batch([text for text, _ in items], target_lang)
+        except Exception as e:
+            for _, futures in items:
+                for future in futures:
+                    future.set_exception(e)
+            return
+
+        for (text, futures), result in zip(items, results):
+            result = result or {'success': False, 'error': 'Missing result'}
+            self._remember(text, target_lang, result)
+            for future in futures:
+                future.set_result(result)
+
+    def translate_future(self, text: str, target_lang: str = 'ES') -> Future:
+        """Queue a translation and return a Future for its result dict"""
+        cached = self.cache.get(text, target_lang)
+        if cached is not None:
+            future = Future()
+            future.set_result(dict(cached, client_cached=True))
+            return future
+
+        future = Future()
+        with self._pending_lock:
+            if self._closed:
+                raise TranslateAllError('Client is closed')
+            items = self._pending.setdefault(target_lang, OrderedDict())
+            self._pending_since.setdefault(target_lang, time.monotonic())
+            # Identical texts in the same window share one slot in the batch
+            items.setdefault(text, []).append(future)
+            self._pending_lock.notify()
+        return future
+
+    # ---- Public API ----
+
+    def translate(self, text: str, target_lang: str = 'ES') -> Dict:
+        """Translate a single text; concurrent calls are coalesced into batch requests"""
+        return self.translate_future(text, target_lang).result()
+
+    def translate_many(self, texts: List[str], target_lang: str = 'ES') -> List[Dict]:
+        """Translate a list of texts, preserving order"""
+        futures = [self.translate_future(text, target_lang) for text in texts]
+        return [future.result() for future in futures]
+
+    def populate_cache(self, target_lang: str = 'ES') -> Dict:
+        """Start priority cache population for a language"""
+        status, payload = self._request('POST', '/cache-populate', json={'target_lang': target_lang})
+        if status != 200:
+            self._raise_for_response(status, payload)
+        return payload
+
+    def cache_status(self, target_lang: str = 'ES') -> Dict:
+        """Get priority cache status for a language"""
+        status, payload = self._request('GET', '/cache-status', params={'lang': target_lang})
+        if status != 200:
+            self._raise_for_response(status, payload)
+        return payload
+
+    def performance_metrics(self) -> Dict:
+        """Get server-side performance metrics"""
+        status, payload = self._request('GET', '/performance-metrics')
+        if status != 200:
+            self._raise_for_response(status, payload)
+        return payload
+
+    def close(self):
+        """Flush pending translations and release pooled connections"""
+        with self._pending_lock:
+            self._closed = True
+            self._pending_lock.notify_all()
+        self._flusher.join()
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncTranslateAllClient(_ClientBase):
+    """
+    Asyncio variant of TranslateAllClient built on aiohttp.
+
+    Must be created and used from within a running event loop.
+    """
+
+    def __init__(self, api_key: str, base_url: str = API_BASE_URL, **kwargs):
+        super().__init__(api_key, base_url, **kwargs)
+        self._session = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._pending = {}
+        self._flush_handles = {}
+        self._tasks = set()
+
+    async def _get_session(self):
+        if self._session is None:
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    # ---- HTTP ----
+
+    async def _request(self, method: str, path: str, **kwargs) -> Tuple[int, Dict]:
+        """Send a request with concurrency limiting and retry/backoff"""
+        import aiohttp
+
+        session = await self._get_session()
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    async with session.request(method, f"{self.base_url}{path}", **kwargs) as resp:
+                        status = resp.status
+                        headers = resp.headers
+                        try:
+                            payload = await resp.json(content_type=None)
+                        except ValueError:
+                            payload = {'success': False, 'error': await resp.text()}
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= self.max_retries:
+                    raise TranslateAllError(f'Connection error: {e}') from e
+                await asyncio.sleep(self._backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            if not self._is_retryable(method, status):
+                return status, payload
+
+            delay = self._retry_delay(attempt, status, headers, payload)
+            if delay is None:
+                self._raise_for_response(status, payload, self._server_retry_delay(headers, payload))
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _post_batch(self, texts: List[str], target_lang: str) -> List[Dict]:
+        """POST one /translate-batch request, retrying texts that hit the IP limit"""
+        results = [None] * len(texts)
+        todo = list(range(len(texts)))
+        attempt = 0
+
+        while todo:
+            status, payload = await self._request('POST', '/translate-batch',
+                                                  json={'texts': [texts[i] for i in todo], 'target': target_lang})
+            if status != 200 or not payload.get('success'):
+                self._raise_for_response(status, payload)
+
+            retry = []
+            retry_payload = None
+            for i, result in zip(todo, payload.get('results', [])):
+                results[i] = result
+                if self._is_ip_limited(result):
+                    retry.append(i)
+                    retry_payload = result
+
+            if not retry:
+                break
+            delay = self._retry_delay(attempt, 429, None, retry_payload)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+            todo = retry
+            attempt += 1
+
+        return results
+
+    # ---- Auto-batching ----
+
+    def _schedule_flush(self, target_lang: str):
+        items = self._pending[target_lang]
+        if len(items) >= self.max_batch_size:
+            handle = self._flush_handles.pop(target_lang, None)
+            if handle:
+                handle.cancel()
+            self._flush(target_lang)
+        elif target_lang not in self._flush_handles:
+            loop = asyncio.get_running_loop()
+            self._flush_handles[target_lang] = loop.call_later(self.batch_linger, self._flush, target_lang)
+
+    def _flush(self, target_lang: str):
+        self._flush_handles.pop(target_lang, None)
+        items = self._pending.pop(target_lang, None)
+        if not items:
+            return
+        task = asyncio.ensure_future(self._dispatch(target_lang, list(items.items())))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, target_lang: str, items: List[Tuple[str, List[asyncio.Future]]]):
+        try:
+            results = await self._post_batch([text for text, _ in items], target_lang)
+        except Exception as e:
+            for _, futures in items:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for (text, futures), result in zip(items, results):
+            result = result or {'success': False, 'error': 'Missing result'}
+            self._remember(text, target_lang, result)
+            for future in futures:
+                if not future.done():
+                    future.set_result(result)
+
+    # ---- Public API ----
+
+    async def translate(self, text: str, target_lang: str = 'ES') -> Dict:
+        """Translate a single text; concurrent calls are coalesced into batch requests"""
+        cached = self.cache.get(text, target_lang)
+        if cached is not None:
+            return dict(cached, client_cached=True)
+
+        future = asyncio.get_running_loop().create_future()
+        items = self._pending.setdefault(target_lang, OrderedDict())
+        items.setdefault(text, []).append(future)
+        self._schedule_flush(target_lang)
+        return await future
+
+    async def translate_many(self, texts: List[str], target_lang: str = 'ES') -> List[Dict]:
+        """Translate a list of texts, preserving order"""
+        return list(await asyncio.gather(*(self.translate(text, target_lang) for text in texts)))
+
+    async def populate_cache(self, target_lang: str = 'ES') -> Dict:
+        """Start priority cache population for a language"""
+        status, payload = await self._request('POST', '/cache-populate', json={'target_lang': target_lang})
+        if status != 200:
+            self._raise_for_response(status, payload)
+        return payload
+
+    async def cache_status(self, target_lang: str = 'ES') -> Dict:
+        """Get priority cache status for a language"""
+        status, payload = await self._request('GET', '/cache-status', params={'lang': target_lang})
+        if status != 200:
+            self._raise_for_response(status, payload)
+        return payload
+
+    async def performance_metrics(self) -> Dict:
+        """Get server-side performance metrics"""
+        status, payload = await self._request('GET', '/performance-metrics')
+        if status != 200:
+            self._raise_for_response(status, payload)
+        return payload
+
+    async def close(self):
+        """Flush pending translations and release pooled connections"""
+        for target_lang in list(self._pending):
+            handle = self._flush_handles.pop(target_lang, None)
+            if handle:
+                handle.cancel()
+            self._flush(target_lang)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()